@@ -4,6 +4,7 @@ from sqlalchemy.dialects.postgresql import insert
 
 from app.api.cadastros.models.model_entregador_dv import EntregadorDeliveryModel
 from app.api.cadastros.models.association_tables import entregador_empresa
+from app.api.cadastros.services.telefones_entregadores import invalidar_telefones_entregadores
 
 
 class EntregadorRepository:
@@ -22,6 +23,7 @@ class EntregadorRepository:
         self.db.add(obj)
         self.db.commit()
         self.db.refresh(obj)
+        invalidar_telefones_entregadores()
 
         if empresa_id:
             stmt = insert(entregador_empresa).values(
@@ -38,6 +40,7 @@ class EntregadorRepository:
             setattr(obj, f, v)
         self.db.commit()
         self.db.refresh(obj)
+        invalidar_telefones_entregadores()
         return obj
 
     def vincular_empresa(self, entregador_id: int, empresa_id: int):
@@ -63,4 +66,5 @@ class EntregadorRepository:
     def delete(self, obj: EntregadorDeliveryModel):
         self.db.delete(obj)
         self.db.commit()
+        invalidar_telefones_entregadores()
 
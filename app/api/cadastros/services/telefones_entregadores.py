@@ -0,0 +1,71 @@
+"""
+Telefones dos entregadores em memória, para o chatbot ignorar mensagens de entregadores.
+
+O chatbot verifica a cada mensagem recebida se o remetente é entregador. Em vez de
+consultar `cadastros.entregadores_dv` com `LIKE '%...'` (sem índice), cada worker
+guarda um dicionário chave -> entregador, onde a chave são os últimos 8 dígitos do
+telefone (mesmo critério das buscas antigas: ignora 55, DDD e o nono dígito).
+
+O `EntregadorRepository` invalida o cache após create/update/delete, e a versão
+compartilhada (sequence no Postgres) propaga a invalidação para os outros workers.
+"""
+from __future__ import annotations
+
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database.db_connection import SessionLocal
+from app.utils.prometheus_metrics import memory_cache_requests_total
+from app.utils.versao_compartilhada import CacheVersionado, VersaoCompartilhada
+
+SEQUENCE_VERSAO = "cadastros.entregadores_telefones_version_seq"
+
+_CHAVE = "todos"
+
+_cache = CacheVersionado(
+    VersaoCompartilhada(SEQUENCE_VERSAO, intervalo_checagem=settings.ENTREGADORES_TELEFONES_CHECAGEM_SEGUNDOS),
+    max_itens=1,
+    ttl_segundos=settings.ENTREGADORES_TELEFONES_TTL_SEGUNDOS,
+)
+
+
+class EntregadorTelefone(NamedTuple):
+    id: int
+    nome: str
+    telefone: str
+
+
+def chave_telefone(telefone: Optional[str]) -> Optional[str]:
+    """Últimos 8 dígitos do telefone (ou todos, se tiver menos)."""
+    digits = "".join(ch for ch in str(telefone or "") if ch.isdigit())
+    return digits[-8:] or None
+
+
+def _carregar() -> Dict[str, EntregadorTelefone]:
+    with SessionLocal() as db:
+        rows = db.execute(
+            text("SELECT id, nome, telefone FROM cadastros.entregadores_dv WHERE telefone IS NOT NULL")
+        ).fetchall()
+    entregadores: Dict[str, EntregadorTelefone] = {}
+    for id_, nome, telefone in rows:
+        chave = chave_telefone(telefone)
+        if chave:
+            entregadores.setdefault(chave, EntregadorTelefone(id_, nome, telefone))
+    return entregadores
+
+
+def buscar_entregador_por_telefone(telefone: Optional[str]) -> Optional[EntregadorTelefone]:
+    """Entregador cujo telefone corresponde a `telefone`, ou None."""
+    chave = chave_telefone(telefone)
+    if not chave:
+        return None
+    entregadores, hit = _cache.get(_CHAVE, _carregar)
+    memory_cache_requests_total.labels(cache="entregadores_telefones", resultado="hit" if hit else "miss").inc()
+    return entregadores.get(chave)
+
+
+def invalidar_telefones_entregadores() -> None:
+    """Descarta os telefones em cache (neste worker e, via versão, nos demais)."""
+    _cache.invalidar()
@@ -34,14 +34,12 @@ def _run_async_in_thread(coro, db_session=None):
         db_session: Sessão do banco de dados que será fechada após a execução (opcional)
     """
     def _run():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(coro)
+            # asyncio.run cancela as tasks pendentes ao encerrar (fecha os clientes HTTP do loop)
+            asyncio.run(coro)
         except Exception as e:
             logger.error(f"Erro ao executar corrotina em thread: {e}", exc_info=True)
         finally:
-            loop.close()
             # Fecha a sessão do banco se foi fornecida
             if db_session:
                 try:
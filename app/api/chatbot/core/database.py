@@ -49,6 +49,7 @@ _pass_through_names = [
     "create_conversation",
     "create_message",
     "get_conversations_by_user",
+    "list_conversations",
     "get_conversation_with_messages",
     "get_messages",
     "get_stats",
@@ -57,6 +58,9 @@ _pass_through_names = [
     "is_bot_globally_active",
     "get_auto_pause_until",
     "get_all_bot_statuses",
+    "whatsapp_message_id_registrado",
+    "registrar_whatsapp_message_id",
+    "limpar_whatsapp_message_ids",
 ]
 
 for _name in _pass_through_names:
@@ -1,39 +1,70 @@
 """Real Groq sales handler: integra com a API Groq (chat completions).
 Fornece extração de nome por modelo e mantém compatibilidade com o fluxo de
 cadastro rápido (STATE_CADASTRO_NOME). Em caso de falha na Groq, usa heurística
-local como fallback.
+local como fallback (palavras-chave de `intention_agents` no fluxo genérico).
+
+As chamadas passam pelo cliente compartilhado (`llm_client`): keep-alive, limite de
+concorrência por empresa e circuit breaker.
 """
 from typing import Optional, Any, Dict
 import json
 import logging
 
-import httpx
-
 from app.config.settings import MODEL_NAME, GROQ_API_URL, GROQ_API_KEY, STATE_CADASTRO_NOME
 
+from .intention_agents import IntentionRouter, IntentionType
+from .llm_client import LLMClient, LLMIndisponivel, llm_client
+
 logging.getLogger(__name__)
 
+# Respostas usadas quando o LLM está indisponível (circuito aberto / sem vaga), pela intenção detectada
+_RESPOSTAS_SEM_LLM = {
+    IntentionType.VER_CARDAPIO: "Estamos com muitas mensagens agora. Em instantes te envio o cardápio! 😊",
+    IntentionType.ORDER: "Estamos com muitas mensagens agora. Me conta o que você gostaria de pedir que já te atendo!",
+    IntentionType.ACOMPANHAR_PEDIDO: "Estamos com muitas mensagens agora. Já vou verificar o status do seu pedido, só um instante!",
+}
+
+
+def resposta_sem_llm(mensagem: str, db: Any = None, empresa_id: Optional[Any] = None) -> str:
+    """Resposta pelo caminho de palavras-chave (com os termos da empresa), para quando o LLM não pode ser chamado."""
+    empresa_id = int(empresa_id) if str(empresa_id or "").isdigit() else None
+    palavras_chave = None
+    if db is not None and empresa_id is not None:
+        try:
+            from .infrastructure.config_cache import get_chatbot_config
+
+            palavras_chave = getattr(get_chatbot_config(db, empresa_id), "palavras_chave", None)
+        except Exception as e:
+            logging.getLogger(__name__).warning("Falha ao carregar palavras-chave da empresa %s: %s", empresa_id, e)
+    intencao = IntentionRouter(empresa_id=empresa_id, palavras_chave=palavras_chave).route(mensagem)
+    return _RESPOSTAS_SEM_LLM.get(intencao, "Desculpe, não consegui processar sua mensagem agora. Pode repetir?")
+
 
 class GroqSalesHandler:
-    def __init__(self, model: str = MODEL_NAME, api_url: str = GROQ_API_URL, api_key: str = GROQ_API_KEY, timeout: float = 30.0):
+    def __init__(
+        self,
+        model: str = MODEL_NAME,
+        api_url: str = GROQ_API_URL,
+        api_key: str = GROQ_API_KEY,
+        timeout: float = 30.0,
+        empresa_id: Optional[Any] = None,
+        client: Optional[LLMClient] = None,
+    ):
         self.model = model
-        self.api_url = api_url
-        self.api_key = api_key
-        self.timeout = timeout
+        self.empresa_id = empresa_id
+        if client is None and (api_url, api_key) == (GROQ_API_URL, GROQ_API_KEY):
+            client = llm_client
+        self.client = client or LLMClient(api_url=api_url, api_key=api_key, timeout=timeout)
 
-    async def _call_groq(self, messages: list, temperature: float = 0.0) -> Dict[str, Any]:
+    async def _call_groq(self, messages: list, temperature: float = 0.0, cachear: bool = False) -> Dict[str, Any]:
         """Chama a Groq (API compatível com OpenAI chat completions)."""
-        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "stream": False,
-        }
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            resp = await client.post(self.api_url, json=payload, headers=headers)
-            resp.raise_for_status()
-            return resp.json()
+        return await self.client.chat(
+            messages,
+            model=self.model,
+            temperature=temperature,
+            empresa_id=self.empresa_id,
+            cachear=cachear,
+        )
 
     async def extract_full_name(self, mensagem: str) -> Optional[str]:
         """
@@ -51,7 +82,8 @@ class GroqSalesHandler:
             {"role": "user", "content": mensagem},
         ]
         try:
-            result = await self._call_groq(messages, temperature=0.0)
+            # Prompt determinístico: a mesma mensagem sempre extrai o mesmo nome
+            result = await self._call_groq(messages, temperature=0.0, cachear=True)
             assistant_message = result["choices"][0]["message"]["content"]
             # Tentar parsear JSON retornado
             parsed = json.loads(assistant_message)
@@ -80,7 +112,7 @@ async def processar_mensagem_groq(*args, **kwargs) -> Optional[Any]:
     if not mensagem or not user_id or not db:
         return "Desculpe, não consegui processar. Pode repetir?"
 
-    handler = GroqSalesHandler()
+    handler = GroqSalesHandler(empresa_id=empresa_id)
 
     try:
         # Se for fluxo de cadastro por nome, priorizamos extração do nome
@@ -178,6 +210,8 @@ async def processar_mensagem_groq(*args, **kwargs) -> Optional[Any]:
             result = await handler._call_groq(messages)
             assistant_message = result["choices"][0]["message"]["content"]
             return assistant_message
+        except LLMIndisponivel:
+            return resposta_sem_llm(mensagem, db=db, empresa_id=empresa_id)
         except Exception:
             # fallback simples
             return "Desculpe, não consegui processar sua mensagem agora. Pode repetir?"
@@ -187,5 +221,5 @@ async def processar_mensagem_groq(*args, **kwargs) -> Optional[Any]:
         return "Desculpe, ocorreu um erro ao processar sua mensagem."
 
 
-__all__ = ["MODEL_NAME", "GROQ_API_URL", "GROQ_API_KEY", "GroqSalesHandler", "processar_mensagem_groq", "STATE_CADASTRO_NOME"]
+__all__ = ["MODEL_NAME", "GROQ_API_URL", "GROQ_API_KEY", "GroqSalesHandler", "processar_mensagem_groq", "resposta_sem_llm", "STATE_CADASTRO_NOME"]
 
@@ -0,0 +1,42 @@
+"""
+Cache por worker das linhas de `chatbot.bot_status` (status global e por telefone).
+
+Todo webhook consulta o status global e o do telefone do cliente; o status muda
+poucas vezes por dia (pausar/retomar). O cache guarda a linha crua (ou "sem
+registro") por telefone normalizado, e `is_active` continua sendo calculado na
+leitura, então pausas com data de término expiram no horário certo.
+
+`set_bot_status`/`set_global_bot_status` invalidam o cache após o commit; a versão
+compartilhada (sequence no Postgres) propaga a invalidação para os outros workers.
+O TTL curto é só uma rede de segurança para alterações feitas fora dessas funções.
+"""
+from __future__ import annotations
+
+from typing import Callable, Optional, Tuple
+
+from app.config import settings
+from app.utils.prometheus_metrics import memory_cache_requests_total
+from app.utils.versao_compartilhada import CacheVersionado, VersaoCompartilhada
+
+SEQUENCE_VERSAO = "chatbot.bot_status_version_seq"
+
+# (id, phone_number, paused_at, paused_by, empresa_id, desativa_chatbot_em)
+BotStatusRow = Tuple
+
+_cache = CacheVersionado(
+    VersaoCompartilhada(SEQUENCE_VERSAO, intervalo_checagem=settings.CHATBOT_BOT_STATUS_CACHE_CHECAGEM_SEGUNDOS),
+    max_itens=settings.CHATBOT_BOT_STATUS_CACHE_MAX_ITENS,
+    ttl_segundos=settings.CHATBOT_BOT_STATUS_CACHE_TTL_SEGUNDOS,
+)
+
+
+def get_bot_status_row(phone_number: str, carregar: Callable[[], Optional[BotStatusRow]]) -> Optional[BotStatusRow]:
+    """Linha de bot_status do telefone (já normalizado); `carregar` consulta o banco em caso de miss."""
+    row, hit = _cache.get(phone_number, carregar)
+    memory_cache_requests_total.labels(cache="bot_status", resultado="hit" if hit else "miss").inc()
+    return row
+
+
+def invalidate_bot_status_cache() -> None:
+    """Descarta os status em cache (neste worker e, via versão, nos demais)."""
+    _cache.invalidar()
@@ -0,0 +1,97 @@
+"""
+Cache por worker da configuração do chatbot por empresa e dos prompts (`chatbot.prompts`).
+
+O processamento de cada mensagem lia `chatbot_configs` (ORM com joinedload da
+empresa), o `cardapio_link` da empresa e o prompt da conversa; tudo muda só quando
+um admin edita. Aqui ficam snapshots imutáveis (não objetos ORM presos a uma
+sessão): `ChatbotConfigSnapshot`, o link do cardápio e o dict do prompt.
+
+Quem altera esses dados (repositório de configs, edição de empresa, CRUD de
+prompts) chama `invalidate_chatbot_config_cache()` após o commit; a versão
+compartilhada (sequence no Postgres) propaga a invalidação para os outros workers.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.utils.prometheus_metrics import memory_cache_requests_total
+from app.utils.versao_compartilhada import CacheVersionado, VersaoCompartilhada
+
+SEQUENCE_VERSAO = "chatbot.config_version_seq"
+
+_cache = CacheVersionado(
+    VersaoCompartilhada(SEQUENCE_VERSAO, intervalo_checagem=settings.CHATBOT_CONFIG_CACHE_CHECAGEM_SEGUNDOS),
+    max_itens=settings.CHATBOT_CONFIG_CACHE_MAX_ITENS,
+    ttl_segundos=settings.CHATBOT_CONFIG_CACHE_TTL_SEGUNDOS,
+)
+
+
+class ChatbotConfigSnapshot(NamedTuple):
+    """Cópia dos campos de `ChatbotConfigModel` (mesmos nomes de atributo)."""
+
+    id: int
+    empresa_id: int
+    nome: str
+    personalidade: Optional[str]
+    aceita_pedidos_whatsapp: bool
+    mensagem_boas_vindas: Optional[str]
+    mensagem_redirecionamento: Optional[str]
+    palavras_chave: Optional[Dict[str, Any]]
+    ativo: bool
+
+
+def _get(tipo: str, chave: str, carregar: Callable[[], Any]) -> Any:
+    valor, hit = _cache.get(f"{tipo}:{chave}", carregar)
+    memory_cache_requests_total.labels(cache=f"chatbot_{tipo}", resultado="hit" if hit else "miss").inc()
+    return valor
+
+
+def get_chatbot_config(db: Session, empresa_id: int) -> Optional[ChatbotConfigSnapshot]:
+    """Configuração do chatbot da empresa (ou None se não houver)."""
+
+    def carregar() -> Optional[ChatbotConfigSnapshot]:
+        from app.api.chatbot.models.model_chatbot_config import ChatbotConfigModel
+
+        config = db.query(ChatbotConfigModel).filter(ChatbotConfigModel.empresa_id == empresa_id).first()
+        if config is None:
+            return None
+        return ChatbotConfigSnapshot(
+            id=config.id,
+            empresa_id=config.empresa_id,
+            nome=config.nome,
+            personalidade=config.personalidade,
+            aceita_pedidos_whatsapp=config.aceita_pedidos_whatsapp,
+            mensagem_boas_vindas=config.mensagem_boas_vindas,
+            mensagem_redirecionamento=config.mensagem_redirecionamento,
+            palavras_chave=config.palavras_chave,
+            ativo=config.ativo,
+        )
+
+    return _get("config", str(empresa_id), carregar)
+
+
+def get_cardapio_link(db: Session, empresa_id: int) -> Optional[str]:
+    """`cadastros.empresas.cardapio_link` da empresa (None se vazio/inexistente)."""
+
+    def carregar() -> Optional[str]:
+        row = db.execute(
+            text("SELECT cardapio_link FROM cadastros.empresas WHERE id = :empresa_id"),
+            {"empresa_id": empresa_id},
+        ).fetchone()
+        return row[0] if row and row[0] else None
+
+    return _get("cardapio", str(empresa_id), carregar)
+
+
+def get_prompt_cached(key: str, empresa_id: Optional[int], carregar: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+    """Prompt `key` da empresa; `carregar` consulta o banco em caso de miss. Não altere o dict retornado."""
+    return _get("prompt", f"{key}:{empresa_id}", carregar)
+
+
+def invalidate_chatbot_config_cache() -> None:
+    """Descarta configs, links e prompts em cache (neste worker e, via versão, nos demais)."""
+    _cache.invalidar()
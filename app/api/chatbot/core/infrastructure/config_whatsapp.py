@@ -2,11 +2,8 @@
 
 import os
 from typing import Optional, Dict
-from contextlib import contextmanager
 
-from app.database.db_connection import SessionLocal
-from app.api.notifications.repositories.whatsapp_config_repository import WhatsAppConfigRepository
-from app.api.notifications.services.whatsapp_config_service import WhatsAppConfigService
+from app.api.notifications.core.whatsapp_config_cache import get_active_whatsapp_config
 
 # Configuração padrão agora usa 360dialog e evita credenciais hard-coded
 D360_BASE_URL = os.getenv("D360_BASE_URL", "https://waba-v2.360dialog.io")
@@ -31,37 +28,26 @@ DEFAULT_WHATSAPP_CONFIG: Dict[str, str] = {
 }
 
 
-@contextmanager
-def _service_ctx():
-    db = SessionLocal()
-    try:
-        service = WhatsAppConfigService(WhatsAppConfigRepository(db))
-        yield service
-    finally:
-        db.close()
-
-
 def load_whatsapp_config(empresa_id: Optional[str] = None) -> Dict[str, str]:
     """
-    Busca a configuração ativa no banco para a empresa informada.
+    Busca a configuração ativa para a empresa informada (cache por worker,
+    invalidado quando a configuração é salva).
     Se não houver, retorna o fallback vazio (DEFAULT_WHATSAPP_CONFIG).
     """
-    with _service_ctx() as service:
-        # Busca ativo por empresa quando informado; caso contrário, usa fallback do service (último ativo)
-        config = service.get_active_config(empresa_id)
-        if config:
-            cfg = WhatsAppConfigService.to_response_dict(config)
-            # Garante base_url/provider mesmo se não estiverem no banco
-            cfg.setdefault("base_url", D360_BASE_URL)
-            cfg.setdefault("provider", "360dialog")
-            cfg.setdefault("webhook_url", "")
-            cfg.setdefault("webhook_verify_token", "")
-            cfg.setdefault("webhook_header_key", "")
-            cfg.setdefault("webhook_header_value", "")
-            cfg.setdefault("webhook_is_active", False)
-            cfg.setdefault("webhook_status", "pending")
-            cfg.setdefault("webhook_last_sync", None)
-            return cfg
+    # Busca ativo por empresa quando informado; caso contrário, usa fallback do service (último ativo)
+    cfg = get_active_whatsapp_config(empresa_id)
+    if cfg:
+        # Garante base_url/provider mesmo se não estiverem no banco
+        cfg.setdefault("base_url", D360_BASE_URL)
+        cfg.setdefault("provider", "360dialog")
+        cfg.setdefault("webhook_url", "")
+        cfg.setdefault("webhook_verify_token", "")
+        cfg.setdefault("webhook_header_key", "")
+        cfg.setdefault("webhook_header_value", "")
+        cfg.setdefault("webhook_is_active", False)
+        cfg.setdefault("webhook_status", "pending")
+        cfg.setdefault("webhook_last_sync", None)
+        return cfg
     return DEFAULT_WHATSAPP_CONFIG.copy()
 
 
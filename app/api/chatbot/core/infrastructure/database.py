@@ -11,12 +11,18 @@ import logging
 import json
 from datetime import datetime, timedelta, timezone, date
 
+from .bot_status_cache import get_bot_status_row, invalidate_bot_status_cache
+from .config_cache import get_prompt_cached, invalidate_chatbot_config_cache
+
 # Logger do módulo
 logger = logging.getLogger(__name__)
 
 # Schema do chatbot
 CHATBOT_SCHEMA = "chatbot"
 
+# Tamanho máximo de conversations.last_message_preview
+_PREVIEW_MAX = 200
+
 # ==================== NORMALIZAÇÃO / UNIFICAÇÃO DE TELEFONE (user_id) ====================
 
 def _user_id_canonical(phone_number: str) -> Optional[str]:
@@ -49,6 +55,7 @@ def _user_id_variants(phone_number: str) -> List[str]:
     - com/sem 55
     - com/sem 9 (celular)
     - corrige caso de "99" duplicado
+    - variante aprendida nos envios 360dialog (primeira da lista)
     """
     if not phone_number or not str(phone_number).strip():
         return []
@@ -69,6 +76,16 @@ def _user_id_variants(phone_number: str) -> List[str]:
     if canonical:
         out.append(canonical)
 
+    # Variante aceita pelo provedor nos envios (aprendida em whatsapp_phone_variants) vem primeiro
+    try:
+        from app.api.notifications.core.whatsapp_phone_variants import variante_aprendida
+
+        aprendida = variante_aprendida(raw)
+        if aprendida:
+            out.insert(0, aprendida)
+    except Exception:
+        pass
+
     # uniq mantendo ordem
     seen = set()
     uniq: List[str] = []
@@ -327,6 +344,42 @@ def init_database(db: Session):
             END $$;
         """))
 
+        # Ponteiro da última mensagem na conversa (mantido por create_message), para listar
+        # conversas sem agregar a tabela de mensagens. Na criação das colunas, preenche a partir do histórico.
+        db.execute(text(f"""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = '{CHATBOT_SCHEMA}'
+                    AND table_name = 'conversations'
+                    AND column_name = 'last_message_at'
+                ) THEN
+                    ALTER TABLE {CHATBOT_SCHEMA}.conversations
+                        ADD COLUMN last_message_at TIMESTAMP,
+                        ADD COLUMN last_message_preview TEXT,
+                        ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0;
+
+                    UPDATE {CHATBOT_SCHEMA}.conversations c
+                    SET last_message_at = lm.last_message_at,
+                        message_count = lm.message_count,
+                        last_message_preview = (
+                            SELECT LEFT(m.content, {_PREVIEW_MAX})
+                            FROM {CHATBOT_SCHEMA}.messages m
+                            WHERE m.conversation_id = c.id
+                            ORDER BY m.created_at DESC, m.id DESC
+                            LIMIT 1
+                        )
+                    FROM (
+                        SELECT conversation_id, MAX(created_at) AS last_message_at, COUNT(*) AS message_count
+                        FROM {CHATBOT_SCHEMA}.messages
+                        GROUP BY conversation_id
+                    ) lm
+                    WHERE lm.conversation_id = c.id;
+                END IF;
+            END $$;
+        """))
+
         # Tabela de status do bot por número (ativo/pausado)
         db.execute(text(f"""
             CREATE TABLE IF NOT EXISTS {CHATBOT_SCHEMA}.bot_status (
@@ -344,6 +397,11 @@ def init_database(db: Session):
             )
         """))
         
+        # Versão compartilhada do cache de status do bot (bot_status_cache)
+        db.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {CHATBOT_SCHEMA}.bot_status_version_seq"))
+        # Versão compartilhada do cache de configuração/prompts do chatbot (config_cache)
+        db.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {CHATBOT_SCHEMA}.config_version_seq"))
+
         # Adiciona coluna paused_until se não existir (migration legada)
         db.execute(text(f"""
             DO $$ 
@@ -449,11 +507,45 @@ def init_database(db: Session):
             WHERE paused_until IS NOT NULL AND chatbot_destrava_em IS NULL;
         """))
 
+        # Inbox durável dos webhooks do WhatsApp: o payload bruto é gravado na chegada
+        # e processado depois pelo pool de `webhook_inbox` (ordem por telefone em chave_ordem)
+        db.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {CHATBOT_SCHEMA}.webhook_inbox (
+                id BIGSERIAL PRIMARY KEY,
+                payload JSONB NOT NULL,
+                headers JSONB,
+                chave_ordem VARCHAR(50),
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                processed_at TIMESTAMP
+            )
+        """))
+
+        # Ids (messages[].id) das mensagens recebidas do WhatsApp: deduplica reentregas do webhook
+        db.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {CHATBOT_SCHEMA}.whatsapp_inbound_ids (
+                message_id VARCHAR(255) PRIMARY KEY,
+                empresa_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+
         # Índices para performance
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_whatsapp_inbound_ids_created ON {CHATBOT_SCHEMA}.whatsapp_inbound_ids(created_at)"))
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_webhook_inbox_fila ON {CHATBOT_SCHEMA}.webhook_inbox(status, next_attempt_at, id)"))
+        db.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_webhook_inbox_ordem ON {CHATBOT_SCHEMA}.webhook_inbox(chave_ordem, id) "
+            "WHERE status IN ('pending', 'processing')"
+        ))
         db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_conversations_session ON {CHATBOT_SCHEMA}.conversations(session_id)"))
         db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_conversations_user ON {CHATBOT_SCHEMA}.conversations(user_id)"))
         db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_conversations_empresa ON {CHATBOT_SCHEMA}.conversations(empresa_id)"))
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_conversations_updated ON {CHATBOT_SCHEMA}.conversations(updated_at DESC, id DESC)"))
         db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_messages_conversation ON {CHATBOT_SCHEMA}.messages(conversation_id)"))
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_messages_conversation_created ON {CHATBOT_SCHEMA}.messages(conversation_id, created_at, id)"))
         db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_prompts_key ON {CHATBOT_SCHEMA}.prompts(key)"))
         db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_prompts_empresa ON {CHATBOT_SCHEMA}.prompts(empresa_id)"))
         db.execute(text(f"CREATE INDEX IF NOT EXISTS idx_bot_status_phone ON {CHATBOT_SCHEMA}.bot_status(phone_number)"))
@@ -485,6 +577,7 @@ def create_prompt(db: Session, key: str, name: str, content: str, is_default: bo
             "empresa_id": empresa_id
         })
         db.commit()
+        invalidate_chatbot_config_cache()
         row = result.fetchone()
         if row:
             return {
@@ -503,28 +596,32 @@ def create_prompt(db: Session, key: str, name: str, content: str, is_default: bo
 
 
 def get_prompt(db: Session, key: str, empresa_id: Optional[int] = None) -> Optional[Dict]:
-    """Busca um prompt pela chave"""
-    query = text(f"""
-        SELECT id, key, name, content, is_default, empresa_id, created_at, updated_at
-        FROM {CHATBOT_SCHEMA}.prompts
-        WHERE key = :key AND (empresa_id = :empresa_id OR empresa_id IS NULL OR :empresa_id IS NULL)
-        ORDER BY empresa_id DESC NULLS LAST
-        LIMIT 1
-    """)
-    result = db.execute(query, {"key": key, "empresa_id": empresa_id})
-    row = result.fetchone()
-    if row:
-        return {
-            "id": row[0],
-            "key": row[1],
-            "name": row[2],
-            "content": row[3],
-            "is_default": row[4],
-            "empresa_id": row[5],
-            "created_at": row[6],
-            "updated_at": row[7]
-        }
-    return None
+    """Busca um prompt pela chave (via cache; retorna uma cópia)"""
+
+    def carregar() -> Optional[Dict]:
+        query = text(f"""
+            SELECT id, key, name, content, is_default, empresa_id, created_at, updated_at
+            FROM {CHATBOT_SCHEMA}.prompts
+            WHERE key = :key AND (empresa_id = :empresa_id OR empresa_id IS NULL OR :empresa_id IS NULL)
+            ORDER BY empresa_id DESC NULLS LAST
+            LIMIT 1
+        """)
+        row = db.execute(query, {"key": key, "empresa_id": empresa_id}).fetchone()
+        if row:
+            return {
+                "id": row[0],
+                "key": row[1],
+                "name": row[2],
+                "content": row[3],
+                "is_default": row[4],
+                "empresa_id": row[5],
+                "created_at": row[6],
+                "updated_at": row[7]
+            }
+        return None
+
+    prompt = get_prompt_cached(key, empresa_id, carregar)
+    return dict(prompt) if prompt else None
 
 
 def get_all_prompts(db: Session, empresa_id: Optional[int] = None) -> List[Dict]:
@@ -575,6 +672,7 @@ def update_prompt(db: Session, key: str, name: str, content: str, empresa_id: Op
         "empresa_id": empresa_id
     })
     db.commit()
+    invalidate_chatbot_config_cache()
     return result.rowcount > 0
 
 
@@ -587,6 +685,7 @@ def delete_prompt(db: Session, key: str, empresa_id: Optional[int] = None) -> bo
     """)
     result = db.execute(query, {"key": key, "empresa_id": empresa_id})
     db.commit()
+    invalidate_chatbot_config_cache()
     return result.rowcount > 0
 
 
@@ -708,6 +807,58 @@ def get_conversations_by_session(db: Session, session_id: str, empresa_id: Optio
     ]
 
 
+# Colunas da conversa + status do bot do telefone na mesma consulta (join pelo telefone
+# normalizado como em `_normalize_phone_number`: só dígitos, sem "00", com 55 para DDD + número)
+_SQL_SELECT_CONVERSAS = f"""
+        SELECT
+            c.id, c.session_id, c.user_id, c.contact_name, c.prompt_key, c.model, c.empresa_id,
+            c.profile_picture_url, c.created_at, c.updated_at,
+            c.last_message_at, c.last_message_preview, c.message_count,
+            bs.id AS bs_id, bs.phone_number AS bs_phone_number, bs.paused_at AS bs_paused_at,
+            bs.paused_by AS bs_paused_by, bs.empresa_id AS bs_empresa_id,
+            bs.desativa_chatbot_em AS bs_desativa_chatbot_em
+        FROM {CHATBOT_SCHEMA}.conversations c
+        CROSS JOIN LATERAL (
+            SELECT CASE WHEN LEFT(d, 2) = '00' AND LENGTH(d) > 2 THEN SUBSTR(d, 3) ELSE d END AS digits
+            FROM (SELECT REGEXP_REPLACE(c.user_id, '[^0-9]', '', 'g') AS d) s
+        ) tel
+        LEFT JOIN {CHATBOT_SCHEMA}.bot_status bs ON bs.phone_number = CASE
+            WHEN tel.digits = '' THEN BTRIM(c.user_id)
+            WHEN LEFT(tel.digits, 2) = '55' THEN tel.digits
+            WHEN LENGTH(tel.digits) IN (10, 11) THEN '55' || tel.digits
+            ELSE tel.digits
+        END
+"""
+
+
+def _conversa_dict(row) -> Dict:
+    """Converte uma linha de `_SQL_SELECT_CONVERSAS` no dict usado pelas rotas."""
+    if row["bs_id"] is not None:
+        bot_status = _bot_status_dict(
+            row["bs_id"], row["bs_phone_number"], row["bs_paused_at"], row["bs_paused_by"],
+            row["bs_empresa_id"], row["bs_desativa_chatbot_em"],
+        )
+    else:
+        # Sem registro: bot ativo por padrão
+        bot_status = {"phone_number": _normalize_phone_number(row["user_id"]), "is_active": True}
+    return {
+        "id": row["id"],
+        "session_id": row["session_id"],
+        "user_id": row["user_id"],
+        "contact_name": row["contact_name"],
+        "prompt_key": row["prompt_key"],
+        "model": row["model"],
+        "empresa_id": row["empresa_id"],
+        "profile_picture_url": row["profile_picture_url"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "last_message_at": row["last_message_at"],
+        "last_message_preview": row["last_message_preview"],
+        "message_count": row["message_count"] or 0,
+        "bot_status": bot_status,
+    }
+
+
 def get_conversations_by_user(
     db: Session,
     user_id: str,
@@ -761,10 +912,8 @@ def get_conversations_by_user(
     # - Usa a data da última mensagem quando existir (mais estável do que `c.updated_at`, que pode ser alterado
     #   por rotas administrativas/salvar estado).
     # - Fallback para `c.updated_at` quando não houver mensagens.
-    #
-    # Importante: o filtro por data aqui é aplicado no WHERE (com `last_message_at` pré-calculado),
-    # para evitar cenários em que HAVING/AGG acabem não sendo aplicados como esperado em SQL raw.
-    last_activity_expr = "COALESCE(lm.last_message_at, c.updated_at)"
+    # `last_message_at` é mantido na própria conversa por `create_message`.
+    last_activity_expr = "COALESCE(c.last_message_at, c.updated_at)"
 
     if dt_inicio is not None:
         where_clauses.append(f"{last_activity_expr} >= :dt_inicio")
@@ -773,51 +922,72 @@ def get_conversations_by_user(
 
     query = text(
         f"""
-        WITH last_messages AS (
-            SELECT
-                conversation_id,
-                MAX(created_at) AS last_message_at
-            FROM {CHATBOT_SCHEMA}.messages
-            GROUP BY conversation_id
-        )
-        SELECT
-            c.id, c.session_id, c.user_id, c.contact_name, c.prompt_key, c.model, c.empresa_id,
-            c.profile_picture_url, c.created_at, c.updated_at,
-            lm.last_message_at AS last_message_at
-        FROM {CHATBOT_SCHEMA}.conversations c
-        LEFT JOIN last_messages lm ON lm.conversation_id = c.id
+        {_SQL_SELECT_CONVERSAS}
         WHERE {' AND '.join(where_clauses)}
         ORDER BY {last_activity_expr} DESC
         """
     )
-    result = db.execute(query, params)
+    rows = db.execute(query, params).mappings().all()
+    return [_conversa_dict(row) for row in rows]
 
-    rows = result.fetchall()
-    conversations = []
-    for row in rows:
-        try:
-            bot_status = get_bot_status(db, row[2])
-        except Exception:
-            bot_status = {"phone_number": row[2], "is_active": True}
 
-        conversations.append(
-            {
-                "id": row[0],
-                "session_id": row[1],
-                "user_id": row[2],
-                "contact_name": row[3],
-                "prompt_key": row[4],
-                "model": row[5],
-                "empresa_id": row[6],
-                "profile_picture_url": row[7],
-                "created_at": row[8],
-                "updated_at": row[9],
-                "last_message_at": row[10],
-                "bot_status": bot_status,
-            }
-        )
+def list_conversations(
+    db: Session,
+    empresa_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[Tuple[datetime, int]] = None,
+) -> Tuple[List[Dict], Optional[Tuple[datetime, int]]]:
+    """Lista conversas (admin) por `updated_at` decrescente, com paginação keyset.
 
-    return conversations
+    `cursor` é o par (updated_at, id) da última conversa da página anterior.
+    Retorna (conversas, próximo cursor); o cursor é None na última página ou sem `limit`.
+    """
+    where_clauses = ["TRUE"]
+    params: Dict[str, Any] = {}
+    if empresa_id is not None:
+        where_clauses.append("c.empresa_id = :empresa_id")
+        params["empresa_id"] = empresa_id
+    if cursor is not None:
+        where_clauses.append("(c.updated_at, c.id) < (:cursor_updated_at, :cursor_id)")
+        params["cursor_updated_at"], params["cursor_id"] = cursor
+    limit_sql = ""
+    if limit is not None:
+        # Busca um a mais para saber se há próxima página
+        limit_sql = "LIMIT :limit"
+        params["limit"] = int(limit) + 1
+
+    query = text(
+        f"""
+        {_SQL_SELECT_CONVERSAS}
+        WHERE {' AND '.join(where_clauses)}
+        ORDER BY c.updated_at DESC, c.id DESC
+        {limit_sql}
+        """
+    )
+    rows = db.execute(query, params).mappings().all()
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    conversations = [_conversa_dict(row) for row in rows]
+
+    next_cursor = (conversations[-1]["updated_at"], conversations[-1]["id"]) if has_more else None
+    return conversations, next_cursor
+
+
+def _registrar_ultima_mensagem(db: Session, conversation_id: int, content: Optional[str]):
+    """Atualiza updated_at e o ponteiro da última mensagem (last_message_at/preview, message_count)."""
+    db.execute(
+        text(f"""
+            UPDATE {CHATBOT_SCHEMA}.conversations
+            SET updated_at = CURRENT_TIMESTAMP,
+                last_message_at = CURRENT_TIMESTAMP,
+                last_message_preview = LEFT(:content, {_PREVIEW_MAX}),
+                message_count = COALESCE(message_count, 0) + 1
+            WHERE id = :id
+        """),
+        {"id": conversation_id, "content": content or ""},
+    )
+    db.commit()
 
 
 def update_conversation(db: Session, conversation_id: int):
@@ -963,9 +1133,9 @@ def create_message(
         result = _insert()
         db.commit()
 
-    # Atualiza timestamp da conversa (não deve impedir o retorno da mensagem)
+    # Atualiza timestamp e ponteiro da última mensagem da conversa (não deve impedir o retorno da mensagem)
     try:
-        update_conversation(db, conversation_id)
+        _registrar_ultima_mensagem(db, conversation_id, content)
     except SQLAlchemyError:
         db.rollback()
 
@@ -982,37 +1152,78 @@ def create_message(
     return inserted_id
 
 
-def get_messages(db: Session, conversation_id: int) -> List[Dict]:
-    """Retorna todas as mensagens de uma conversa"""
+def _mensagem_dict(row) -> Dict:
+    metadata = row[5]
+    # Alguns drivers podem devolver JSONB como str
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except Exception:
+            metadata = None
+    return {
+        "id": row[0],
+        "conversation_id": row[1],
+        "role": row[2],
+        "content": row[3],
+        "created_at": row[4],
+        "timestamp": row[4],  # Alias para compatibilidade com frontend
+        "metadata": metadata,
+    }
+
+
+def get_messages(
+    db: Session,
+    conversation_id: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    """Retorna mensagens de uma conversa em ordem cronológica.
+
+    Sem parâmetros, retorna todas. Paginação por cursor (id de mensagem da conversa):
+    - after_id: mensagens posteriores ao cursor (as `limit` mais antigas entre elas)
+    - before_id: mensagens anteriores ao cursor (as `limit` mais recentes entre elas)
+    - só limit: as `limit` mensagens mais recentes
+    A ordem é (created_at, id), coberta pelo índice (conversation_id, created_at, id).
+    Lança ValueError se o cursor não for uma mensagem da conversa.
+    """
+    where_clauses = ["conversation_id = :conversation_id"]
+    params: Dict[str, Any] = {"conversation_id": conversation_id}
+
+    for nome, cursor_id, operador in (("after", after_id, ">"), ("before", before_id, "<")):
+        if cursor_id is None:
+            continue
+        cursor = db.execute(
+            text(f"""
+                SELECT created_at, id FROM {CHATBOT_SCHEMA}.messages
+                WHERE id = :id AND conversation_id = :conversation_id
+            """),
+            {"id": cursor_id, "conversation_id": conversation_id},
+        ).fetchone()
+        if cursor is None:
+            raise ValueError(f"Mensagem {cursor_id} não pertence à conversa {conversation_id}")
+        where_clauses.append(f"(created_at, id) {operador} (:{nome}_created_at, :{nome}_id)")
+        params[f"{nome}_created_at"], params[f"{nome}_id"] = cursor[0], cursor[1]
+
+    # Sem after_id e com limit, a página é a das mensagens mais recentes: busca de trás para frente
+    mais_recentes = limit is not None and after_id is None
+    ordem = "DESC" if mais_recentes else "ASC"
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT :limit"
+        params["limit"] = int(limit)
+
     query = text(f"""
         SELECT id, conversation_id, role, content, created_at, metadata
         FROM {CHATBOT_SCHEMA}.messages
-        WHERE conversation_id = :conversation_id
-        ORDER BY created_at ASC
+        WHERE {' AND '.join(where_clauses)}
+        ORDER BY created_at {ordem}, id {ordem}
+        {limit_sql}
     """)
-    result = db.execute(query, {"conversation_id": conversation_id})
-
-    mensagens: List[Dict] = []
-    for row in result.fetchall():
-        metadata = row[5]
-        # Alguns drivers podem devolver JSONB como str
-        if isinstance(metadata, str):
-            try:
-                metadata = json.loads(metadata)
-            except Exception:
-                metadata = None
-        mensagens.append(
-            {
-                "id": row[0],
-                "conversation_id": row[1],
-                "role": row[2],
-                "content": row[3],
-                "created_at": row[4],
-                "timestamp": row[4],  # Alias para compatibilidade com frontend
-                "metadata": metadata,
-            }
-        )
-    return mensagens
+    rows = db.execute(query, params).fetchall()
+    if mais_recentes:
+        rows = list(reversed(rows))
+    return [_mensagem_dict(row) for row in rows]
 
 
 def get_conversation_with_messages(db: Session, conversation_id: int) -> Optional[Dict]:
@@ -1027,6 +1238,66 @@ def get_conversation_with_messages(db: Session, conversation_id: int) -> Optiona
     return conversation
 
 
+def whatsapp_message_id_registrado(db: Session, message_id: str) -> bool:
+    """
+    True se a mensagem (messages[].id do provedor) já foi processada e registrada.
+    Em caso de erro retorna False, para não bloquear o atendimento.
+    """
+    if not message_id:
+        return False
+    try:
+        row = db.execute(
+            text(f"SELECT 1 FROM {CHATBOT_SCHEMA}.whatsapp_inbound_ids WHERE message_id = :message_id"),
+            {"message_id": str(message_id)},
+        ).fetchone()
+        return row is not None
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Erro ao consultar whatsapp_message_id={message_id}: {e}")
+        return False
+
+
+def registrar_whatsapp_message_id(db: Session, message_id: str, empresa_id: Optional[int] = None) -> bool:
+    """
+    Registra o id de uma mensagem do WhatsApp (messages[].id do provedor) já processada.
+
+    Retorna True se o id é novo e False se já foi registrado (reentrega da Meta/360dialog).
+    A chave primária de `whatsapp_inbound_ids` garante a unicidade entre workers.
+    Em caso de erro retorna True, para não bloquear o atendimento.
+    """
+    if not message_id:
+        return True
+    try:
+        row = db.execute(
+            text(f"""
+                INSERT INTO {CHATBOT_SCHEMA}.whatsapp_inbound_ids (message_id, empresa_id)
+                VALUES (:message_id, :empresa_id)
+                ON CONFLICT (message_id) DO NOTHING
+                RETURNING message_id
+            """),
+            {"message_id": str(message_id), "empresa_id": empresa_id},
+        ).fetchone()
+        db.commit()
+        return row is not None
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Erro ao registrar whatsapp_message_id={message_id}: {e}")
+        return True
+
+
+def limpar_whatsapp_message_ids(db: Session, dias: int) -> int:
+    """Remove ids de mensagens recebidas há mais de `dias` dias (fora da janela de reentrega)."""
+    removidos = db.execute(
+        text(f"""
+            DELETE FROM {CHATBOT_SCHEMA}.whatsapp_inbound_ids
+            WHERE created_at < CURRENT_TIMESTAMP - make_interval(days => :dias)
+        """),
+        {"dias": int(dias)},
+    ).rowcount
+    db.commit()
+    return removidos
+
+
 # ==================== UTILIDADES ====================
 
 def get_stats(db: Session, empresa_id: Optional[int] = None) -> Dict:
@@ -1200,36 +1471,53 @@ def _normalize_phone_number(phone_number: Optional[str]) -> Optional[str]:
     return digits
 
 
+def _bot_status_row(db: Session, phone_number: str):
+    """Linha (id, phone_number, paused_at, paused_by, empresa_id, desativa_chatbot_em) ou None, via cache."""
+
+    def carregar():
+        row = db.execute(
+            text(f"""
+                SELECT id, phone_number, paused_at, paused_by, empresa_id, desativa_chatbot_em
+                FROM {CHATBOT_SCHEMA}.bot_status
+                WHERE phone_number = :phone
+            """),
+            {"phone": phone_number},
+        ).fetchone()
+        return tuple(row) if row else None
+
+    return get_bot_status_row(phone_number, carregar)
+
+
+def _bot_status_dict(id_, phone_number, paused_at, paused_by, empresa_id, desativa_chatbot_em) -> Dict:
+    """Monta o status do bot a partir de uma linha de bot_status."""
+    desativa_em_dt = _parse_timestamp(desativa_chatbot_em)
+    # Regra: ativo se NULL (ou timestamp expirado)
+    now = _utcnow()
+    is_active = True
+    if _is_infinite_timestamp(desativa_chatbot_em):
+        is_active = False
+    elif desativa_em_dt and now < desativa_em_dt:
+        is_active = False
+    return {
+        "id": id_,
+        "phone_number": phone_number,
+        "is_active": is_active,
+        "paused_at": paused_at.isoformat() if paused_at else None,
+        "paused_by": paused_by,
+        "empresa_id": empresa_id,
+        # Mantém chave legada no response
+        "chatbot_destrava_em": desativa_em_dt.isoformat() if desativa_em_dt else None,
+    }
+
+
 def get_bot_status(db: Session, phone_number: str) -> Optional[Dict]:
     """Verifica se o bot está ativo para um número específico"""
     try:
         phone_normalized = _normalize_phone_number(phone_number)
-        query = text(f"""
-            SELECT id, phone_number, paused_at, paused_by, empresa_id, desativa_chatbot_em
-            FROM {CHATBOT_SCHEMA}.bot_status
-            WHERE phone_number = :phone
-        """)
-        result = db.execute(query, {"phone": phone_normalized}).fetchone()
+        result = _bot_status_row(db, phone_normalized)
 
         if result:
-            desativa_em_dt = _parse_timestamp(result[5])
-            # Regra: ativo se NULL (ou timestamp expirado)
-            now = _utcnow()
-            is_active = True
-            if _is_infinite_timestamp(result[5]):
-                is_active = False
-            elif desativa_em_dt and now < desativa_em_dt:
-                is_active = False
-            return {
-                "id": result[0],
-                "phone_number": result[1],
-                "is_active": is_active,
-                "paused_at": result[2].isoformat() if result[2] else None,
-                "paused_by": result[3],
-                "empresa_id": result[4],
-                # Mantém chave legada no response
-                "chatbot_destrava_em": desativa_em_dt.isoformat() if desativa_em_dt else None,
-            }
+            return _bot_status_dict(*result)
         # Se não existe registro, o bot está ativo por padrão
         return {"phone_number": phone_normalized, "is_active": True}
     except Exception as e:
@@ -1251,19 +1539,12 @@ def is_bot_active_for_phone(db: Session, phone_number: str) -> bool:
 
     # Depois verifica o status individual
     try:
-        row = db.execute(
-            text(f"""
-                SELECT empresa_id, desativa_chatbot_em
-                FROM {CHATBOT_SCHEMA}.bot_status
-                WHERE phone_number = :phone
-            """),
-            {"phone": phone_normalized},
-        ).fetchone()
+        row = _bot_status_row(db, phone_normalized)
         if not row:
             return True
 
-        empresa_id = row[0]
-        desativa_raw = row[1]
+        empresa_id = row[4]
+        desativa_raw = row[5]
         if _is_infinite_timestamp(desativa_raw):
             return False
 
@@ -1362,6 +1643,7 @@ def set_bot_status(
             },
         ).fetchone()
         db.commit()
+        invalidate_bot_status_cache()
 
         desativa_dt = _parse_timestamp(result[5])
         computed_is_active = True
@@ -1430,12 +1712,7 @@ GLOBAL_BOT_PHONE = "_GLOBAL_BOT_"
 def get_global_bot_status(db: Session, empresa_id: int = None) -> Dict:
     """Verifica se o bot global está ativo (afeta todos os números)"""
     try:
-        query = text(f"""
-            SELECT id, phone_number, paused_at, paused_by, empresa_id, desativa_chatbot_em
-            FROM {CHATBOT_SCHEMA}.bot_status
-            WHERE phone_number = :phone
-        """)
-        result = db.execute(query, {"phone": GLOBAL_BOT_PHONE}).fetchone()
+        result = _bot_status_row(db, GLOBAL_BOT_PHONE)
 
         if result:
             desativa_raw = result[5]
@@ -1514,6 +1791,7 @@ def set_global_bot_status(db: Session, paused_by: str = None, empresa_id: int =
             "desativa_is_infinity": desativa_is_infinity,
         }).fetchone()
         db.commit()
+        invalidate_bot_status_cache()
 
         computed_is_active = not _is_infinite_timestamp(result[5])
         return {
@@ -0,0 +1,210 @@
+"""
+Detecção de intenções por palavras-chave em uma única passada sobre a mensagem.
+
+Cada mensagem recebida passa por várias checagens de intenção (pedido, pergunta,
+cardápio, acompanhamento...) antes de qualquer chamada ao LLM. Em vez de cada uma
+normalizar o texto e varrer a própria lista de termos, o texto é normalizado uma
+vez (minúsculas, sem acentos) e todos os termos de todas as intenções são
+procurados juntos por um autômato Aho-Corasick, em tempo linear no tamanho da
+mensagem (alguns microssegundos para mensagens de WhatsApp).
+
+O autômato é compilado por empresa: termos padrão (`INTENCOES_PADRAO`) mais os
+extras de `chatbot_configs.palavras_chave` ({"intenção": ["termo", ...]}). A
+compilação fica em memória e só é refeita quando a configuração da empresa muda.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Marcas combinantes (acentos, cedilha, til) que sobram após a decomposição NFKD
+_ACENTOS = re.compile("[\u0300-\u036f]+")
+
+_VERBOS_ENVIO = ("manda", "mandar", "envia", "enviar", "mostra", "mostrar", "passa", "passar")
+_CARDAPIO = ("cardapio", "o cardapio", "menu", "o menu")
+
+# Termos padrão por intenção (comparados já normalizados, então variações com e sem acento equivalem).
+# "ver_cardapio", "pedido" e "acompanhar_pedido" são os valores de `IntentionType`.
+INTENCOES_PADRAO: Dict[str, Tuple[str, ...]] = {
+    "ver_cardapio": ("cardapio", "ver cardapio", "menu", "ver o cardapio", "ver menu", "ver o menu"),
+    # Pedido explícito do cardápio ("me manda o cardápio", "quero ver o menu", "envia aí o cardápio")
+    "pedido_cardapio": (
+        *(f"{verbo} {c}" for verbo in _VERBOS_ENVIO for c in _CARDAPIO),
+        *(f"{verbo} {p} {c}" for verbo in _VERBOS_ENVIO for p in ("ai", "pra mim", "para mim") for c in _CARDAPIO),
+        *(
+            f"{q} {verbo} {c}"
+            for q in ("quero", "gostaria", "gostaria de", "queria", "queria de")
+            for verbo in ("ver", "receber", "ter")
+            for c in _CARDAPIO
+        ),
+    ),
+    # Cliente quer falar com um humano ("chamar_atendente" também é o id do botão, que pode chegar como texto)
+    "chamar_atendente": (
+        "chamar_atendente", "chamar atendente", "quero falar com alguem", "quero falar com atendente",
+        "quero falar com humano", "preciso de humano", "preciso de um humano", "preciso de atendente",
+        "preciso de um atendente", "atendente humano", "quero atendimento humano", "falar com atendente",
+        "ligar atendente", "chama alguem para mi", "chama atendente para mi",
+    ),
+    "pedido": ("pedir", "quero pedir", "fazer pedido", "pedido"),
+    "acompanhar_pedido": (
+        "acompanhar", "acompanhar pedido", "rastrear", "status do pedido", "onde esta meu pedido",
+    ),
+    # Tentativa de pedido no roteamento do webhook (mais ampla que "pedido")
+    "tentativa_pedido": (
+        "quero", "pedir", "pedido", "fazer pedido", "adicionar", "me ve", "me da", "manda",
+        "vou querer", "vou pedir", "finalizar", "fechar", "so isso", "pode fechar", "coloca",
+        "colocar", "incluir", "poe", "poe na conta", "pode anotar", "anota", "anotar",
+        "vou levar", "levar", "pegar", "vou pegar",
+    ),
+    # Pergunta sobre preço/informação (não é pedido, ex.: "quanto fica 2 xbacon")
+    "pergunta": (
+        "quanto", "qual", "quais", "tem", "custa", "fica", "preco", "valor", "informacao",
+        "saber", "dizer",
+    ),
+    # Cliente quer receber atualizações do pedido (não redirecionar como tentativa de pedido)
+    "atualizacoes": ("atualiz", "tualiz", "acompanhar", "status", "receber atualiz"),
+}
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados."""
+    texto = _ACENTOS.sub("", unicodedata.normalize("NFKD", texto or "")).lower()
+    return " ".join(texto.split())
+
+
+class AnaliseIntencoes:
+    """Resultado da análise de uma mensagem: texto normalizado e termos encontrados por intenção."""
+
+    __slots__ = ("texto", "ocorrencias")
+
+    def __init__(self, texto: str, ocorrencias: Dict[str, List[Tuple[int, str]]]):
+        self.texto = texto
+        # intenção -> [(posição inicial, termo), ...]
+        self.ocorrencias = ocorrencias
+
+    def tem(self, intencao: str) -> bool:
+        return intencao in self.ocorrencias
+
+    def comeca_com(self, intencao: str) -> bool:
+        return any(inicio == 0 for inicio, _ in self.ocorrencias.get(intencao, ()))
+
+    def somente(self, intencao: str) -> bool:
+        """True se a mensagem inteira é um termo da intenção (ex.: só "cardápio")."""
+        return any(inicio == 0 and len(termo) == len(self.texto) for inicio, termo in self.ocorrencias.get(intencao, ()))
+
+    @property
+    def intencoes(self) -> List[str]:
+        return list(self.ocorrencias)
+
+
+class IntentEngine:
+    """Autômato Aho-Corasick sobre os termos (normalizados) de todas as intenções."""
+
+    def __init__(self, termos_por_intencao: Mapping[str, Iterable[str]]):
+        # Estado 0 é a raiz; cada estado tem transições, link de falha e saídas (intenção, termo)
+        self._transicoes: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._saidas: List[List[Tuple[str, str]]] = [[]]
+
+        for intencao, termos in termos_por_intencao.items():
+            for termo in termos:
+                termo = normalizar_texto(termo)
+                if termo:
+                    self._adicionar(intencao, termo)
+        # Transições já resolvidas com os links de falha: um lookup de dict por caractere na busca
+        self._delta = self._compilar()
+
+    def _adicionar(self, intencao: str, termo: str) -> None:
+        estado = 0
+        for c in termo:
+            proximo = self._transicoes[estado].get(c)
+            if proximo is None:
+                proximo = len(self._transicoes)
+                self._transicoes.append({})
+                self._falha.append(0)
+                self._saidas.append([])
+                self._transicoes[estado][c] = proximo
+            estado = proximo
+        if (intencao, termo) not in self._saidas[estado]:
+            self._saidas[estado].append((intencao, termo))
+
+    def _compilar(self) -> List[Dict[str, int]]:
+        """Calcula os links de falha (BFS) e o autômato determinístico equivalente."""
+        delta: List[Dict[str, int]] = [dict() for _ in self._transicoes]
+        delta[0] = dict(self._transicoes[0])
+        fila = list(self._transicoes[0].values())
+        i = 0
+        while i < len(fila):
+            estado = fila[i]
+            i += 1
+            for c, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                # delta do estado de falha já está pronto (profundidade menor)
+                self._falha[proximo] = delta[self._falha[estado]].get(c, 0)
+                self._saidas[proximo].extend(self._saidas[self._falha[proximo]])
+            delta[estado] = {**delta[self._falha[estado]], **self._transicoes[estado]}
+        return delta
+
+    def analisar(self, texto: Optional[str]) -> AnaliseIntencoes:
+        """Normaliza `texto` e retorna todas as ocorrências de termos, agrupadas por intenção."""
+        normalizado = normalizar_texto(texto)
+        delta, saidas = self._delta, self._saidas
+        ocorrencias: Dict[str, List[Tuple[int, str]]] = {}
+        estado = 0
+        for fim, c in enumerate(normalizado):
+            estado = delta[estado].get(c, 0)
+            if saidas[estado]:
+                for intencao, termo in saidas[estado]:
+                    ocorrencias.setdefault(intencao, []).append((fim - len(termo) + 1, termo))
+        return AnaliseIntencoes(normalizado, ocorrencias)
+
+
+def _termos_da_empresa(palavras_chave: Optional[Mapping[str, Any]]) -> Dict[str, List[str]]:
+    termos = {intencao: list(padrao) for intencao, padrao in INTENCOES_PADRAO.items()}
+    for intencao, extras in (palavras_chave or {}).items():
+        if isinstance(extras, str):
+            extras = [extras]
+        if isinstance(extras, (list, tuple)):
+            termos.setdefault(str(intencao), []).extend(str(t) for t in extras if t)
+    return termos
+
+
+engine_padrao = IntentEngine(INTENCOES_PADRAO)
+
+# empresa_id -> (palavras_chave usadas na compilação, engine)
+_engines: Dict[Any, Tuple[Any, IntentEngine]] = {}
+_engines_lock = Lock()
+
+
+def engine_da_empresa(empresa_id: Any = None, palavras_chave: Optional[Mapping[str, Any]] = None) -> IntentEngine:
+    """Engine compilada para a empresa (recompila só quando `palavras_chave` muda)."""
+    if empresa_id is None or not palavras_chave:
+        return engine_padrao
+    with _engines_lock:
+        item = _engines.get(empresa_id)
+        if item is not None and item[0] == palavras_chave:
+            return item[1]
+    engine = IntentEngine(_termos_da_empresa(palavras_chave))
+    with _engines_lock:
+        _engines[empresa_id] = (dict(palavras_chave), engine)
+    return engine
+
+
+def analisar_mensagem(
+    texto: Optional[str], empresa_id: Any = None, palavras_chave: Optional[Mapping[str, Any]] = None
+) -> AnaliseIntencoes:
+    """Analisa a mensagem com a engine da empresa (ou a padrão)."""
+    return engine_da_empresa(empresa_id, palavras_chave).analisar(texto)
+
+
+__all__ = [
+    "INTENCOES_PADRAO",
+    "AnaliseIntencoes",
+    "IntentEngine",
+    "analisar_mensagem",
+    "engine_da_empresa",
+    "engine_padrao",
+    "normalizar_texto",
+]
@@ -4,7 +4,9 @@ This shim provides a tiny heuristic-based detector used during migration/tests.
 It should be replaced by the full implementation when available.
 """
 from enum import Enum
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+from .intent_engine import engine_da_empresa
 
 
 class IntentionType(str, Enum):
@@ -15,9 +17,9 @@ class IntentionType(str, Enum):
 
 
 class IntentionRouter:
-    def __init__(self, *args, **kwargs):
-        # placeholder for dependency injection if needed
-        pass
+    def __init__(self, *args, empresa_id: Any = None, palavras_chave: Optional[Dict[str, Any]] = None, **kwargs):
+        # Termos extras da empresa (chatbot_configs.palavras_chave) entram no autômato compilado
+        self.engine = engine_da_empresa(empresa_id, palavras_chave)
 
     def route(self, text: str) -> IntentionType:
         """Backward-compatible alias for older callers."""
@@ -26,18 +28,18 @@ class IntentionRouter:
 
     def detect_intention(self, original_text: str, normalized_text: str) -> Dict[str, Any]:
         """
-        Detecta intenções simples por heurística.
+        Detecta intenções simples por palavras-chave (uma passada do `IntentEngine`).
         Retorna um dict com chaves possíveis:
         - "intention": IntentionType
         - "funcao": str (nome da função a executar, ex: "ver_cardapio")
         """
-        txt = (normalized_text or original_text or "").lower()
-        # heurísticas simples
-        if any(k in txt for k in ("cardapio", "cardápio", "ver cardapio", "ver cardápio", "menu", "cardapío")):
+        analise = self.engine.analisar(normalized_text or original_text)
+        # Ordem de prioridade: cardápio, pedido, acompanhamento
+        if analise.tem("ver_cardapio"):
             return {"intention": IntentionType.VER_CARDAPIO, "funcao": "ver_cardapio"}
-        if any(k in txt for k in ("pedir", "quero pedir", "fazer pedido", "pedido")):
+        if analise.tem("pedido"):
             return {"intention": IntentionType.ORDER, "funcao": "create_order"}
-        if any(k in txt for k in ("acompanhar", "acompanhar pedido", "rastrear", "status do pedido", "onde está meu pedido", "onde esta meu pedido")):
+        if analise.tem("acompanhar_pedido"):
             return {"intention": IntentionType.ACOMPANHAR_PEDIDO, "funcao": "acompanhar_pedido"}
         return {"intention": IntentionType.UNKNOWN}
 
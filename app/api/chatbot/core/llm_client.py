@@ -0,0 +1,246 @@
+"""
+Cliente LLM (Groq, API compatível com OpenAI chat completions) compartilhado pelo chatbot.
+
+Antes cada chamada abria um `httpx.AsyncClient` próprio (novo handshake TLS) e nada
+limitava quantas requisições iam à Groq ao mesmo tempo: num pico de mensagens o
+rate limit da Groq virava timeouts em cascata no processamento dos webhooks.
+
+Aqui:
+- o cliente httpx é o compartilhado por event loop (`get_httpx_client("groq")`, keep-alive);
+- um semáforo global e um por empresa limitam as chamadas simultâneas; quem não
+  consegue vaga em `espera_max_segundos` recebe `LLMIndisponivel`;
+- um circuit breaker abre após falhas seguidas (timeout, erro de rede, 429, 5xx) e
+  recusa chamadas por alguns segundos (`LLMIndisponivel`), para o chamador usar o
+  caminho por palavras-chave em vez de esperar a Groq;
+- chamadas determinísticas (temperature 0, `cachear=True`, ex.: extração de nome)
+  ficam num cache endereçado pelo conteúdo (hash de modelo + mensagens + parâmetros).
+
+O cliente é usado por mais de um event loop (loop principal e os workers do inbox
+de webhooks, cada um em sua thread), então semáforos e circuito usam primitivas de
+`threading`, não de `asyncio`.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from time import monotonic
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.api.localizacao.adapters.cache_adapter import CacheAdapter
+from app.config import settings
+from app.utils.prometheus_metrics import (
+    chatbot_llm_circuito_aberto,
+    chatbot_llm_duration_seconds,
+    chatbot_llm_requests_total,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMIndisponivel(Exception):
+    """O LLM não foi chamado: circuito aberto ou sem vaga de concorrência a tempo."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples (fechado -> aberto -> meio-aberto).
+
+    Após `falhas_para_abrir` falhas seguidas, recusa chamadas por `segundos_aberto`;
+    depois deixa passar uma chamada de teste: sucesso fecha o circuito, falha reabre.
+    """
+
+    def __init__(self, falhas_para_abrir: int = 5, segundos_aberto: float = 30.0):
+        self.falhas_para_abrir = max(1, int(falhas_para_abrir))
+        self.segundos_aberto = float(segundos_aberto)
+        self._falhas = 0
+        self._aberto_ate: Optional[float] = None
+        self._testando = False
+        self._lock = threading.Lock()
+
+    @property
+    def aberto(self) -> bool:
+        return self._aberto_ate is not None
+
+    def permite(self) -> bool:
+        with self._lock:
+            if self._aberto_ate is None:
+                return True
+            if monotonic() < self._aberto_ate or self._testando:
+                return False
+            self._testando = True
+            return True
+
+    def desistir(self) -> None:
+        """A chamada liberada por `permite()` não foi feita (ex.: sem vaga); libera o teste do meio-aberto."""
+        with self._lock:
+            self._testando = False
+
+    def sucesso(self) -> None:
+        with self._lock:
+            if self._aberto_ate is not None:
+                logger.info("[LLM] Circuito fechado")
+            self._falhas = 0
+            self._aberto_ate = None
+            self._testando = False
+        chatbot_llm_circuito_aberto.set(0)
+
+    def falha(self) -> None:
+        with self._lock:
+            self._falhas += 1
+            self._testando = False
+            if self._aberto_ate is None and self._falhas < self.falhas_para_abrir:
+                return
+            self._aberto_ate = monotonic() + self.segundos_aberto
+            falhas = self._falhas
+        chatbot_llm_circuito_aberto.set(1)
+        logger.warning(f"[LLM] Circuito aberto por {self.segundos_aberto:.0f}s após {falhas} falhas")
+
+
+def _falha_do_provedor(erro: Exception) -> bool:
+    """Erros que indicam Groq indisponível/sobrecarregada (contam para o circuit breaker)."""
+    if isinstance(erro, httpx.HTTPStatusError):
+        status = erro.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(erro, (httpx.TimeoutException, httpx.TransportError))
+
+
+class LLMClient:
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: float = settings.CHATBOT_LLM_TIMEOUT_SEGUNDOS,
+        max_concorrencia: int = settings.CHATBOT_LLM_MAX_CONCORRENCIA,
+        max_concorrencia_empresa: int = settings.CHATBOT_LLM_MAX_CONCORRENCIA_EMPRESA,
+        espera_max_segundos: float = settings.CHATBOT_LLM_ESPERA_MAX_SEGUNDOS,
+        breaker: Optional[CircuitBreaker] = None,
+        cache: Optional[CacheAdapter] = None,
+    ):
+        self.api_url = api_url if api_url is not None else settings.GROQ_API_URL
+        self.api_key = api_key if api_key is not None else settings.GROQ_API_KEY
+        self.timeout = timeout
+        self.max_concorrencia_empresa = max(1, int(max_concorrencia_empresa))
+        self.espera_max_segundos = espera_max_segundos
+        self.breaker = breaker or CircuitBreaker(
+            settings.CHATBOT_LLM_CIRCUITO_FALHAS, settings.CHATBOT_LLM_CIRCUITO_ABERTO_SEGUNDOS
+        )
+        self.cache = cache or CacheAdapter(
+            max_itens=settings.CHATBOT_LLM_CACHE_MAX_ITENS, ttl_segundos=settings.CHATBOT_LLM_CACHE_TTL_SEGUNDOS
+        )
+        self._semaforo_global = threading.BoundedSemaphore(max(1, int(max_concorrencia)))
+        self._semaforos_empresa: Dict[str, threading.BoundedSemaphore] = {}
+        self._semaforos_lock = threading.Lock()
+
+    def _chave_cache(self, payload: Dict[str, Any]) -> str:
+        conteudo = json.dumps([self.api_url, payload], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def _semaforo_empresa(self, empresa_id: Any) -> threading.BoundedSemaphore:
+        chave = str(empresa_id)
+        with self._semaforos_lock:
+            semaforo = self._semaforos_empresa.get(chave)
+            if semaforo is None:
+                semaforo = threading.BoundedSemaphore(self.max_concorrencia_empresa)
+                self._semaforos_empresa[chave] = semaforo
+        return semaforo
+
+    async def _reservar(self, semaforo: threading.BoundedSemaphore) -> None:
+        if semaforo.acquire(blocking=False):
+            return
+        # Sem vaga imediata: espera numa thread para não travar o event loop
+        espera = asyncio.ensure_future(asyncio.to_thread(semaforo.acquire, True, self.espera_max_segundos))
+        try:
+            conseguiu = await asyncio.shield(espera)
+        except asyncio.CancelledError:
+            # A espera na thread continua; se a vaga vier depois do cancelamento, devolve
+            espera.add_done_callback(
+                lambda f: semaforo.release() if not f.cancelled() and f.exception() is None and f.result() else None
+            )
+            raise
+        if not conseguiu:
+            chatbot_llm_requests_total.labels(resultado="sem_vaga").inc()
+            raise LLMIndisponivel("sem vaga de concorrência para chamar o LLM")
+
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        model: str = settings.MODEL_NAME,
+        temperature: float = 0.0,
+        empresa_id: Any = None,
+        cachear: bool = False,
+        **parametros: Any,
+    ) -> Dict[str, Any]:
+        """
+        Chama o chat completions e retorna o JSON da resposta.
+
+        `cachear=True` só tem efeito com temperature 0. Levanta `LLMIndisponivel`
+        (circuito aberto / sem vaga) ou o erro do httpx da chamada.
+        """
+        payload = {"model": model, "messages": messages, "temperature": temperature, "stream": False, **parametros}
+
+        chave = self._chave_cache(payload) if cachear and temperature == 0 else None
+        if chave is not None:
+            item = self.cache.get(chave)
+            if item is not None:
+                chatbot_llm_requests_total.labels(resultado="cache").inc()
+                return item
+
+        if not self.breaker.permite():
+            chatbot_llm_requests_total.labels(resultado="circuito_aberto").inc()
+            raise LLMIndisponivel("circuito do LLM aberto")
+
+        # Sem vaga não é falha da Groq, então não conta para o circuito
+        semaforo_empresa = self._semaforo_empresa(empresa_id) if empresa_id is not None else None
+        try:
+            if semaforo_empresa is not None:
+                await self._reservar(semaforo_empresa)
+            try:
+                await self._reservar(self._semaforo_global)
+            except LLMIndisponivel:
+                if semaforo_empresa is not None:
+                    semaforo_empresa.release()
+                raise
+        except LLMIndisponivel:
+            self.breaker.desistir()
+            raise
+
+        inicio = monotonic()
+        try:
+            from app.api.notifications.channels.http_clients import get_httpx_client
+
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            client = get_httpx_client("groq", timeout=self.timeout)
+            resp = await client.post(self.api_url, json=payload, headers=headers, timeout=self.timeout)
+            resp.raise_for_status()
+            resultado = resp.json()
+        except Exception as e:
+            if _falha_do_provedor(e):
+                self.breaker.falha()
+            else:
+                self.breaker.sucesso()
+            chatbot_llm_requests_total.labels(resultado="erro").inc()
+            raise
+        finally:
+            chatbot_llm_duration_seconds.observe(monotonic() - inicio)
+            self._semaforo_global.release()
+            if semaforo_empresa is not None:
+                semaforo_empresa.release()
+
+        self.breaker.sucesso()
+        chatbot_llm_requests_total.labels(resultado="ok").inc()
+        if chave is not None:
+            self.cache.set(chave, resultado)
+        return resultado
+
+
+# Instância compartilhada pelo processo (um circuito e um limite de concorrência por worker)
+llm_client = LLMClient()
+
+
+__all__ = ["LLMClient", "LLMIndisponivel", "CircuitBreaker", "llm_client"]
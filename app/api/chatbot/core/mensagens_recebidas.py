@@ -0,0 +1,82 @@
+"""
+Deduplicação das mensagens recebidas do WhatsApp pelo id do provedor (messages[].id).
+
+A Meta/360dialog reentrega o mesmo webhook quando não recebe 200 a tempo; sem
+deduplicação cada reentrega gera outra chamada à IA e outra resposta do bot.
+
+O id só é registrado depois que a mensagem foi tratada (`registrar_mensagem_processada`):
+se o processamento falhar e o inbox de webhooks tentar de novo, a mensagem não é
+descartada como duplicata. Os ids registrados ficam num conjunto limitado em
+memória (descarta duplicatas sem ir ao banco) e em `chatbot.whatsapp_inbound_ids`,
+que vale entre workers. Reentregas do mesmo telefone são processadas em ordem pelo
+inbox, então a reentrega só é avaliada depois que a original terminou.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.utils.prometheus_metrics import chatbot_whatsapp_messages_total
+
+from . import database as chatbot_db
+
+
+class IdsRecentes:
+    """Conjunto limitado (LRU) de ids já vistos neste worker."""
+
+    def __init__(self, max_itens: int):
+        self.max_itens = max(1, int(max_itens))
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, message_id: str) -> bool:
+        with self._lock:
+            if message_id in self._ids:
+                self._ids.move_to_end(message_id)
+                return True
+            return False
+
+    def adicionar(self, message_id: str) -> None:
+        with self._lock:
+            self._ids[message_id] = None
+            self._ids.move_to_end(message_id)
+            while len(self._ids) > self.max_itens:
+                self._ids.popitem(last=False)
+
+
+_ids_recentes = IdsRecentes(settings.CHATBOT_WHATSAPP_MESSAGE_IDS_MEMORIA)
+
+
+def mensagem_duplicada(db: Session, message_id: Optional[str]) -> bool:
+    """
+    True se a mensagem `message_id` já foi processada antes (deve ser ignorada).
+
+    Só consulta; o registro é feito por `registrar_mensagem_processada`.
+    Mensagens sem id não são deduplicadas.
+    """
+    if not message_id:
+        return False
+    message_id = str(message_id)
+    if message_id in _ids_recentes:
+        chatbot_whatsapp_messages_total.labels(resultado="duplicada_memoria").inc()
+        return True
+
+    if chatbot_db.whatsapp_message_id_registrado(db, message_id):
+        _ids_recentes.adicionar(message_id)
+        chatbot_whatsapp_messages_total.labels(resultado="duplicada_banco").inc()
+        return True
+    chatbot_whatsapp_messages_total.labels(resultado="nova").inc()
+    return False
+
+
+def registrar_mensagem_processada(db: Session, message_id: Optional[str], empresa_id: Optional[int] = None) -> None:
+    """Registra `message_id` como processado (chamar só após tratar a mensagem com sucesso)."""
+    if not message_id:
+        return
+    message_id = str(message_id)
+    chatbot_db.registrar_whatsapp_message_id(db, message_id, empresa_id)
+    _ids_recentes.adicionar(message_id)
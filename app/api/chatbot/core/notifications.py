@@ -6,11 +6,12 @@ Suporta envio via WhatsApp Business API (Meta) e chat interno
 from typing import Dict, Optional, List
 from datetime import datetime
 from sqlalchemy.orm import Session
-import httpx
 import asyncio
 import logging
 import json
 
+from app.api.notifications.channels.http_clients import get_httpx_client
+
 logger = logging.getLogger(__name__)
 
 # Mapeamento de status de pedido para templates/emoji usados nas mensagens.
@@ -93,33 +94,33 @@ class OrderNotification:
                 "message_id": message_id
             }
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, json=payload, headers=headers)
+            client = get_httpx_client("whatsapp")
+            response = await client.post(url, json=payload, headers=headers, timeout=10.0)
+            
+            if response.status_code == 200:
+                logger.info(f"[WhatsApp] Mensagem {message_id} marcada como lida")
+                return {
+                    "success": True,
+                    "message_id": message_id,
+                    "status": "read"
+                }
+            else:
+                # Log completo do erro
+                error_text = response.text or "Erro desconhecido"
+                try:
+                    error_json = response.json()
+                    error_message = json.dumps(error_json, indent=2, ensure_ascii=False)
+                    logger.error(f"[WhatsApp] Erro ao marcar mensagem como lida (Status {response.status_code}):\n{error_message}")
+                except:
+                    error_message = error_text
+                    logger.error(f"[WhatsApp] Erro ao marcar mensagem como lida (Status {response.status_code}): {error_message}")
                 
-                if response.status_code == 200:
-                    logger.info(f"[WhatsApp] Mensagem {message_id} marcada como lida")
-                    return {
-                        "success": True,
-                        "message_id": message_id,
-                        "status": "read"
-                    }
-                else:
-                    # Log completo do erro
-                    error_text = response.text or "Erro desconhecido"
-                    try:
-                        error_json = response.json()
-                        error_message = json.dumps(error_json, indent=2, ensure_ascii=False)
-                        logger.error(f"[WhatsApp] Erro ao marcar mensagem como lida (Status {response.status_code}):\n{error_message}")
-                    except:
-                        error_message = error_text
-                        logger.error(f"[WhatsApp] Erro ao marcar mensagem como lida (Status {response.status_code}): {error_message}")
-                    
-                    return {
-                        "success": False,
-                        "error": error_message,
-                        "status_code": response.status_code,
-                        "response_text": error_text
-                    }
+                return {
+                    "success": False,
+                    "error": error_message,
+                    "status_code": response.status_code,
+                    "response_text": error_text
+                }
 
         except Exception as e:
             logger.error(f"[WhatsApp] Exceção ao marcar mensagem como lida: {str(e)}", exc_info=True)
@@ -147,7 +148,10 @@ class OrderNotification:
                 get_headers,
                 format_phone_number,
             )
-            from app.utils.telefone import variantes_telefone_para_envio_whatsapp
+            from app.api.notifications.core.whatsapp_phone_variants import (
+                registrar_variante_aceita_async,
+                variantes_envio_whatsapp_async,
+            )
 
             config = load_whatsapp_config(empresa_id)
             provider = (config.get("provider") or "").lower()
@@ -213,7 +217,8 @@ class OrderNotification:
             if is_360:
                 # 360dialog: tentamos variantes de telefone para maximizar entregabilidade
                 # (com/sem 55 e com/sem 9 quando aplicável).
-                candidates = variantes_telefone_para_envio_whatsapp(phone_formatted or phone)
+                # A variante aceita antes para este cliente (se houver) vem primeiro.
+                candidates = await variantes_envio_whatsapp_async(phone_formatted or phone)
                 if not candidates:
                     candidates = [''.join(filter(str.isdigit, phone_formatted or phone))]
 
@@ -236,114 +241,116 @@ class OrderNotification:
                 }
 
             # Envia a mensagem (Cloud API) - compatível com modo de coexistência
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                phone_used = phone_formatted
-                if is_360:
-                    last_response = None
-                    for cand in candidates:
-                        phone_used = cand
-                        payload = dict(payload_base)
-                        payload["to"] = cand
-                        last_response = await client.post(url, json=payload, headers=headers)
-                        # Sucesso
-                        if last_response.status_code == 200:
-                            result = last_response.json()
-                            message_id = result.get("messages", [{}])[0].get("id") if result.get("messages") else None
-                            logger.info(f"[WhatsApp] Mensagem enviada com sucesso. Message ID: {message_id}")
-                            return {
-                                "success": True,
-                                "provider": "360dialog",
-                                "phone": phone_used,
-                                "message_id": message_id,
-                                "status": "sent",
-                                "response": result,
-                                "note": "Enviado com fallback de variantes (telefone normalizado)",
-                            }
-                        # Para 360dialog, só faz sentido tentar outras variantes quando o provedor rejeita o 'to'
-                        if last_response.status_code != 400:
-                            break
-
-                    response = last_response
-                else:
-                    response = await client.post(url, json=payload, headers=headers)
-                
-                if response.status_code != 200:
-                    # Log completo do erro
-                    error_text = response.text or "Erro desconhecido"
-                    try:
-                        error_json = response.json()
-                        error_message = json.dumps(error_json, indent=2, ensure_ascii=False)
-                        logger.error(f"[WhatsApp] Erro ao enviar mensagem (Status {response.status_code}):\n{error_message}")
-                    except Exception as parse_error:
-                        error_message = error_text
-                        logger.error(f"[WhatsApp] Erro ao enviar mensagem (Status {response.status_code}): {error_message}")
-
-                if response.status_code == 200:
-                    result = response.json()
-                    message_id = result.get("messages", [{}])[0].get("id") if result.get("messages") else None
-                    logger.info(f"[WhatsApp] Mensagem enviada com sucesso. Message ID: {message_id}")
-                    return {
-                        "success": True,
-                        "provider": "360dialog" if is_360 else "WhatsApp Business API (Meta)",
-                        "phone": phone_used if is_360 else phone_formatted,
-                        "message_id": message_id,
-                        "status": "sent",
-                        "response": result
-                    }
+            # Cliente compartilhado (keep-alive/HTTP2): evita handshake TLS a cada envio
+            client = get_httpx_client("whatsapp")
+            phone_used = phone_formatted
+            if is_360:
+                last_response = None
+                for cand in candidates:
+                    phone_used = cand
+                    payload = dict(payload_base)
+                    payload["to"] = cand
+                    last_response = await client.post(url, json=payload, headers=headers)
+                    # Sucesso
+                    if last_response.status_code == 200:
+                        result = last_response.json()
+                        message_id = result.get("messages", [{}])[0].get("id") if result.get("messages") else None
+                        logger.info(f"[WhatsApp] Mensagem enviada com sucesso. Message ID: {message_id}")
+                        await registrar_variante_aceita_async(phone_formatted or phone, cand)
+                        return {
+                            "success": True,
+                            "provider": "360dialog",
+                            "phone": phone_used,
+                            "message_id": message_id,
+                            "status": "sent",
+                            "response": result,
+                            "note": "Enviado com fallback de variantes (telefone normalizado)",
+                        }
+                    # Para 360dialog, só faz sentido tentar outras variantes quando o provedor rejeita o 'to'
+                    if last_response.status_code != 400:
+                        break
 
-                # Trata erro na resposta
-                error_message = response.text or "Erro desconhecido"
-                error_detail = {}
-                
-                # Tenta parsear JSON da resposta de erro
+                response = last_response
+            else:
+                response = await client.post(url, json=payload, headers=headers)
+            
+            if response.status_code != 200:
+                # Log completo do erro
+                error_text = response.text or "Erro desconhecido"
                 try:
-                    if response.text:
-                        error_data = response.json()
-                        if isinstance(error_data, dict):
-                            error_detail = error_data.get("error", {})
-                            if isinstance(error_detail, dict):
-                                error_message = error_detail.get("message", error_data.get("message", response.text))
-                            else:
-                                error_message = str(error_detail) if error_detail else response.text
-                        else:
-                            error_message = str(error_data) if error_data else response.text
-                except (ValueError, json.JSONDecodeError):
-                    # Se não conseguir parsear, usa o texto da resposta
-                    error_message = response.text or f"Erro HTTP {response.status_code}"
-
-                coexistence_hint = None
-                # Dica adicional quando houver conflito de registro do número
-                if response.status_code in (400, 403, 409):
-                    if is_360:
-                        # Verifica se é erro de pagamento
-                        if "payment" in error_message.lower() or "blocked" in error_message.lower():
-                            coexistence_hint = (
-                                "⚠️ CONTA BLOQUEADA POR FALTA DE PAGAMENTO: "
-                                "A conta do 360dialog está bloqueada por falta de créditos/pagamento. "
-                                "IMPORTANTE: Mesmo respostas dentro da janela de conversa (24h) são bloqueadas quando há pendências. "
-                                "É necessário regularizar o pagamento na conta do 360dialog para desbloquear TODAS as mensagens, "
-                                "incluindo respostas gratuitas dentro da janela de conversa."
-                            )
+                    error_json = response.json()
+                    error_message = json.dumps(error_json, indent=2, ensure_ascii=False)
+                    logger.error(f"[WhatsApp] Erro ao enviar mensagem (Status {response.status_code}):\n{error_message}")
+                except Exception as parse_error:
+                    error_message = error_text
+                    logger.error(f"[WhatsApp] Erro ao enviar mensagem (Status {response.status_code}): {error_message}")
+
+            if response.status_code == 200:
+                result = response.json()
+                message_id = result.get("messages", [{}])[0].get("id") if result.get("messages") else None
+                logger.info(f"[WhatsApp] Mensagem enviada com sucesso. Message ID: {message_id}")
+                return {
+                    "success": True,
+                    "provider": "360dialog" if is_360 else "WhatsApp Business API (Meta)",
+                    "phone": phone_used if is_360 else phone_formatted,
+                    "message_id": message_id,
+                    "status": "sent",
+                    "response": result
+                }
+
+            # Trata erro na resposta
+            error_message = response.text or "Erro desconhecido"
+            error_detail = {}
+            
+            # Tenta parsear JSON da resposta de erro
+            try:
+                if response.text:
+                    error_data = response.json()
+                    if isinstance(error_data, dict):
+                        error_detail = error_data.get("error", {})
+                        if isinstance(error_detail, dict):
+                            error_message = error_detail.get("message", error_data.get("message", response.text))
                         else:
-                            coexistence_hint = (
-                                "Verifique se a API Key do 360dialog está correta e ativa. "
-                                "Status 403 geralmente indica API Key inválida ou expirada."
-                            )
+                            error_message = str(error_detail) if error_detail else response.text
+                    else:
+                        error_message = str(error_data) if error_data else response.text
+            except (ValueError, json.JSONDecodeError):
+                # Se não conseguir parsear, usa o texto da resposta
+                error_message = response.text or f"Erro HTTP {response.status_code}"
+
+            coexistence_hint = None
+            # Dica adicional quando houver conflito de registro do número
+            if response.status_code in (400, 403, 409):
+                if is_360:
+                    # Verifica se é erro de pagamento
+                    if "payment" in error_message.lower() or "blocked" in error_message.lower():
+                        coexistence_hint = (
+                            "⚠️ CONTA BLOQUEADA POR FALTA DE PAGAMENTO: "
+                            "A conta do 360dialog está bloqueada por falta de créditos/pagamento. "
+                            "IMPORTANTE: Mesmo respostas dentro da janela de conversa (24h) são bloqueadas quando há pendências. "
+                            "É necessário regularizar o pagamento na conta do 360dialog para desbloquear TODAS as mensagens, "
+                            "incluindo respostas gratuitas dentro da janela de conversa."
+                        )
                     else:
                         coexistence_hint = (
-                            "Verifique se o número foi conectado no modo 'App e API' na Meta "
-                            "(coexistência) e se o app WhatsApp Business está atualizado."
+                            "Verifique se a API Key do 360dialog está correta e ativa. "
+                            "Status 403 geralmente indica API Key inválida ou expirada."
                         )
+                else:
+                    coexistence_hint = (
+                        "Verifique se o número foi conectado no modo 'App e API' na Meta "
+                        "(coexistência) e se o app WhatsApp Business está atualizado."
+                    )
 
-                return {
-                    "success": False,
-                    "provider": "360dialog" if is_360 else "WhatsApp Business API (Meta)",
-                    "error": error_message,
-                    "status_code": response.status_code,
-                    "phone": phone_formatted,
-                    "coexistence_hint": coexistence_hint,
-                    "response_text": response.text[:500] if response.text else None
-                }
+            return {
+                "success": False,
+                "provider": "360dialog" if is_360 else "WhatsApp Business API (Meta)",
+                "error": error_message,
+                "status_code": response.status_code,
+                "phone": phone_formatted,
+                "coexistence_hint": coexistence_hint,
+                "response_text": response.text[:500] if response.text else None
+            }
 
         except Exception as e:
             error_msg = str(e)
@@ -382,7 +389,10 @@ class OrderNotification:
                 get_headers,
                 format_phone_number,
             )
-            from app.utils.telefone import variantes_telefone_para_envio_whatsapp
+            from app.api.notifications.core.whatsapp_phone_variants import (
+                registrar_variante_aceita_async,
+                variantes_envio_whatsapp_async,
+            )
 
             config = load_whatsapp_config(empresa_id)
             provider = (config.get("provider") or "").lower()
@@ -429,7 +439,8 @@ class OrderNotification:
             # Payload para mensagem interativa com botões
             if is_360:
                 # 360Dialog usa formato similar ao Meta. Vamos tentar com variantes do telefone.
-                candidates = variantes_telefone_para_envio_whatsapp(phone_formatted or phone)
+                # A variante aceita antes para este cliente (se houver) vem primeiro.
+                candidates = await variantes_envio_whatsapp_async(phone_formatted or phone)
                 if not candidates:
                     candidates = [''.join(filter(str.isdigit, phone_formatted or phone))]
 
@@ -461,53 +472,55 @@ class OrderNotification:
                 }
 
             # Envia a mensagem (com fallback para 360dialog quando rejeitar o 'to')
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                phone_used = phone_formatted
-                if is_360:
-                    last_response = None
-                    for cand in candidates:
-                        phone_used = cand
-                        payload_try = dict(payload_base)
-                        payload_try["to"] = cand
-                        last_response = await client.post(url, json=payload_try, headers=headers)
-                        if last_response.status_code == 200:
-                            result = last_response.json()
-                            message_id = result.get("messages", [{}])[0].get("id") if result.get("messages") else None
-                            logger.info(f"[WhatsApp] Mensagem com botões enviada com sucesso. Message ID: {message_id}")
-                            return {
-                                "success": True,
-                                "provider": "360dialog",
-                                "message_id": message_id,
-                                "phone": phone_used,
-                                "note": "Enviado com fallback de variantes (telefone normalizado)",
-                            }
-                        if last_response.status_code != 400:
-                            break
-                    response = last_response
-                else:
-                    response = await client.post(url, json=payload, headers=headers)
+            # Cliente compartilhado (keep-alive/HTTP2): evita handshake TLS a cada envio
+            client = get_httpx_client("whatsapp")
+            phone_used = phone_formatted
+            if is_360:
+                last_response = None
+                for cand in candidates:
+                    phone_used = cand
+                    payload_try = dict(payload_base)
+                    payload_try["to"] = cand
+                    last_response = await client.post(url, json=payload_try, headers=headers)
+                    if last_response.status_code == 200:
+                        result = last_response.json()
+                        message_id = result.get("messages", [{}])[0].get("id") if result.get("messages") else None
+                        logger.info(f"[WhatsApp] Mensagem com botões enviada com sucesso. Message ID: {message_id}")
+                        await registrar_variante_aceita_async(phone_formatted or phone, cand)
+                        return {
+                            "success": True,
+                            "provider": "360dialog",
+                            "message_id": message_id,
+                            "phone": phone_used,
+                            "note": "Enviado com fallback de variantes (telefone normalizado)",
+                        }
+                    if last_response.status_code != 400:
+                        break
+                response = last_response
+            else:
+                response = await client.post(url, json=payload, headers=headers)
+            
+            if response.status_code == 200:
+                result = response.json()
+                message_id = result.get("messages", [{}])[0].get("id") if result.get("messages") else None
+                logger.info(f"[WhatsApp] Mensagem com botões enviada com sucesso. Message ID: {message_id}")
+                return {
+                    "success": True,
+                    "provider": "360dialog" if is_360 else "WhatsApp Business API (Meta)",
+                    "message_id": message_id,
+                    "phone": phone_used if is_360 else phone_formatted
+                }
+            else:
+                error_data = response.json() if response.text else {}
+                error_message = error_data.get("error", {}).get("message", response.text) if isinstance(error_data, dict) else response.text
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    message_id = result.get("messages", [{}])[0].get("id") if result.get("messages") else None
-                    logger.info(f"[WhatsApp] Mensagem com botões enviada com sucesso. Message ID: {message_id}")
-                    return {
-                        "success": True,
-                        "provider": "360dialog" if is_360 else "WhatsApp Business API (Meta)",
-                        "message_id": message_id,
-                        "phone": phone_used if is_360 else phone_formatted
-                    }
-                else:
-                    error_data = response.json() if response.text else {}
-                    error_message = error_data.get("error", {}).get("message", response.text) if isinstance(error_data, dict) else response.text
-                    
-                    return {
-                        "success": False,
-                        "provider": "360dialog" if is_360 else "WhatsApp Business API (Meta)",
-                        "error": error_message,
-                        "status_code": response.status_code,
-                        "phone": phone_used if is_360 else phone_formatted
-                    }
+                return {
+                    "success": False,
+                    "provider": "360dialog" if is_360 else "WhatsApp Business API (Meta)",
+                    "error": error_message,
+                    "status_code": response.status_code,
+                    "phone": phone_used if is_360 else phone_formatted
+                }
 
         except Exception as e:
             error_msg = str(e)
@@ -745,13 +758,8 @@ _Obrigado pela preferência!_"""
         """
         Envia notificação como mensagem no chat (versão síncrona - mantida para compatibilidade)
         """
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-        return loop.run_until_complete(
+        # asyncio.run encerra o loop ao final (e com ele os clientes HTTP criados nele)
+        return asyncio.run(
             OrderNotification.send_notification_async(db, phone, message, order_type)
         )
 
@@ -1,9 +1,17 @@
 """
 Carregamento de configurações do chatbot
+
+A configuração e o link do cardápio vêm do cache por worker
+(`infrastructure.config_cache`), então instanciar o loader por mensagem não
+consulta o banco a cada vez.
 """
-from typing import Optional
+import logging
+
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+
+from app.api.chatbot.core.infrastructure.config_cache import get_cardapio_link, get_chatbot_config
+
+logger = logging.getLogger(__name__)
 
 # Link do cardápio (configurável)
 LINK_CARDAPIO = "https://chatbot.mensuraapi.com.br"
@@ -23,33 +31,21 @@ class ConfigLoader:
     def _load_chatbot_config(self):
         """Carrega configurações do chatbot para a empresa"""
         try:
-            from app.api.chatbot.repositories.repo_chatbot_config import ChatbotConfigRepository
-            repo = ChatbotConfigRepository(self.db)
-            config = repo.get_by_empresa_id(self.empresa_id)
-            self._config_cache = config
-            if config:
-                print(f"✅ Configuração do chatbot carregada: {config.nome} (aceita_pedidos={config.aceita_pedidos_whatsapp})")
+            self._config_cache = get_chatbot_config(self.db, self.empresa_id)
         except Exception as e:
-            print(f"⚠️ Erro ao carregar configuração do chatbot: {e}")
+            logger.warning(f"Erro ao carregar configuração do chatbot (empresa {self.empresa_id}): {e}")
             self._config_cache = None
 
     def get_chatbot_config(self):
-        """Retorna configuração do chatbot (com cache)"""
+        """Retorna configuração do chatbot (snapshot em cache)"""
         return self._config_cache
 
     def obter_link_cardapio(self) -> str:
         """Obtém o link do cardápio da empresa"""
         try:
-            empresa_query = text("""
-                SELECT cardapio_link
-                FROM cadastros.empresas
-                WHERE id = :empresa_id
-            """)
-            result = self.db.execute(empresa_query, {"empresa_id": self.empresa_id})
-            empresa = result.fetchone()
-            return empresa[0] if empresa and empresa[0] else LINK_CARDAPIO
+            return get_cardapio_link(self.db, self.empresa_id) or LINK_CARDAPIO
         except Exception as e:
-            print(f"⚠️ Erro ao buscar link do cardápio: {e}")
+            logger.warning(f"Erro ao buscar link do cardápio (empresa {self.empresa_id}): {e}")
             return LINK_CARDAPIO
 
     def obter_mensagem_final_pedido(self) -> str:
@@ -0,0 +1,396 @@
+"""
+Inbox durável dos webhooks do WhatsApp (360Dialog/Meta).
+
+O POST /webhook apenas grava o payload bruto em `chatbot.webhook_inbox` e responde
+200, então a Meta não reenvia por timeout mesmo quando a IA demora. Um pool de
+workers assíncronos, presente em cada processo da aplicação, reserva lotes com
+`FOR UPDATE SKIP LOCKED` e chama `process_webhook_background`.
+
+O processamento faz SQLAlchemy síncrono e chamadas à IA; por isso cada worker roda
+num event loop próprio, em thread própria (`_LoopDedicado`): os workers processam
+de fato em paralelo e o loop principal da aplicação (HTTP, WebSocket) não trava. Só
+os envios por WebSocket voltam ao loop principal (ver `ConnectionManager`), que é
+o dono das conexões.
+
+Ordem por conversa: cada linha guarda o telefone do cliente em `chave_ordem`, e só
+é reservada quando não há webhook anterior do mesmo telefone pendente ou em
+processamento. Assim mensagens do mesmo cliente são processadas em sequência
+(inclusive entre processos), e telefones diferentes em paralelo. Um webhook com
+mensagens de vários contatos (raro: a Meta/360dialog costuma mandar um por
+requisição) é ordenado pelo primeiro contato. Falhas voltam para a fila com backoff
+exponencial até `CHATBOT_WEBHOOK_INBOX_MAX_TENTATIVAS`.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from time import monotonic
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database.db_connection import SessionLocal
+from app.utils.prometheus_metrics import (
+    chatbot_webhook_inbox_depth,
+    chatbot_webhook_inbox_lag_seconds,
+    chatbot_webhook_inbox_processed_total,
+)
+
+from . import database as chatbot_db
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TABELA = "chatbot.webhook_inbox"
+
+# Intervalos da manutenção feita pelo loop de reserva
+_INTERVALO_METRICAS_SEGUNDOS = 15.0
+_INTERVALO_LIMPEZA_SEGUNDOS = 3600.0
+
+
+def _digits_only(valor: Any) -> str:
+    return "".join(ch for ch in str(valor or "") if ch.isdigit())
+
+
+def extrair_chave_ordem(body: Dict[str, Any]) -> Optional[str]:
+    """
+    Telefone do cliente a que o webhook se refere (primeiro encontrado; um lote com
+    vários contatos é ordenado pelo primeiro).
+
+    - messages: remetente (`from`)
+    - message_echoes: destinatário (`to`)
+    - statuses: destinatário (`recipient_id`)
+
+    Retorna None quando não há telefone (o webhook é processado sem ordenação).
+    """
+    for entry in body.get("entry") or []:
+        for change in entry.get("changes") or []:
+            value = change.get("value") or {}
+            for message in value.get("messages") or []:
+                telefone = _digits_only(message.get("from"))
+                if telefone:
+                    return telefone[:50]
+            for echo in value.get("message_echoes") or []:
+                telefone = _digits_only(echo.get("to"))
+                if telefone:
+                    return telefone[:50]
+            for status in value.get("statuses") or []:
+                telefone = _digits_only(status.get("recipient_id"))
+                if telefone:
+                    return telefone[:50]
+    return None
+
+
+def enfileirar(body: Dict[str, Any], headers_info: Optional[Dict[str, Any]] = None, session_factory=SessionLocal) -> int:
+    """Grava o webhook no inbox e retorna o id da linha."""
+    with session_factory() as db:
+        webhook_id = db.execute(
+            text(f"""
+                INSERT INTO {TABELA} (payload, headers, chave_ordem)
+                VALUES (CAST(:payload AS JSONB), CAST(:headers AS JSONB), :chave_ordem)
+                RETURNING id
+            """),
+            {
+                "payload": json.dumps(body),
+                "headers": json.dumps(headers_info or {}),
+                "chave_ordem": extrair_chave_ordem(body),
+            },
+        ).scalar()
+        db.commit()
+        return int(webhook_id)
+
+
+class _LoopDedicado:
+    """Event loop rodando em thread própria, onde um worker do inbox processa os webhooks."""
+
+    def __init__(self, nome: str):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=nome, daemon=True)
+        self._thread.start()
+
+    async def executar(self, coro: Awaitable[T]) -> T:
+        """Executa `coro` no loop dedicado e aguarda o resultado (o cancelamento é repassado)."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    async def _cancelar_pendentes(self) -> None:
+        # Como no fim do asyncio.run: cancela o que sobrou (ex.: a task que fecha os clientes HTTP do loop)
+        pendentes = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for tarefa in pendentes:
+            tarefa.cancel()
+        await asyncio.gather(*pendentes, return_exceptions=True)
+        await self.loop.shutdown_asyncgens()
+
+    def parar(self, timeout: float = 10.0) -> None:
+        """Encerra o loop e a thread (bloqueante; chame fora do loop principal)."""
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancelar_pendentes(), self.loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"[WEBHOOK_INBOX] Erro ao encerrar loop {self._thread.name}: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+
+class WebhookInbox:
+    """Pool de workers que consome o inbox de webhooks do chatbot."""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self._session_factory = session_factory
+        self.workers = max(1, int(workers or settings.CHATBOT_WEBHOOK_INBOX_WORKERS))
+        self.batch_size = max(1, int(batch_size or settings.CHATBOT_WEBHOOK_INBOX_BATCH_SIZE))
+        self.poll_interval = float(poll_interval or settings.CHATBOT_WEBHOOK_INBOX_POLL_SEGUNDOS)
+        self.lease_seconds = int(lease_seconds or settings.CHATBOT_WEBHOOK_INBOX_LEASE_SEGUNDOS)
+        self.max_attempts = max(1, int(max_attempts or settings.CHATBOT_WEBHOOK_INBOX_MAX_TENTATIVAS))
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loops: List[_LoopDedicado] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = False
+        self._metricas_em: Optional[float] = None
+        self._limpeza_em: Optional[float] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.workers * 2)
+        self._wake_event = asyncio.Event()
+        self._running = True
+        self._loop = loop = asyncio.get_running_loop()
+        self._loops = [_LoopDedicado(f"webhook-inbox-{i}") for i in range(self.workers)]
+        self._tasks = [loop.create_task(self._claim_loop())]
+        self._tasks += [loop.create_task(self._worker_loop(dedicado)) for dedicado in self._loops]
+        logger.info(f"[WEBHOOK_INBOX] Iniciado: {self.workers} workers, lote={self.batch_size}")
+
+    async def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for dedicado in self._loops:
+            await asyncio.to_thread(dedicado.parar)
+        self._loops = []
+        logger.info("[WEBHOOK_INBOX] Parado")
+
+    def wake(self) -> None:
+        """Acorda o loop de reserva (chamado logo após gravar um webhook neste processo; thread-safe)."""
+        if self._wake_event is None or self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake_event.set)
+        except RuntimeError:
+            # Loop já encerrado (shutdown)
+            pass
+
+    # ------------------------------------------------------------------
+    # Reserva
+    # ------------------------------------------------------------------
+    def _claim(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Reserva webhooks prontos (pendentes, ou em processamento com lease vencido).
+
+        Só entra no lote o webhook mais antigo ainda não concluído de cada telefone,
+        então o lote nunca tem dois webhooks do mesmo cliente.
+        """
+        with self._session_factory() as db:
+            rows = db.execute(
+                text(f"""
+                    WITH candidatos AS (
+                        SELECT i.id
+                        FROM {TABELA} i
+                        WHERE i.status IN ('pending', 'processing')
+                          AND i.next_attempt_at <= now()
+                          AND NOT EXISTS (
+                              SELECT 1 FROM {TABELA} a
+                              WHERE a.chave_ordem = i.chave_ordem
+                                AND a.id < i.id
+                                AND a.status IN ('pending', 'processing')
+                          )
+                        ORDER BY i.next_attempt_at, i.id
+                        LIMIT :limite
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE {TABELA} w
+                    SET status = 'processing',
+                        attempts = w.attempts + 1,
+                        next_attempt_at = now() + make_interval(secs => :lease)
+                    FROM candidatos c
+                    WHERE w.id = c.id
+                    RETURNING w.id, w.payload, w.headers, w.attempts
+                """),
+                {"limite": limit, "lease": self.lease_seconds},
+            ).mappings().all()
+            db.commit()
+        # RETURNING não garante ordem
+        return sorted((dict(r) for r in rows), key=lambda r: r["id"])
+
+    async def _claim_loop(self) -> None:
+        while self._running:
+            try:
+                free = max(1, min(self.batch_size, self._queue.maxsize - self._queue.qsize()))
+                claimed = await asyncio.to_thread(self._claim, free)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[WEBHOOK_INBOX] Erro ao reservar webhooks: {e}")
+                claimed = []
+
+            for item in claimed:
+                await self._queue.put(item)
+
+            await self._manutencao()
+
+            # Lote cheio: provavelmente há mais; volta a reservar sem esperar
+            if len(claimed) >= free:
+                continue
+
+            self._wake_event.clear()
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Processamento
+    # ------------------------------------------------------------------
+    async def _worker_loop(self, dedicado: _LoopDedicado) -> None:
+        while self._running:
+            item = await self._queue.get()
+            try:
+                # Processa no loop/thread do worker; o loop principal só aguarda o resultado
+                await dedicado.executar(self.process(item))
+            except Exception as e:
+                logger.error(f"[WEBHOOK_INBOX] Erro ao processar webhook {item.get('id')}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def process(self, item: Dict[str, Any]) -> None:
+        """Processa um webhook reservado e registra o resultado (done/retry/failed)."""
+        from app.api.chatbot.router.router import process_webhook_background
+
+        try:
+            await process_webhook_background(item["payload"], item.get("headers") or None, propagar_erros=True)
+        except Exception as e:
+            await asyncio.to_thread(self._registrar_falha, item["id"], int(item["attempts"]), str(e))
+            # Reserva de novo assim que o backoff permitir (ou libera o próximo do telefone)
+            self.wake()
+            return
+        await asyncio.to_thread(self._registrar_sucesso, item["id"])
+        # O próximo webhook do mesmo telefone já pode ser reservado
+        self.wake()
+
+    def _registrar_sucesso(self, webhook_id: int) -> None:
+        with self._session_factory() as db:
+            lag = db.execute(
+                text(f"""
+                    UPDATE {TABELA}
+                    SET status = 'done', processed_at = now(), last_error = NULL
+                    WHERE id = :id
+                    RETURNING EXTRACT(EPOCH FROM (processed_at - created_at))
+                """),
+                {"id": webhook_id},
+            ).scalar()
+            db.commit()
+        chatbot_webhook_inbox_processed_total.labels(resultado="done").inc()
+        if lag is not None:
+            chatbot_webhook_inbox_lag_seconds.observe(max(0.0, float(lag)))
+
+    def _registrar_falha(self, webhook_id: int, attempts: int, erro: str) -> None:
+        if attempts >= self.max_attempts:
+            status, atraso = "failed", 0
+            logger.error(f"[WEBHOOK_INBOX] Webhook {webhook_id} falhou após {attempts} tentativas: {erro}")
+        else:
+            status = "pending"
+            atraso = min(
+                settings.CHATBOT_WEBHOOK_INBOX_BACKOFF_BASE_SEGUNDOS * (2 ** (attempts - 1)),
+                settings.CHATBOT_WEBHOOK_INBOX_BACKOFF_MAX_SEGUNDOS,
+            )
+            logger.warning(
+                f"[WEBHOOK_INBOX] Webhook {webhook_id} falhou (tentativa {attempts}), nova tentativa em {atraso}s: {erro}"
+            )
+        with self._session_factory() as db:
+            db.execute(
+                text(f"""
+                    UPDATE {TABELA}
+                    SET status = :status,
+                        next_attempt_at = now() + make_interval(secs => :atraso),
+                        last_error = :erro
+                    WHERE id = :id
+                """),
+                {"id": webhook_id, "status": status, "atraso": atraso, "erro": erro[:2000]},
+            )
+            db.commit()
+        chatbot_webhook_inbox_processed_total.labels(resultado="failed" if status == "failed" else "retry").inc()
+
+    # ------------------------------------------------------------------
+    # Manutenção (métricas de fila e limpeza)
+    # ------------------------------------------------------------------
+    def _atualizar_metricas(self) -> None:
+        with self._session_factory() as db:
+            rows = db.execute(
+                text(f"""
+                    SELECT status, COUNT(*) FROM {TABELA}
+                    WHERE status IN ('pending', 'processing', 'failed')
+                    GROUP BY status
+                """)
+            ).all()
+        contagem = {status: total for status, total in rows}
+        for status in ("pending", "processing", "failed"):
+            chatbot_webhook_inbox_depth.labels(status=status).set(contagem.get(status, 0))
+
+    def _limpar_processados(self) -> None:
+        with self._session_factory() as db:
+            removidos = db.execute(
+                text(f"""
+                    DELETE FROM {TABELA}
+                    WHERE status = 'done'
+                      AND processed_at < now() - make_interval(days => :dias)
+                """),
+                {"dias": settings.CHATBOT_WEBHOOK_INBOX_RETENCAO_DIAS},
+            ).rowcount
+            db.commit()
+            # Ids de mensagens fora da janela de reentrega (deduplicação de mensagens_recebidas)
+            ids_removidos = chatbot_db.limpar_whatsapp_message_ids(db, settings.CHATBOT_WHATSAPP_MESSAGE_IDS_RETENCAO_DIAS)
+        if removidos or ids_removidos:
+            logger.info(
+                f"[WEBHOOK_INBOX] Limpeza: {removidos} webhooks processados e {ids_removidos} ids de mensagens removidos"
+            )
+
+    async def _manutencao(self) -> None:
+        agora = monotonic()
+        try:
+            if self._metricas_em is None or agora - self._metricas_em >= _INTERVALO_METRICAS_SEGUNDOS:
+                self._metricas_em = agora
+                await asyncio.to_thread(self._atualizar_metricas)
+            if self._limpeza_em is None or agora - self._limpeza_em >= _INTERVALO_LIMPEZA_SEGUNDOS:
+                self._limpeza_em = agora
+                await asyncio.to_thread(self._limpar_processados)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[WEBHOOK_INBOX] Erro na manutenção do inbox: {e}")
+
+
+# Instância do processo (iniciada no startup da aplicação)
+webhook_inbox = WebhookInbox()
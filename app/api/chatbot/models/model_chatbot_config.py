@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.database.db_connection import Base
 from app.utils.database_utils import now_trimmed
@@ -31,6 +32,7 @@ class ChatbotConfigModel(Base):
     # Configurações adicionais
     mensagem_boas_vindas = Column(Text, nullable=True)  # Mensagem de boas-vindas personalizada
     mensagem_redirecionamento = Column(Text, nullable=True)  # Mensagem quando redireciona para link
+    palavras_chave = Column(JSONB, nullable=True)  # Termos extras por intenção: {"pedido": ["..."], ...}
     ativo = Column(Boolean, default=True, nullable=False)  # Se a configuração está ativa
     
     # Timestamps
@@ -2,6 +2,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
 
+from app.api.chatbot.core.infrastructure.config_cache import invalidate_chatbot_config_cache
 from app.api.chatbot.models.model_chatbot_config import ChatbotConfigModel
 from app.utils.logger import logger
 
@@ -68,6 +69,7 @@ class ChatbotConfigRepository:
         config = ChatbotConfigModel(**data)
         self.db.add(config)
         self.db.commit()
+        invalidate_chatbot_config_cache()
         self.db.refresh(config)
         logger.info(f"[ChatbotConfig] Criado config_id={config.id} empresa_id={config.empresa_id} nome={config.nome}")
         return config
@@ -78,6 +80,7 @@ class ChatbotConfigRepository:
             if hasattr(config, key) and value is not None:
                 setattr(config, key, value)
         self.db.commit()
+        invalidate_chatbot_config_cache()
         self.db.refresh(config)
         return config
 
@@ -85,4 +88,5 @@ class ChatbotConfigRepository:
         """Remove uma configuração (soft delete - marca como inativo)"""
         config.ativo = False
         self.db.commit()
+        invalidate_chatbot_config_cache()
         logger.info(f"[ChatbotConfig] Desativado config_id={config.id}")
@@ -7,6 +7,8 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Optional, Dict
+import asyncio
+import base64
 import logging
 import httpx
 import json
@@ -18,11 +20,16 @@ from app.database.db_connection import get_db
 from ..core import database as chatbot_db
 from ..core.notifications import OrderNotification, ORDER_STATUS_TEMPLATES
 from ..core.groq_sales_handler import GroqSalesHandler
-from app.config.settings import GROQ_API_URL, GROQ_API_KEY, MODEL_NAME, STATE_CADASTRO_NOME
+from ..core.llm_client import llm_client
+from ..core.infrastructure.config_cache import get_cardapio_link, get_chatbot_config
+from ..core.intent_engine import AnaliseIntencoes, analisar_mensagem, engine_padrao, normalizar_texto
+from ..core.webhook_inbox import enfileirar as enfileirar_webhook, webhook_inbox
+from ..core.mensagens_recebidas import mensagem_duplicada, registrar_mensagem_processada
+from app.config.settings import GROQ_API_URL, GROQ_API_KEY, MODEL_NAME, STATE_CADASTRO_NOME, CHATBOT_WEBHOOK_INBOX_ENABLED
 from ..core.llm_policy import build_system_prompt, clamp_temperature
 from app.api.notifications.repositories.whatsapp_config_repository import WhatsAppConfigRepository
+from app.api.notifications.core.whatsapp_config_cache import resolver_empresa_whatsapp
 from app.api.empresas.repositories.empresa_repo import EmpresaRepository
-from app.api.chatbot.repositories.repo_chatbot_config import ChatbotConfigRepository
 
 # Logger único do módulo (evita "import logging" repetido)
 logger = logging.getLogger(__name__)
@@ -76,79 +83,41 @@ Lembre-se: você é Alex, um humano real ajudando outro humano. Seja genuíno!""
 PROMPT_ATENDIMENTO = "atendimento"
 PROMPT_ATENDIMENTO_PEDIDO_WHATSAPP = "atendimento-pedido-whatsapp"
 
-# Termos simples para detectar tentativa de pedido
-PEDIDO_INTENT_TERMS = [
-    "quero",
-    "pedir",
-    "pedido",
-    "fazer pedido",
-    "adicionar",
-    "me ve",
-    "me vê",
-    "me da",
-    "me dá",
-    "manda",
-    "vou querer",
-    "vou pedir",
-    "finalizar",
-    "fechar",
-    "só isso",
-    "pode fechar",
-    "coloca",
-    "colocar",
-    "incluir",
-    "põe",
-    "põe na conta",
-    "pode anotar",
-    "anota",
-    "anotar",
-    "vou levar",
-    "levar",
-    "pegar",
-    "vou pegar",
-]
-
-
-def _is_pedido_intent(message_text: Optional[str]) -> bool:
+# Termos de intenção (pedido, pergunta, cardápio, atualizações...) ficam em
+# `core.intent_engine.INTENCOES_PADRAO`, compilados num único autômato por empresa
+
+
+def _is_pedido_intent(message_text: Optional[str], analise: Optional[AnaliseIntencoes] = None) -> bool:
     """
     Detecta se a mensagem contém intenção de fazer um pedido.
     Retorna True se detectar termos relacionados a pedidos ou padrões numéricos de pedido.
     IMPORTANTE: NÃO detecta perguntas sobre preços/informações (ex: "quanto fica", "qual o preço").
+
+    `analise` é a análise da mensagem já feita pelo `IntentEngine` (evita normalizar de novo).
     """
-    if not message_text:
-        return False
-    msg = message_text.lower().strip()
-    if not msg:
+    if analise is None:
+        analise = engine_padrao.analisar(message_text)
+    if not analise.texto:
         return False
-    
-    # Palavras que indicam PERGUNTA (não pedido)
-    palavras_pergunta = ['quanto', 'qual', 'quais', 'tem', 'tem?', 'custa', 'fica', 'preço', 'preco', 'valor', 'informação', 'informacao', 'saber', 'dizer']
-    
-    # Se começa com pergunta, não é pedido
-    if any(msg.startswith(p) for p in palavras_pergunta):
-        return False
-    
-    # Se contém padrão de pergunta no início (ex: "quanto fica 2 xbacon")
-    if re.match(r'^(quanto|qual|quais|tem|preço|preco|valor).*', msg):
+
+    # Palavras de pergunta em qualquer posição (inclusive no início, ex: "quanto fica 2 xbacon")
+    # indicam PERGUNTA, não pedido
+    if analise.tem("pergunta"):
         return False
-    
-    # Verifica se contém termos de intenção de pedido (mas não se for pergunta)
-    if any(term in msg for term in PEDIDO_INTENT_TERMS):
-        # Se contém termos de pedido MAS também palavras de pergunta, é pergunta, não pedido
-        if not any(p in msg for p in palavras_pergunta):
-            return True
-    
+
+    # Termos de intenção de pedido
+    if analise.tem("tentativa_pedido"):
+        return True
+
     # Padrões como "1 x-bacon", "2 pizzas", "3 coca", "2x hambúrguer"
-    # Mas só se NÃO for pergunta (ex: "quanto fica 2 xbacon" não é pedido)
-    if re.search(r'\d+\s*(x\s*)?\w+', msg):
-        # Se contém palavras de pergunta, não é pedido
-        if not any(p in msg for p in palavras_pergunta):
-            return True
-    
-    return False
+    return bool(re.search(r'\d+\s*(x\s*)?\w+', analise.texto))
 
 
-def _is_chamar_atendente_intent(message_text: Optional[str], button_id: Optional[str] = None) -> bool:
+def _is_chamar_atendente_intent(
+    message_text: Optional[str],
+    button_id: Optional[str] = None,
+    analise: Optional[AnaliseIntencoes] = None,
+) -> bool:
     """
     Detecta intenção explícita de falar com um atendente humano.
 
@@ -156,100 +125,47 @@ def _is_chamar_atendente_intent(message_text: Optional[str], button_id: Optional
     - Deve vir ANTES de `_is_pedido_intent`, pois frases como "quero falar com um atendente"
       contém "quero" e acabam sendo classificadas como tentativa de pedido.
     """
-    try:
-        if button_id and str(button_id).strip().lower() == "chamar_atendente":
-            return True
-        if not message_text:
-            return False
-        msg = str(message_text).lower().strip()
-        if not msg:
-            return False
-
-        # Normaliza variações comuns do WhatsApp (id do botão pode chegar como texto)
-        if msg == "chamar_atendente" or "chamar_atendente" in msg:
-            return True
-
-        # Regex mais permissivo (compatível com o GroqSalesHandler)
-        return bool(
-            re.search(
-                r"(chamar\s+atendente|"
-                r"quero\s+falar\s+com\s+(algu[eé]m|atendente|humano)|"
-                r"preciso\s+de\s+(um\s+)?(humano|atendente)|"
-                r"atendente\s+humano|"
-                r"quero\s+atendimento\s+humano|"
-                r"falar\s+com\s+atendente|"
-                r"ligar\s+atendente|"
-                r"chama\s+(algu[eé]m|atendente)\s+para\s+mi)",
-                msg,
-                re.IGNORECASE,
-            )
-        )
-    except Exception:
-        return False
+    if button_id and str(button_id).strip().lower() == "chamar_atendente":
+        return True
+    if analise is None:
+        analise = engine_padrao.analisar(message_text)
+    return analise.tem("chamar_atendente")
 
 
-def _is_pedido_cardapio(message_text: Optional[str]) -> bool:
+def _is_pedido_cardapio(message_text: Optional[str], analise: Optional[AnaliseIntencoes] = None) -> bool:
     """
     Detecta se a mensagem é um pedido explícito de cardápio.
     Exemplos: "pode me mandar o cardápio", "quero ver o cardápio", "me manda o cardápio", etc.
     """
-    if not message_text:
-        return False
-    msg = str(message_text).lower().strip()
-    if not msg:
-        return False
-    
-    # Padrões que indicam pedido de cardápio
-    padroes_cardapio = [
-        # "pode me mandar o cardápio", "poderia me mandar o cardápio"
-        r'(?:pode|poderia)(?:\s+me)?\s+(?:me\s+)?(?:mandar|manda|enviar|envia|mostrar|mostra|passar|passa)\s+(?:o\s+)?(?:cardapio|cardápio|menu)',
-        # "quero ver o cardápio", "gostaria de ver o cardápio"
-        r'(?:quero|gostaria|gostaria de|queria|queria de)\s+(?:ver|ver o|receber|receber o|ter|ter o)\s+(?:cardapio|cardápio|menu)',
-        # "me manda o cardápio", "manda o cardápio"
-        r'(?:me\s+)?(?:manda|mandar|envia|enviar|mostra|mostrar|passa|passar)\s+(?:o\s+)?(?:cardapio|cardápio|menu)',
-        # "manda aí o cardápio", "envia pra mim o cardápio"
-        r'(?:manda|mandar|envia|enviar|mostra|mostrar|passa|passar)\s+(?:ai|aí|pra mim|para mim)\s+(?:o\s+)?(?:cardapio|cardápio|menu)',
-        # Apenas "cardápio" ou "menu"
-        r'^(?:cardapio|cardápio|menu)$',
-        # "mostra o cardápio", "ver o cardápio"
-        r'^(?:mostra|mostrar|ver|quero ver)\s+(?:o\s+)?(?:cardapio|cardápio|menu)$',
-    ]
-    
-    for padrao in padroes_cardapio:
-        if re.search(padrao, msg, re.IGNORECASE):
-            return True
-    
-    return False
+    if analise is None:
+        analise = engine_padrao.analisar(message_text)
+    # Termos de pedido ("me manda o cardápio") ou a mensagem inteira é "cardápio", "menu", "ver o cardápio"...
+    return analise.tem("pedido_cardapio") or analise.somente("ver_cardapio")
 
 
-def _is_saudacao_intent(message_text: Optional[str]) -> bool:
+def _is_saudacao_intent(message_text: Optional[str], analise: Optional[AnaliseIntencoes] = None) -> bool:
     """
     Detecta se a mensagem é uma saudação/entrada ("oi", "olá", "menu", "cardápio", etc).
     Usado para roteamento de fluxo (ex.: quando pedidos no WhatsApp estão desativados,
     a saudação deve responder com o link/redirecionamento).
     """
-    if not message_text:
-        return False
-    msg = str(message_text).lower().strip()
+    # Texto já normalizado (minúsculas, sem acentos): "olá" e "ola" equivalem
+    msg = analise.texto if analise is not None else normalizar_texto(message_text)
     if not msg:
         return False
 
     saudacoes = {
         "oi",
         "ola",
-        "olá",
         "oie",
         "eai",
-        "e aí",
+        "e ai",
         "bom dia",
         "boa tarde",
         "boa noite",
         "menu",
         "cardapio",
-        "cardápio",
         "inicio",
-        "início",
-        "começar",
         "comecar",
         "start",
     }
@@ -257,7 +173,7 @@ def _is_saudacao_intent(message_text: Optional[str]) -> bool:
         return True
 
     # Ex.: "oi tudo bem", "bom dia!"
-    if any(msg.startswith(s + " ") for s in ("oi", "ola", "olá", "bom dia", "boa tarde", "boa noite")):
+    if any(msg.startswith(s + " ") for s in ("oi", "ola", "bom dia", "boa tarde", "boa noite")):
         return True
 
     return False
@@ -266,14 +182,7 @@ def _is_saudacao_intent(message_text: Optional[str]) -> bool:
 def _montar_mensagem_redirecionamento(db: Session, empresa_id: int, config) -> str:
     link_cardapio = "https://chatbot.mensuraapi.com.br"
     try:
-        empresa_query = text("""
-            SELECT nome, cardapio_link
-            FROM cadastros.empresas
-            WHERE id = :empresa_id
-        """)
-        result_empresa = db.execute(empresa_query, {"empresa_id": empresa_id})
-        empresa = result_empresa.fetchone()
-        link_cardapio = empresa[1] if empresa and empresa[1] else link_cardapio
+        link_cardapio = get_cardapio_link(db, empresa_id) or link_cardapio
     except Exception:
         pass
 
@@ -800,6 +709,7 @@ async def get_user_conversations(
     ),
 ):
     """Lista todas as conversas de um usuário (com filtro opcional por data)."""
+    # Cada conversa já vem com o status do bot (pausado/ativo) do telefone (user_id)
     conversations = chatbot_db.get_conversations_by_user(
         db,
         user_id,
@@ -807,16 +717,6 @@ async def get_user_conversations(
         data_inicio=data_inicio,
         data_fim=data_fim,
     )
-    # Anexa status do bot (pausado/ativo) para cada conversa baseada no telefone (user_id)
-    try:
-        for conv in conversations:
-            try:
-                conv["bot_status"] = chatbot_db.get_bot_status(db, conv.get("user_id"))
-            except Exception:
-                conv["bot_status"] = {"phone_number": conv.get("user_id"), "is_active": True}
-    except Exception:
-        # Não falhar a rota se algo der errado ao buscar status
-        pass
     return {"conversations": conversations}
 
 
@@ -832,13 +732,8 @@ async def get_user_latest_conversation(user_id: str, db: Session = Depends(get_d
     latest_conversation = conversations[0]
     conversation_id = latest_conversation['id']
 
-    # Busca as mensagens
+    # Busca as mensagens (o status do bot já vem na conversa)
     messages = chatbot_db.get_messages(db, conversation_id)
-    # Anexa status do bot (pausado/ativo) para a conversa retornada
-    try:
-        latest_conversation["bot_status"] = chatbot_db.get_bot_status(db, latest_conversation.get("user_id"))
-    except Exception:
-        latest_conversation["bot_status"] = {"phone_number": latest_conversation.get("user_id"), "is_active": True}
 
     return {
         "conversation": latest_conversation,
@@ -846,57 +741,50 @@ async def get_user_latest_conversation(user_id: str, db: Session = Depends(get_d
     }
 
 
+def _encode_conversations_cursor(cursor) -> Optional[str]:
+    if cursor is None:
+        return None
+    updated_at, conversation_id = cursor
+    raw = f"{updated_at.isoformat()}|{conversation_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_conversations_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        updated_at, conversation_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(updated_at), int(conversation_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
 @router.get("/conversations")
-async def list_all_conversations(db: Session = Depends(get_db)):
+async def list_all_conversations(
+    db: Session = Depends(get_db),
+    empresa_id: Optional[int] = None,
+    limit: Optional[int] = Query(
+        default=None,
+        ge=1,
+        le=500,
+        description="Tamanho da página. Sem limit, retorna todas as conversas (comportamento legado).",
+    ),
+    cursor: Optional[str] = Query(
+        default=None,
+        description="Valor de `next_cursor` da página anterior (paginação keyset por updated_at/id).",
+    ),
+):
     """Lista TODAS as conversas do sistema (para admin)"""
+    keyset = _decode_conversations_cursor(cursor)
     try:
-        from sqlalchemy import text
-        query = text(f"""
-            SELECT
-                c.id,
-                c.session_id,
-                c.user_id,
-                c.contact_name,
-                c.prompt_key,
-                c.model,
-                c.empresa_id,
-                c.created_at,
-                c.updated_at,
-                COUNT(m.id) as message_count,
-                MAX(m.created_at) as last_message_at
-            FROM chatbot.conversations c
-            LEFT JOIN chatbot.messages m ON c.id = m.conversation_id
-            GROUP BY c.id, c.session_id, c.user_id, c.contact_name, c.prompt_key, c.model, c.empresa_id, c.created_at, c.updated_at
-            ORDER BY c.updated_at DESC
-        """)
-
-        result = db.execute(query)
-        conversations = [
-            {
-                "id": row[0],
-                "session_id": row[1],
-                "user_id": row[2],
-                "contact_name": row[3],
-                "prompt_key": row[4],
-                "model": row[5],
-                "empresa_id": row[6],
-                "created_at": row[7],
-                "updated_at": row[8],
-                "message_count": row[9],
-                "last_message_at": row[10]
-            }
-            for row in result.fetchall()
-        ]
-        # Anexa status do bot para cada conversa (se possível)
-        try:
-            for conv in conversations:
-                try:
-                    conv["bot_status"] = chatbot_db.get_bot_status(db, conv.get("user_id"))
-                except Exception:
-                    conv["bot_status"] = {"phone_number": conv.get("user_id"), "is_active": True}
-        except Exception:
-            pass
-        return {"conversations": conversations}
+        # last_message_at/message_count vêm da própria conversa e o status do bot vem no mesmo SELECT
+        conversations, next_cursor = chatbot_db.list_conversations(
+            db,
+            empresa_id=empresa_id,
+            limit=limit,
+            cursor=keyset,
+        )
+        return {"conversations": conversations, "next_cursor": _encode_conversations_cursor(next_cursor)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar conversas: {str(e)}")
 
@@ -948,14 +836,64 @@ async def update_conversation_settings(
 
 
 @router.get("/conversations/{conversation_id}/messages")
-async def get_conversation_messages(conversation_id: int, db: Session = Depends(get_db)):
-    """Lista todas as mensagens de uma conversa"""
+async def get_conversation_messages(
+    conversation_id: int,
+    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(
+        default=None,
+        ge=1,
+        le=500,
+        description="Tamanho da página. Sem limit (e sem cursores), retorna todas as mensagens.",
+    ),
+    before_id: Optional[int] = Query(default=None, description="Mensagens anteriores a este id (histórico)."),
+    after_id: Optional[int] = Query(default=None, description="Mensagens posteriores a este id (novas)."),
+):
+    """Lista as mensagens de uma conversa (paginação por cursor de id de mensagem)"""
     conversation = chatbot_db.get_conversation(db, conversation_id)
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversa não encontrada")
 
-    messages = chatbot_db.get_messages(db, conversation_id)
-    return {"messages": messages}
+    try:
+        # Busca uma a mais para saber se há outra página na mesma direção
+        messages = chatbot_db.get_messages(
+            db,
+            conversation_id,
+            before_id=before_id,
+            after_id=after_id,
+            limit=limit + 1 if limit else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    has_more = False
+    if limit and len(messages) > limit:
+        has_more = True
+        # after_id pagina para frente (descarta a última); senão para trás (descarta a primeira)
+        messages = messages[:limit] if after_id is not None else messages[1:]
+    return {"messages": messages, "has_more": has_more}
+
+
+@router.get("/conversations/{conversation_id}/messages/since/{message_id}")
+async def get_conversation_messages_since(
+    conversation_id: int,
+    message_id: int,
+    db: Session = Depends(get_db),
+    limit: int = Query(default=100, ge=1, le=500),
+):
+    """Mensagens novas desde `message_id` (polling incremental da tela de conversa)"""
+    try:
+        messages = chatbot_db.get_messages(db, conversation_id, after_id=message_id, limit=limit + 1)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    return {
+        "messages": messages,
+        "has_more": has_more,
+        # Próximo polling: /messages/since/{last_message_id}
+        "last_message_id": messages[-1]["id"] if messages else message_id,
+    }
 
 
 @router.post("/conversations/{conversation_id}/messages")
@@ -1758,10 +1696,17 @@ def get_empresa_id_from_webhook(db: Session, metadata: dict, business_account_id
     try:
         repo = WhatsAppConfigRepository(db)
 
+        # Os identificadores do WhatsApp são resolvidos pelo mapa em memória (renovado ao salvar
+        # configurações); o banco só é consultado para identificadores fora do mapa.
+
         # Estratégia 1: business_account_id (MAIS CONFIÁVEL - vem no entry.id do webhook)
         if business_account_id:
             business_account_id = str(business_account_id).strip()
-            empresa_id = get_empresa_id_by_business_account_id(db, business_account_id)
+            empresa_id = resolver_empresa_whatsapp(
+                "business_account_id",
+                business_account_id,
+                lambda: get_empresa_id_by_business_account_id(db, business_account_id),
+            )
             if empresa_id:
                 return empresa_id
 
@@ -1781,7 +1726,11 @@ def get_empresa_id_from_webhook(db: Session, metadata: dict, business_account_id
             phone_number_id = str(phone_number_id).strip()
             
             # Usa a função melhorada que já tenta buscar inativas se necessário
-            empresa_id = get_empresa_id_by_phone_number_id(db, phone_number_id)
+            empresa_id = resolver_empresa_whatsapp(
+                "phone_number_id",
+                phone_number_id,
+                lambda: get_empresa_id_by_phone_number_id(db, phone_number_id),
+            )
             if empresa_id:
                 return empresa_id
         
@@ -1789,18 +1738,25 @@ def get_empresa_id_from_webhook(db: Session, metadata: dict, business_account_id
         display_phone_number = metadata.get("display_phone_number")
         if display_phone_number:
             display_phone_number = str(display_phone_number).strip()
-            
-            # Primeiro tenta buscar apenas ativas
-            config = repo.get_by_display_phone_number(display_phone_number, include_inactive=False)
-            
-            # Se não encontrou ativa, tenta buscar inativas também
-            if not config:
-                config = repo.get_by_display_phone_number(display_phone_number, include_inactive=True)
-                if config:
-                    logger.warning(f"Configuração inativa encontrada para display_phone_number={display_phone_number}")
-            
-            if config:
-                empresa_id = str(config.empresa_id)
+
+            def _buscar_por_display_phone_number() -> Optional[str]:
+                # Primeiro tenta buscar apenas ativas
+                config = repo.get_by_display_phone_number(display_phone_number, include_inactive=False)
+
+                # Se não encontrou ativa, tenta buscar inativas também
+                if not config:
+                    config = repo.get_by_display_phone_number(display_phone_number, include_inactive=True)
+                    if config:
+                        logger.warning(f"Configuração inativa encontrada para display_phone_number={display_phone_number}")
+
+                return str(config.empresa_id) if config else None
+
+            empresa_id = resolver_empresa_whatsapp(
+                "display_phone_number",
+                display_phone_number,
+                _buscar_por_display_phone_number,
+            )
+            if empresa_id:
                 return empresa_id
         
         logger.warning("Não foi possível identificar EMPRESA usando nenhuma estratégia")
@@ -1811,7 +1767,7 @@ def get_empresa_id_from_webhook(db: Session, metadata: dict, business_account_id
 
 
 @router.post("/webhook")
-async def webhook_handler(request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def webhook_handler(request: Request, background_tasks: BackgroundTasks):
     """
     Recebe mensagens do WhatsApp via webhook (360Dialog/Meta)
     
@@ -1854,21 +1810,19 @@ async def webhook_handler(request: Request, background_tasks: BackgroundTasks, d
             "host": request.headers.get("host"),
         }
 
-        # Verifica status global do bot (depois do log do webhook)
-        try:
-            global_status = chatbot_db.get_global_bot_status(db)
-            if not global_status.get("is_active", True):
-                # Bot desligado: retorna OK sem processar nada
-                return {"status": "ok", "message": "Chatbot desligado"}
-        except Exception:
-            # Se falhar ao verificar status, assume que está ligado para não bloquear webhooks
-            pass
-
         # CRÍTICO: Retorna 200 OK IMEDIATAMENTE antes de processar
         # Conforme documentação 360Dialog: "acknowledge immediately after receiving the webhook"
-        # Processa tudo em background para não violar o limite de 5 segundos
-        
-        # Adiciona processamento em background
+        # O payload vai para o inbox durável (chatbot.webhook_inbox); o pool de `webhook_inbox`
+        # processa em ordem por telefone, com retry. O status global do bot é checado no processamento.
+        if CHATBOT_WEBHOOK_INBOX_ENABLED:
+            try:
+                await asyncio.to_thread(enfileirar_webhook, body, headers_info)
+                webhook_inbox.wake()
+                return {"status": "ok"}
+            except Exception as e:
+                logger.error(f"Erro ao gravar webhook no inbox, processando em background: {e}", exc_info=True)
+
+        # Sem inbox (desativado ou indisponível): processamento em background no próprio request
         # IMPORTANTE: Não passa a sessão do banco diretamente, cria nova sessão na função
         background_tasks.add_task(process_webhook_background, body, headers_info)
 
@@ -1881,13 +1835,16 @@ async def webhook_handler(request: Request, background_tasks: BackgroundTasks, d
         return {"status": "ok", "message": f"Webhook recebido (erro: {str(e)})"}
 
 
-async def process_webhook_background(body: dict, headers_info: Optional[dict] = None):
+async def process_webhook_background(body: dict, headers_info: Optional[dict] = None, propagar_erros: bool = False):
     """
     Processa webhook em background (após retornar 200 OK)
     Processa messages, statuses e errors conforme documentação 360Dialog
     
     IMPORTANTE: Cria nova sessão do banco aqui, pois background tasks
     não podem usar a sessão da requisição original
+
+    Com `propagar_erros=True` (inbox de webhooks) uma falha geral é relançada
+    para que o webhook volte para a fila; erros por mensagem continuam só logados.
     """
     # Cria nova sessão do banco para background task
     from app.database.db_connection import get_db
@@ -1967,6 +1924,16 @@ async def process_webhook_background(body: dict, headers_info: Optional[dict] =
                                 message_text = button_response.get("title")  # Texto do botão
 
                             if message_text:
+                                # Reentrega do mesmo messages[].id (Meta/360dialog): ignora antes de qualquer
+                                # processamento, para não chamar a IA nem responder de novo. O id só é
+                                # registrado depois que a mensagem foi tratada (falha + retry reprocessa).
+                                empresa_id_dedup = int(empresa_id) if str(empresa_id).isdigit() else None
+                                if mensagem_duplicada(db, message_id):
+                                    import logging
+                                    logger = logging.getLogger(__name__)
+                                    logger.info(f"Mensagem {message_id} já recebida (reentrega do webhook), ignorando")
+                                    continue
+
                                 # Detecta se a mensagem foi enviada pelo HUMANO (WhatsApp Web) vs CLIENTE.
                                 # Alguns provedores enviam mensagens "outgoing" no bloco `messages`.
                                 # Regras (heurísticas):
@@ -2007,6 +1974,7 @@ async def process_webhook_background(body: dict, headers_info: Optional[dict] =
                                             f"⚠️ Webhook recebeu mensagem outgoing (humano), mas não conseguiu identificar cliente. "
                                             f"from={from_number}, to={to_number}, empresa_id={empresa_id}"
                                         )
+                                        registrar_mensagem_processada(db, message_id, empresa_id_dedup)
                                         continue
 
                                     try:
@@ -2117,6 +2085,7 @@ async def process_webhook_background(body: dict, headers_info: Optional[dict] =
                                             exc_info=True,
                                         )
                                     # Não deve cair no fluxo de IA para mensagens enviadas pelo humano
+                                    registrar_mensagem_processada(db, message_id, empresa_id_dedup)
                                     continue
 
                                 # Marca mensagem como lida (conforme documentação 360Dialog)
@@ -2131,6 +2100,7 @@ async def process_webhook_background(body: dict, headers_info: Optional[dict] =
                                 
                                 # Processa a mensagem com a IA (passa o nome do contato, empresa_id, message_id e button_id)
                                 await process_whatsapp_message(db, from_number, message_text, contact_name, empresa_id, message_id, button_id)
+                                registrar_mensagem_processada(db, message_id, empresa_id_dedup)
 
                     # Processa MESSAGE ECHOES (360dialog coexistence) - mensagens OUTGOING que saíram do número da empresa
                     # Esse payload costuma chegar como field="smb_message_echoes" com value.message_echoes[]
@@ -2527,6 +2497,8 @@ async def process_webhook_background(body: dict, headers_info: Optional[dict] =
         import logging
         logger = logging.getLogger(__name__)
         logger.error(f"Erro ao processar webhook em background: {e}", exc_info=True)
+        if propagar_erros:
+            raise
     finally:
         # Fecha a sessão do banco
         db.close()
@@ -2594,34 +2566,18 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
         # VERIFICA SE É MENSAGEM DE ENTREGADOR/MOTOBOY - IGNORA
         # Quando motoboy envia mensagem para o estabelecimento, o chatbot deve ignorar
         try:
+            # `text` é local nesta função e usado mais abaixo; mantém o import aqui
             from sqlalchemy import text
-            # Normaliza o telefone para busca (remove caracteres não numéricos)
-            phone_clean = ''.join(filter(str.isdigit, phone_number))
-            # Tenta diferentes formatos de telefone
-            phone_patterns = [
-                phone_clean,
-                phone_clean[2:] if len(phone_clean) > 11 and phone_clean.startswith('55') else None,  # Remove código do país
-                f"%{phone_clean[-9:]}" if len(phone_clean) >= 9 else None,  # Últimos 9 dígitos
-                f"%{phone_clean[-8:]}" if len(phone_clean) >= 8 else None,  # Últimos 8 dígitos
-            ]
-            phone_patterns = [p for p in phone_patterns if p]
-            
-            for pattern in phone_patterns:
-                entregador_query = text("""
-                    SELECT id, nome, telefone
-                    FROM cadastros.entregadores_dv
-                    WHERE telefone LIKE :pattern
-                    LIMIT 1
-                """)
-                result = db.execute(entregador_query, {"pattern": pattern})
-                entregador = result.fetchone()
-                
-                if entregador:
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.info(f"🚫 Mensagem de entregador ignorada - ID: {entregador[0]}, Nome: {entregador[1]}, Telefone: {entregador[2]}")
-                    # Ignora a mensagem - não processa
-                    return
+            from app.api.cadastros.services.telefones_entregadores import buscar_entregador_por_telefone
+
+            # Telefones dos entregadores ficam em memória (chave: últimos 8 dígitos)
+            entregador = buscar_entregador_por_telefone(phone_number)
+            if entregador:
+                import logging
+                logger = logging.getLogger(__name__)
+                logger.info(f"🚫 Mensagem de entregador ignorada - ID: {entregador.id}, Nome: {entregador.nome}, Telefone: {entregador.telefone}")
+                # Ignora a mensagem - não processa
+                return
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -2809,21 +2765,15 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
         # VERIFICA INTENÇÃO ANTES DO CADASTRO (usando agentes de IA)
         # Se detectar pedido de cardápio, responde direto sem pedir cadastro
         from ..core.intention_agents import IntentionRouter, IntentionType
-        import unicodedata
-        
-        def normalizar_mensagem(texto: str) -> str:
-            """Normaliza mensagem para comparação (lowercase, remove acentos)"""
-            if not texto:
-                return ""
-            texto = texto.lower().strip()
-            # Remove acentos
-            texto = unicodedata.normalize('NFD', texto)
-            texto = ''.join(char for char in texto if unicodedata.category(char) != 'Mn')
-            return texto
-        
-        mensagem_normalizada = normalizar_mensagem(message_text)
-        intention_router = IntentionRouter()
-        intencao = intention_router.detect_intention(message_text, mensagem_normalizada)
+
+        # O IntentEngine normaliza a mensagem (minúsculas, sem acentos) uma única vez;
+        # usa os termos extras da empresa (config em cache por worker)
+        config_intencoes = get_chatbot_config(db, empresa_id_int)
+        intention_router = IntentionRouter(
+            empresa_id=empresa_id_int,
+            palavras_chave=getattr(config_intencoes, "palavras_chave", None),
+        )
+        intencao = intention_router.detect_intention(message_text, message_text)
         
         # Se detectou intenção de ver cardápio, responde direto sem pedir cadastro
         # Verifica tanto pelo enum quanto pela função retornada
@@ -2841,7 +2791,8 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
         try:
             if conversations:
                 conv_id_tmp = conversations[0]["id"]
-                last_msgs = chatbot_db.get_messages(db, conv_id_tmp)
+                # Só as mais recentes: basta achar a última mensagem do assistente
+                last_msgs = chatbot_db.get_messages(db, conv_id_tmp, limit=50)
                 if last_msgs:
                     # pega última mensagem do assistant
                     last_assistant = next((m for m in reversed(last_msgs) if m.get("role") == "assistant"), None)
@@ -2944,8 +2895,7 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
             # Busca configuração do chatbot para usar mensagem personalizada se existir
             config = None
             try:
-                config_repo = ChatbotConfigRepository(db)
-                config = config_repo.get_by_empresa_id(empresa_id_int)
+                config = get_chatbot_config(db, empresa_id_int)
             except Exception as e:
                 import logging
                 logger = logging.getLogger(__name__)
@@ -3160,9 +3110,8 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
                     logger.info(f"[chatbot] Ignorando mensagem duplicada por conteúdo - phone={phone_number}, conversation_id={conversations[0]['id']}, preview={str(message_text)[:120]!r}")
                     return  # Ignora mensagem duplicada
 
-        # CARREGA CONFIGURAÇÃO DO CHATBOT (para separar agentes)
-        repo_config = ChatbotConfigRepository(db)
-        config = repo_config.get_by_empresa_id(empresa_id_int)
+        # CARREGA CONFIGURAÇÃO DO CHATBOT (para separar agentes; snapshot em cache por worker)
+        config = get_chatbot_config(db, empresa_id_int)
         # Se config existe e aceita_pedidos_whatsapp é explicitamente False, então não aceita
         # Caso contrário (config None ou aceita_pedidos_whatsapp True/None), aceita por padrão
         aceita_pedidos_whatsapp = True  # Padrão: aceita pedidos
@@ -3170,6 +3119,9 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
         if config is not None and not config.aceita_pedidos_whatsapp:
             aceita_pedidos_whatsapp = False
 
+        # Intenções da mensagem: uma passada do autômato da empresa (termos padrão + palavras_chave da config)
+        analise_intencoes = analisar_mensagem(message_text, empresa_id_int, getattr(config, "palavras_chave", None))
+
         # Log para debug
         import logging
         logger = logging.getLogger(__name__)
@@ -3560,10 +3512,10 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
         USE_SALES_HANDLER = aceita_pedidos_whatsapp  # Só usa vendas se permitido
 
         # Intenções simples para roteamento rápido
-        is_saudacao = _is_saudacao_intent(message_text)
+        is_saudacao = _is_saudacao_intent(message_text, analise_intencoes)
 
         # Prioridade: "chamar atendente" deve ser tratado mesmo com pedidos via WhatsApp desativados
-        if _is_chamar_atendente_intent(message_text, button_id):
+        if _is_chamar_atendente_intent(message_text, button_id, analise_intencoes):
             await _enviar_notificacao_empresa(
                 db=db,
                 empresa_id=empresa_id,
@@ -3629,16 +3581,9 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
             return
 
         # Se não aceita pedidos pelo WhatsApp, intercepta tentativas de pedido
-        is_pedido_intent = _is_pedido_intent(message_text)
+        is_pedido_intent = _is_pedido_intent(message_text, analise_intencoes)
         # Detecta intenção de "atualizações" para evitar redirecionar automaticamente
-        try:
-            import unicodedata
-            mensagem_norm = (message_text or "")
-            mensagem_norm = "".join(c for c in unicodedata.normalize("NFKD", mensagem_norm) if not unicodedata.combining(c)).lower()
-        except Exception:
-            mensagem_norm = (message_text or "").lower()
-
-        skip_update_intent = any(k in mensagem_norm for k in ["atualiz", "tualiz", "acompanhar", "status", "receber atualiz"])
+        skip_update_intent = analise_intencoes.tem("atualizacoes")
 
         if not aceita_pedidos_whatsapp and (button_id == "pedir_whatsapp" or (is_pedido_intent and not skip_update_intent)):
             import logging
@@ -4193,7 +4138,7 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
         # 2.4. Prioridade absoluta: chamar atendente (não deve cair em redirecionamento/IA)
         # Nota: aqui a mensagem do usuário JÁ foi salva acima, então NÃO podemos reutilizar
         # `_send_whatsapp_and_log` (ele salvaria a mensagem do usuário de novo e pode gerar duplicata).
-        if _is_chamar_atendente_intent(message_text, button_id):
+        if _is_chamar_atendente_intent(message_text, button_id, analise_intencoes):
             await _enviar_notificacao_empresa(
                 db=db,
                 empresa_id=empresa_id,
@@ -4248,7 +4193,7 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
 
         # 2.5. VERIFICA SE NÃO ACEITA PEDIDOS E INTERCEPTA TENTATIVAS DE PEDIDO
         # (mesma verificação do fluxo principal para garantir consistência)
-        is_pedido_intent = _is_pedido_intent(message_text)
+        is_pedido_intent = _is_pedido_intent(message_text, analise_intencoes)
         if not aceita_pedidos_whatsapp and (button_id == "pedir_whatsapp" or is_pedido_intent):
             import logging
             logger = logging.getLogger(__name__)
@@ -4417,8 +4362,7 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
                     if created_cliente:
                         # Reuse existing config retrieval if available; fallback to DB lookup
                         try:
-                            config_repo = ChatbotConfigRepository(db)
-                            config = config_repo.get_by_empresa_id(empresa_id_int)
+                            config = get_chatbot_config(db, empresa_id_int)
                         except Exception:
                             config = None
                         resposta_cardapio = _montar_mensagem_redirecionamento(db, empresa_id_int, config)
@@ -4457,22 +4401,17 @@ async def process_whatsapp_message(db: Session, phone_number: str, message_text:
                         if role in ("user", "assistant") and content:
                             messages.append({"role": role, "content": content})
 
-                    async with httpx.AsyncClient(timeout=60.0) as client:
-                        payload = {
-                            "model": DEFAULT_MODEL or MODEL_NAME,
-                            "messages": messages,
-                            "stream": False,
-                            "temperature": 0.2,
-                            "top_p": 0.9,
-                        }
-                        headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
-                        response = await client.post(GROQ_API_URL, json=payload, headers=headers)
-                        if response.status_code != 200:
-                            raise HTTPException(status_code=response.status_code, detail=f"Erro na Groq: {response.text}")
-                        result = response.json()
-                        ai_response = result["choices"][0]["message"]["content"]
+                    # Cliente compartilhado: keep-alive, limite de concorrência por empresa e circuit breaker
+                    result = await llm_client.chat(
+                        messages,
+                        model=DEFAULT_MODEL or MODEL_NAME,
+                        temperature=0.2,
+                        empresa_id=empresa_id_int,
+                        top_p=0.9,
+                    )
+                    ai_response = result["choices"][0]["message"]["content"]
                 except Exception:
-                    # Falhou LLM: fallback para redirecionamento (modo seguro)
+                    # Falhou LLM (ou circuito aberto): fallback para redirecionamento (modo seguro)
                     ai_response = _montar_mensagem_redirecionamento(db, empresa_id_int, config)
 
             if not ai_response or not str(ai_response).strip():
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, Field
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -10,6 +10,9 @@ class ChatbotConfigBase(BaseModel):
     aceita_pedidos_whatsapp: bool = Field(True, description="Se aceita fazer pedidos pelo WhatsApp")
     mensagem_boas_vindas: Optional[str] = Field(None, description="Mensagem de boas-vindas personalizada")
     mensagem_redirecionamento: Optional[str] = Field(None, description="Mensagem quando redireciona para link")
+    palavras_chave: Optional[Dict[str, List[str]]] = Field(
+        None, description="Termos extras por intenção (ex: {\"pedido\": [\"encomendar\"]}), somados aos padrões"
+    )
     ativo: bool = Field(True, description="Se a configuração está ativa")
 
 
@@ -25,6 +28,7 @@ class ChatbotConfigUpdate(BaseModel):
     aceita_pedidos_whatsapp: Optional[bool] = None
     mensagem_boas_vindas: Optional[str] = None
     mensagem_redirecionamento: Optional[str] = None
+    palavras_chave: Optional[Dict[str, List[str]]] = None
     ativo: Optional[bool] = None
 
 
@@ -37,6 +41,7 @@ class ChatbotConfigResponse(BaseModel):
     aceita_pedidos_whatsapp: bool
     mensagem_boas_vindas: Optional[str] = None
     mensagem_redirecionamento: Optional[str] = None
+    palavras_chave: Optional[Dict[str, List[str]]] = None
     ativo: bool
     created_at: datetime
     updated_at: datetime
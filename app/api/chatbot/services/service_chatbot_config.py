@@ -50,6 +50,7 @@ class ChatbotConfigService:
             aceita_pedidos_whatsapp=data.aceita_pedidos_whatsapp,
             mensagem_boas_vindas=data.mensagem_boas_vindas,
             mensagem_redirecionamento=data.mensagem_redirecionamento,
+            palavras_chave=data.palavras_chave,
             ativo=data.ativo
         )
         
@@ -152,6 +153,7 @@ class ChatbotConfigService:
             aceita_pedidos_whatsapp=config.aceita_pedidos_whatsapp,
             mensagem_boas_vindas=config.mensagem_boas_vindas,
             mensagem_redirecionamento=config.mensagem_redirecionamento,
+            palavras_chave=config.palavras_chave,
             ativo=config.ativo,
             created_at=config.created_at,
             updated_at=config.updated_at,
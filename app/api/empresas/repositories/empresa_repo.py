@@ -1,11 +1,24 @@
 # app/api/empresas/repositories/empresa_repo.py
-from typing import Optional, List
+import math
+from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, text
+
+from app.utils.logger import logger
 
 from app.api.empresas.models.empresa_model import EmpresaModel
 
 
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância em linha reta (km) entre dois pontos."""
+    r = 6371.0088
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
+
+
 class EmpresaRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -69,6 +82,103 @@ class EmpresaRepository:
             .all()
         )
 
+    def list_candidatas_entrega(
+        self,
+        latitude: float,
+        longitude: float,
+    ) -> List[Tuple[EmpresaModel, Optional[float], Optional[float], bool]]:
+        """
+        Lista empresas com faixa de entrega ativa, ordenadas pela distância em linha reta
+        até (latitude, longitude), em uma única consulta (PostGIS).
+
+        Retorna tuplas (empresa, distancia_linha_km, raio_max_km, tem_faixa_inicial):
+        - distancia_linha_km: None quando a empresa não tem coordenadas salvas (vão para o fim).
+        - raio_max_km: maior `distancia_max_km` ativa; None quando alguma faixa é ilimitada.
+        - tem_faixa_inicial: há faixa ativa que cobre 0 km (mesmo critério de
+          `TaxaService.verificar_regioes_cadastradas`).
+
+        Sem PostGIS, cai para haversine em Python com os mesmos critérios.
+        """
+        sql = text(
+            """
+            SELECT e.id,
+                   CASE
+                     WHEN e.latitude IS NULL OR e.longitude IS NULL THEN NULL
+                     ELSE ST_Distance(
+                       ST_SetSRID(ST_MakePoint(e.longitude::float8, e.latitude::float8), 4326)::geography,
+                       ST_SetSRID(ST_MakePoint(:lng, :lat), 4326)::geography
+                     ) / 1000.0
+                   END AS distancia_linha_km,
+                   r.raio_max_km,
+                   r.tem_faixa_inicial
+            FROM cadastros.empresas e
+            JOIN (
+              SELECT empresa_id,
+                     CASE WHEN bool_or(distancia_max_km IS NULL) THEN NULL
+                          ELSE MAX(distancia_max_km)::float8 END AS raio_max_km,
+                     COALESCE(bool_or(
+                       distancia_min_km <= 0 AND (distancia_max_km IS NULL OR distancia_max_km >= 0)
+                     ), false) AS tem_faixa_inicial
+              FROM cadastros.regioes_entrega
+              WHERE ativo
+              GROUP BY empresa_id
+            ) r ON r.empresa_id = e.id
+            ORDER BY distancia_linha_km ASC NULLS LAST, e.id ASC
+            """
+        )
+        try:
+            with self.db.begin_nested():
+                rows = self.db.execute(sql, {"lat": float(latitude), "lng": float(longitude)}).all()
+        except Exception as e:
+            logger.warning("[EmpresaRepository] Pré-filtro PostGIS indisponível, usando haversine: %s", e)
+            return self._list_candidatas_entrega_haversine(latitude, longitude)
+
+        empresas = {emp.id: emp for emp in self.list_by_ids([row.id for row in rows])}
+        return [
+            (empresas[row.id], row.distancia_linha_km, row.raio_max_km, bool(row.tem_faixa_inicial))
+            for row in rows
+            if row.id in empresas
+        ]
+
+    def _list_candidatas_entrega_haversine(
+        self,
+        latitude: float,
+        longitude: float,
+    ) -> List[Tuple[EmpresaModel, Optional[float], Optional[float], bool]]:
+        from app.api.cadastros.models.model_regiao_entrega import RegiaoEntregaModel
+
+        raios: dict[int, Optional[float]] = {}
+        faixa_inicial: set[int] = set()
+        for empresa_id, dist_min, dist_max in (
+            self.db.query(
+                RegiaoEntregaModel.empresa_id,
+                RegiaoEntregaModel.distancia_min_km,
+                RegiaoEntregaModel.distancia_max_km,
+            )
+            .filter(RegiaoEntregaModel.ativo.is_(True))
+            .all()
+        ):
+            if dist_min is not None and dist_min <= 0 and (dist_max is None or dist_max >= 0):
+                faixa_inicial.add(empresa_id)
+            if empresa_id in raios and raios[empresa_id] is None:
+                continue
+            if dist_max is None:
+                raios[empresa_id] = None
+            else:
+                raios[empresa_id] = max(float(dist_max), raios.get(empresa_id) or 0.0)
+
+        candidatas = []
+        for empresa in self.list_by_ids(list(raios.keys())):
+            distancia = None
+            if empresa.latitude is not None and empresa.longitude is not None:
+                distancia = haversine_km(
+                    float(empresa.latitude), float(empresa.longitude), float(latitude), float(longitude)
+                )
+            candidatas.append((empresa, distancia, raios[empresa.id], empresa.id in faixa_inicial))
+
+        candidatas.sort(key=lambda c: (c[1] is None, c[1] or 0.0, c[0].id))
+        return candidatas
+
     def create(self, empresa: EmpresaModel) -> EmpresaModel:
         self.db.add(empresa)
         self.db.commit()
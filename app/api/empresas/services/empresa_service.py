@@ -343,6 +343,10 @@ class EmpresaService:
                 )
             # outros erros de integridade
             raise HTTPException(status_code=400, detail=f"Erro de integridade: {error_str}")
+
+        # O chatbot guarda em cache a config (aceita pedidos) e o link do cardápio da empresa
+        from app.api.chatbot.core.infrastructure.config_cache import invalidate_chatbot_config_cache
+        invalidate_chatbot_config_cache()
         
         # Verifica e configura bucket MinIO após edição
         try:
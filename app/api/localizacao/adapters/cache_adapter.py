@@ -1,35 +1,60 @@
-from typing import Optional, Dict, Tuple
+from collections import OrderedDict
+from typing import Optional, Tuple, Any
 from threading import Lock
-from app.api.localizacao.models.coordenadas import Coordenadas
+from time import monotonic
 
 
 class CacheAdapter:
-    """Adapter para cache de coordenadas em memória."""
-    
-    def __init__(self):
-        self._cache_coordenadas: Dict[str, Tuple[float, float]] = {}
+    """
+    Adapter para cache em memória (LRU limitado com TTL).
+
+    - `max_itens`: ao exceder, remove a entrada usada há mais tempo.
+    - `ttl_segundos`: entradas mais antigas que isso são descartadas na leitura.
+      Use None para não expirar.
+    """
+
+    def __init__(self, max_itens: int = 5000, ttl_segundos: Optional[float] = 3600.0):
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._max_itens = max(1, int(max_itens))
+        self._ttl = ttl_segundos
         self._lock = Lock()
-    
-    def get(self, key: str) -> Optional[Tuple[float, float]]:
-        """Obtém coordenadas do cache."""
+
+    def _expirado(self, criado_em: float) -> bool:
+        return self._ttl is not None and (monotonic() - criado_em) > self._ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtém valor do cache (None se ausente ou expirado)."""
         with self._lock:
-            return self._cache_coordenadas.get(key)
-    
-    def set(self, key: str, coordenadas: Tuple[float, float]):
-        """Armazena coordenadas no cache."""
+            item = self._cache.get(key)
+            if item is None:
+                return None
+            criado_em, valor = item
+            if self._expirado(criado_em):
+                self._cache.pop(key, None)
+                return None
+            self._cache.move_to_end(key)
+            return valor
+
+    def set(self, key: str, valor: Any):
+        """Armazena valor no cache, removendo a entrada menos recente se necessário."""
         with self._lock:
-            self._cache_coordenadas[key] = coordenadas
-    
+            self._cache[key] = (monotonic(), valor)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_itens:
+                self._cache.popitem(last=False)
+
     def clear(self, key: Optional[str] = None):
         """Limpa o cache. Se key for fornecido, remove apenas essa entrada."""
         with self._lock:
             if key:
-                self._cache_coordenadas.pop(key, None)
+                self._cache.pop(key, None)
             else:
-                self._cache_coordenadas.clear()
-    
+                self._cache.clear()
+
     def has(self, key: str) -> bool:
-        """Verifica se existe no cache."""
-        with self._lock:
-            return key in self._cache_coordenadas
+        """Verifica se existe no cache (e não expirou)."""
+        return self.get(key) is not None
 
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
@@ -0,0 +1,150 @@
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.localizacao.adapters.cache_adapter import CacheAdapter
+from app.api.localizacao.models.model_geo_cache import GeoCacheModel
+from app.config import settings
+from app.database.db_connection import SessionLocal
+from app.utils.logger import logger
+from app.utils.prometheus_metrics import geo_cache_requests_total
+
+
+# Casas decimais usadas nas chaves de coordenadas (5 casas ≈ 1 metro)
+CASAS_DECIMAIS_COORDENADA = 5
+
+
+def normalizar_endereco(endereco: str) -> str:
+    """Normaliza um endereço para uso como chave (minúsculas, sem acentos/pontuação extra)."""
+    texto = unicodedata.normalize("NFKD", endereco or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    texto = re.sub(r"[^\w\s-]", " ", texto)
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def _coord(lat: float, lng: float) -> str:
+    return f"{round(float(lat), CASAS_DECIMAIS_COORDENADA)},{round(float(lng), CASAS_DECIMAIS_COORDENADA)}"
+
+
+class GeoCacheAdapter:
+    """
+    Cache em dois níveis para resultados do Google Maps.
+
+    1) Memória do processo (`CacheAdapter`, LRU com TTL) — evita ida ao banco.
+    2) Tabela `cadastros.geo_cache` — compartilhada entre workers/instâncias.
+
+    Falhas no banco nunca propagam: o cache apenas deixa de ajudar.
+    """
+
+    def __init__(
+        self,
+        memoria: Optional[CacheAdapter] = None,
+        session_factory=SessionLocal,
+        ttl_banco: Optional[timedelta] = None,
+    ):
+        self.memoria = memoria or CacheAdapter(
+            max_itens=settings.GEO_CACHE_MAX_ITENS,
+            ttl_segundos=settings.GEO_CACHE_TTL_SEGUNDOS,
+        )
+        self._session_factory = session_factory
+        self._ttl_banco = ttl_banco or timedelta(days=settings.GEO_CACHE_DB_TTL_DIAS)
+
+    # ------------------------------------------------------------------
+    # Chaves
+    # ------------------------------------------------------------------
+    @staticmethod
+    def chave_geocode(endereco: str) -> str:
+        return f"geocode:{normalizar_endereco(endereco)}"
+
+    @staticmethod
+    def chave_reverso(latitude: float, longitude: float) -> str:
+        return f"reverso:{_coord(latitude, longitude)}"
+
+    @staticmethod
+    def chave_distancia(origem: Tuple[float, float], destino: Tuple[float, float], mode: str) -> str:
+        return f"distancia:{mode}:{_coord(*origem)}:{_coord(*destino)}"
+
+    # ------------------------------------------------------------------
+    # Leitura / escrita
+    # ------------------------------------------------------------------
+    def get(self, tipo: str, chave: str) -> Optional[Any]:
+        valor = self.memoria.get(chave)
+        if valor is not None:
+            geo_cache_requests_total.labels(tipo=tipo, resultado="hit_memoria").inc()
+            return valor
+
+        valor = self._get_banco(chave)
+        if valor is not None:
+            geo_cache_requests_total.labels(tipo=tipo, resultado="hit_banco").inc()
+            self.memoria.set(chave, valor)
+            return valor
+
+        geo_cache_requests_total.labels(tipo=tipo, resultado="miss").inc()
+        return None
+
+    def set(self, tipo: str, chave: str, valor: Any) -> None:
+        if valor is None:
+            return
+        self.memoria.set(chave, valor)
+        self._set_banco(tipo, chave, valor)
+
+    def limpar_memoria(self) -> None:
+        self.memoria.clear()
+
+    def _get_banco(self, chave: str) -> Optional[Any]:
+        try:
+            with self._session_factory() as session:
+                row = (
+                    session.query(GeoCacheModel.valor)
+                    .filter(
+                        GeoCacheModel.chave == chave,
+                        GeoCacheModel.expira_em > datetime.utcnow(),
+                    )
+                    .first()
+                )
+                return row[0] if row else None
+        except Exception as e:
+            logger.warning(f"[GeoCacheAdapter] Falha ao ler cache persistente ({chave}): {e}")
+            return None
+
+    def _set_banco(self, tipo: str, chave: str, valor: Any) -> None:
+        agora = datetime.utcnow()
+        try:
+            with self._session_factory() as session:
+                stmt = insert(GeoCacheModel).values(
+                    chave=chave,
+                    tipo=tipo,
+                    valor=valor,
+                    created_at=agora,
+                    expira_em=agora + self._ttl_banco,
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[GeoCacheModel.chave],
+                    set_={
+                        "valor": stmt.excluded.valor,
+                        "created_at": stmt.excluded.created_at,
+                        "expira_em": stmt.excluded.expira_em,
+                    },
+                )
+                session.execute(stmt)
+                session.commit()
+        except Exception as e:
+            logger.warning(f"[GeoCacheAdapter] Falha ao gravar cache persistente ({chave}): {e}")
+
+
+_geo_cache: Optional[GeoCacheAdapter] = None
+_geo_cache_lock = Lock()
+
+
+def get_geo_cache() -> GeoCacheAdapter:
+    """Retorna o cache de geolocalização compartilhado pelo processo."""
+    global _geo_cache
+    if _geo_cache is None:
+        with _geo_cache_lock:
+            if _geo_cache is None:
+                _geo_cache = GeoCacheAdapter()
+    return _geo_cache
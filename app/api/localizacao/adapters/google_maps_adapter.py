@@ -2,6 +2,7 @@ from typing import Optional, Tuple, List, Dict
 import httpx
 from app.config import settings
 from app.utils.logger import logger
+from app.api.localizacao.adapters.geo_cache_adapter import GeoCacheAdapter, get_geo_cache
 
 
 class GoogleMapsAdapter:
@@ -13,12 +14,16 @@ class GoogleMapsAdapter:
     PLACES_AUTOCOMPLETE_URL = "https://maps.googleapis.com/maps/api/place/autocomplete/json"
     PLACE_DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[GeoCacheAdapter] = None):
         self.api_key = api_key or settings.GOOGLE_MAPS_API_KEY
+        # Cache compartilhado (memória + banco) entre instâncias e workers
+        self.cache = cache or get_geo_cache()
     
     def resolver_coordenadas(self, endereco: str) -> Optional[Tuple[float, float]]:
         """
         Resolve coordenadas latitude/longitude para um endereço usando Google Maps Geocoding API.
+
+        Resultados são reaproveitados via cache (chave = endereço normalizado).
         
         Args:
             endereco: Endereço em formato texto
@@ -26,6 +31,18 @@ class GoogleMapsAdapter:
         Returns:
             Tupla (latitude, longitude) ou None se não encontrar
         """
+        chave = self.cache.chave_geocode(endereco)
+        cached = self.cache.get("geocode", chave)
+        if cached is not None:
+            return cached[0], cached[1]
+
+        coords = self._resolver_coordenadas_api(endereco)
+        if coords is not None and all(c is not None for c in coords):
+            self.cache.set("geocode", chave, [coords[0], coords[1]])
+        return coords
+
+    def _resolver_coordenadas_api(self, endereco: str) -> Optional[Tuple[float, float]]:
+        """Consulta a Geocoding API (sem cache)."""
         if not self.api_key:
             logger.warning("[GoogleMapsAdapter] API key não configurada")
             return None
@@ -126,15 +143,34 @@ class GoogleMapsAdapter:
         Returns:
             Distância em km ou None se não conseguir calcular
         """
-        if not self.api_key:
-            logger.warning("[GoogleMapsAdapter] API key não configurada")
-            return None
-            
         lat1, lon1 = origem
         lat2, lon2 = destino
         if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
             return None
 
+        chave = self.cache.chave_distancia(origem, destino, mode)
+        cached = self.cache.get("distancia", chave)
+        if cached is not None:
+            return float(cached)
+
+        distancia = self._calcular_distancia_km_api(origem, destino, mode=mode)
+        if distancia is not None:
+            self.cache.set("distancia", chave, distancia)
+        return distancia
+
+    def _calcular_distancia_km_api(
+        self,
+        origem: Tuple[float, float],
+        destino: Tuple[float, float],
+        mode: str = "driving"
+    ) -> Optional[float]:
+        """Consulta Directions/Distance Matrix (sem cache)."""
+        if not self.api_key:
+            logger.warning("[GoogleMapsAdapter] API key não configurada")
+            return None
+
+        lat1, lon1 = origem
+        lat2, lon2 = destino
         origins = f"{lat1},{lon1}"
         destinations = f"{lat2},{lon2}"
 
@@ -529,6 +565,18 @@ class GoogleMapsAdapter:
         Returns:
             Dicionário com informações do endereço ou None se não encontrar
         """
+        chave = self.cache.chave_reverso(latitude, longitude)
+        cached = self.cache.get("reverso", chave)
+        if cached is not None:
+            return dict(cached)
+
+        endereco_info = self._geocodificar_reversa_api(latitude, longitude)
+        if endereco_info is not None:
+            self.cache.set("reverso", chave, endereco_info)
+        return endereco_info
+
+    def _geocodificar_reversa_api(self, latitude: float, longitude: float) -> Optional[Dict]:
+        """Consulta a Geocoding API reversa (sem cache)."""
         if not self.api_key:
             logger.warning("[GoogleMapsAdapter] API key não configurada")
             return None
@@ -0,0 +1,28 @@
+# app/api/localizacao/models/model_geo_cache.py
+from sqlalchemy import Column, String, DateTime, JSON, Index
+from datetime import datetime
+
+from app.database.db_connection import Base
+
+
+class GeoCacheModel(Base):
+    """
+    Cache persistente (compartilhado entre workers) de resultados do Google Maps.
+
+    `chave` já vem normalizada pelo `GeoCacheAdapter`:
+    - geocode:<endereço normalizado>
+    - reverso:<lat>,<lng> (arredondados)
+    - distancia:<modo>:<lat1>,<lng1>:<lat2>,<lng2> (arredondados)
+    """
+    __tablename__ = "geo_cache"
+    __table_args__ = (
+        Index("ix_geo_cache_expira_em", "expira_em"),
+        {"schema": "cadastros"},
+    )
+
+    chave = Column(String(512), primary_key=True)
+    tipo = Column(String(20), nullable=False)
+    valor = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expira_em = Column(DateTime, nullable=False)
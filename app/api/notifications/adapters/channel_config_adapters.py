@@ -5,6 +5,7 @@ import logging
 from sqlalchemy.orm import Session
 
 from ..contracts.channel_config_provider_contract import IChannelConfigProvider
+from ..core.whatsapp_config_cache import get_active_whatsapp_config
 from ..models.notification import NotificationChannel
 from ..repositories.whatsapp_config_repository import WhatsAppConfigRepository
 
@@ -112,26 +113,27 @@ class DatabaseChannelConfigAdapter(IChannelConfigProvider):
         logger.debug(f"Buscando configuração de canal {channel} para empresa {empresa_id}")
 
         if channel == NotificationChannel.WHATSAPP:
-            config = self.whatsapp_repo.get_active_by_empresa(empresa_id)
+            # Cache por worker (invalidado quando a configuração é salva)
+            config = get_active_whatsapp_config(empresa_id)
             if not config:
                 return None
 
             return {
-                "access_token": config.access_token,
-                "phone_number_id": config.phone_number_id,
-                "business_account_id": config.business_account_id,
-                "api_version": config.api_version,
-                "send_mode": config.send_mode,
-                "coexistence_enabled": config.coexistence_enabled,
-                "display_phone_number": config.display_phone_number,
-                "name": config.name,
-                    "base_url": config.base_url or "https://waba-v2.360dialog.io",
-                    "provider": config.provider or "360dialog",
-                    "webhook_url": config.webhook_url,
-                    "webhook_verify_token": config.webhook_verify_token,
-                    "webhook_is_active": config.webhook_is_active,
-                    "webhook_status": config.webhook_status,
-                    "webhook_last_sync": config.webhook_last_sync,
+                "access_token": config["access_token"],
+                "phone_number_id": config["phone_number_id"],
+                "business_account_id": config["business_account_id"],
+                "api_version": config["api_version"],
+                "send_mode": config["send_mode"],
+                "coexistence_enabled": config["coexistence_enabled"],
+                "display_phone_number": config["display_phone_number"],
+                "name": config["name"],
+                "base_url": config["base_url"] or "https://waba-v2.360dialog.io",
+                "provider": config["provider"] or "360dialog",
+                "webhook_url": config["webhook_url"],
+                "webhook_verify_token": config["webhook_verify_token"],
+                "webhook_is_active": config["webhook_is_active"],
+                "webhook_status": config["webhook_status"],
+                "webhook_last_sync": config["webhook_last_sync"],
             }
 
         return None
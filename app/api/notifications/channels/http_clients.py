@@ -0,0 +1,117 @@
+"""
+Clientes HTTP compartilhados pelos canais de notificação.
+
+Criar um `httpx.AsyncClient`/`aiohttp.ClientSession` por envio obriga um novo
+handshake TLS a cada mensagem. Aqui cada canal tem um cliente de longa duração
+por event loop, com pool de conexões keep-alive (e HTTP/2 no httpx quando o
+pacote `h2` está instalado). Os clientes são fechados no shutdown do sistema de
+notificações (`close_http_clients`).
+
+Serviços síncronos também enviam notificações via `asyncio.run` em threads; cada
+uma dessas execuções é um loop temporário. Para não vazar os clientes desses loops,
+o primeiro cliente criado num loop inicia uma task de encerramento que fica pendente
+até o fim do loop: `asyncio.run` cancela as tasks pendentes antes de fechar o loop,
+e o cancelamento fecha os clientes.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from typing import Any, Dict
+
+import aiohttp
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# event loop -> {nome do canal: cliente}; clientes ficam presos ao loop em que foram criados
+_clientes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+# event loop -> task que fecha os clientes do loop quando ele é encerrado
+_encerramento: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = weakref.WeakKeyDictionary()
+
+
+def _http2_disponivel() -> bool:
+    if not settings.NOTIFICATION_HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _do_loop() -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    clientes = _clientes.get(loop)
+    if clientes is None:
+        clientes = {}
+        _clientes[loop] = clientes
+        if loop not in _encerramento:
+            _encerramento[loop] = loop.create_task(_fechar_ao_encerrar_loop())
+    return clientes
+
+
+async def _fechar_ao_encerrar_loop() -> None:
+    """Fica pendente até o loop ser encerrado; o cancelamento (fim do `asyncio.run`) fecha os clientes."""
+    try:
+        await asyncio.Future()
+    finally:
+        await close_http_clients()
+
+
+def get_httpx_client(nome: str, timeout: float = 30.0) -> httpx.AsyncClient:
+    """Cliente httpx compartilhado do canal `nome` (não use `async with`: ele não deve ser fechado)."""
+    clientes = _do_loop()
+    chave = f"httpx:{nome}"
+    client = clientes.get(chave)
+    if client is None or client.is_closed:
+        http2 = _http2_disponivel()
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.NOTIFICATION_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.NOTIFICATION_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.NOTIFICATION_HTTP_KEEPALIVE_SEGUNDOS,
+            ),
+        )
+        clientes[chave] = client
+        logger.info(f"[HTTP_CLIENTS] Cliente httpx criado para '{nome}' (http2={http2})")
+    return client
+
+
+def get_aiohttp_session(nome: str) -> aiohttp.ClientSession:
+    """Sessão aiohttp compartilhada do canal `nome` (não use `async with` na sessão)."""
+    clientes = _do_loop()
+    chave = f"aiohttp:{nome}"
+    session = clientes.get(chave)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=settings.NOTIFICATION_HTTP_MAX_CONNECTIONS,
+                keepalive_timeout=settings.NOTIFICATION_HTTP_KEEPALIVE_SEGUNDOS,
+            )
+        )
+        clientes[chave] = session
+        logger.info(f"[HTTP_CLIENTS] Sessão aiohttp criada para '{nome}'")
+    return session
+
+
+async def close_http_clients() -> None:
+    """Fecha os clientes criados no event loop atual."""
+    loop = asyncio.get_running_loop()
+    tarefa = _encerramento.pop(loop, None)
+    if tarefa is not None and tarefa is not asyncio.current_task():
+        tarefa.cancel()
+    clientes = _clientes.pop(loop, None) or {}
+    for chave, client in clientes.items():
+        try:
+            if isinstance(client, httpx.AsyncClient):
+                await client.aclose()
+            else:
+                await client.close()
+        except Exception as e:
+            logger.warning(f"[HTTP_CLIENTS] Erro ao fechar cliente {chave}: {e}")
@@ -3,6 +3,7 @@ import json
 from typing import Dict, Any, Optional
 import logging
 from .base_channel import BaseNotificationChannel, NotificationResult
+from .http_clients import get_aiohttp_session
 
 logger = logging.getLogger(__name__)
 
@@ -53,30 +54,30 @@ class PushChannel(BaseNotificationChannel):
             }
             
             # Envia a notificação
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.fcm_url,
-                    json=notification_payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status == 200:
-                        response_data = await response.json()
-                        message_id = response_data.get('message_id')
-                        self._log_success(recipient, message_id)
-                        return self._create_success_result(
-                            "Notificação push enviada com sucesso",
-                            external_id=message_id
-                        )
-                    else:
-                        error_data = await response.json()
-                        error_msg = f"Erro ao enviar push: {error_data.get('error', 'Erro desconhecido')}"
-                        self._log_error(recipient, error_msg, error_data)
-                        return self._create_error_result(error_msg, {
-                            "status_code": response.status,
-                            "fcm_error": error_data
-                        })
-                        
+            session = get_aiohttp_session("push")
+            async with session.post(
+                self.fcm_url,
+                json=notification_payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status == 200:
+                    response_data = await response.json()
+                    message_id = response_data.get('message_id')
+                    self._log_success(recipient, message_id)
+                    return self._create_success_result(
+                        "Notificação push enviada com sucesso",
+                        external_id=message_id
+                    )
+                else:
+                    error_data = await response.json()
+                    error_msg = f"Erro ao enviar push: {error_data.get('error', 'Erro desconhecido')}"
+                    self._log_error(recipient, error_msg, error_data)
+                    return self._create_error_result(error_msg, {
+                        "status_code": response.status,
+                        "fcm_error": error_data
+                    })
+                    
         except Exception as e:
             error_msg = f"Erro ao enviar push: {str(e)}"
             self._log_error(recipient, error_msg)
@@ -3,6 +3,7 @@ import json
 from typing import Dict, Any, Optional
 import logging
 from .base_channel import BaseNotificationChannel, NotificationResult
+from .http_clients import get_aiohttp_session
 
 logger = logging.getLogger(__name__)
 
@@ -62,29 +63,29 @@ class WebhookChannel(BaseNotificationChannel):
                 headers["Authorization"] = f"Basic {credentials}"
             
             # Envia o webhook
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    recipient,
-                    json=webhook_data,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as response:
-                    if response.status >= 200 and response.status < 300:
-                        response_data = await response.json() if response.content_type == 'application/json' else None
-                        self._log_success(recipient, f"Status: {response.status}")
-                        return self._create_success_result(
-                            f"Webhook enviado com sucesso (Status: {response.status})",
-                            external_id=response_data.get('id') if response_data else None
-                        )
-                    else:
-                        error_msg = f"Webhook retornou status {response.status}"
-                        response_text = await response.text()
-                        self._log_error(recipient, error_msg, {"response": response_text})
-                        return self._create_error_result(error_msg, {
-                            "status_code": response.status,
-                            "response": response_text
-                        })
-                        
+            session = get_aiohttp_session("webhook")
+            async with session.post(
+                recipient,
+                json=webhook_data,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status >= 200 and response.status < 300:
+                    response_data = await response.json() if response.content_type == 'application/json' else None
+                    self._log_success(recipient, f"Status: {response.status}")
+                    return self._create_success_result(
+                        f"Webhook enviado com sucesso (Status: {response.status})",
+                        external_id=response_data.get('id') if response_data else None
+                    )
+                else:
+                    error_msg = f"Webhook retornou status {response.status}"
+                    response_text = await response.text()
+                    self._log_error(recipient, error_msg, {"response": response_text})
+                    return self._create_error_result(error_msg, {
+                        "status_code": response.status,
+                        "response": response_text
+                    })
+                    
         except aiohttp.ClientTimeout:
             error_msg = f"Timeout ao enviar webhook para {recipient}"
             self._log_error(recipient, error_msg)
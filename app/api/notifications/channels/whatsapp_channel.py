@@ -1,7 +1,7 @@
-import httpx
 from typing import Dict, Any, Optional
 import logging
 from .base_channel import BaseNotificationChannel, NotificationResult
+from .http_clients import get_httpx_client
 from ..services.notification_message_contract_default import DefaultNotificationMessageContract
 
 logger = logging.getLogger(__name__)
@@ -78,7 +78,7 @@ class WhatsAppChannel(BaseNotificationChannel):
         try:
             # Formata o número para o padrão WhatsApp
             phone_formatted = self._format_phone_number(recipient)
-            from app.utils.telefone import variantes_telefone_para_envio_whatsapp
+            from ..core.whatsapp_phone_variants import registrar_variante_aceita_async, variantes_envio_whatsapp_async
 
             # Contract de mensagem: permite template (necessário sem interação/janela 24h)
             contract = DefaultNotificationMessageContract()
@@ -93,51 +93,61 @@ class WhatsAppChannel(BaseNotificationChannel):
             # Headers com token de autorização
             headers = self._get_headers()
             
+            # 360dialog: começa pela variante de telefone já aceita antes para este cliente
+            candidates = []
+            if self.is_360 and isinstance(payload, dict):
+                candidates = await variantes_envio_whatsapp_async(phone_formatted or recipient)
+                if candidates:
+                    payload = dict(payload)
+                    payload["to"] = candidates[0]
+            phone_used = payload.get("to") if isinstance(payload, dict) else phone_formatted
+
             # Envia a mensagem (com fallback de variantes para 360dialog quando rejeitar o 'to')
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.api_url, json=payload, headers=headers)
+            # Cliente compartilhado (keep-alive/HTTP2): evita handshake TLS a cada envio
+            client = get_httpx_client("whatsapp")
+            response = await client.post(self.api_url, json=payload, headers=headers)
+
+            # 360dialog pode rejeitar o telefone dependendo do formato (com/sem 55 e/ou 9).
+            # Se for erro 400, tentamos variantes antes de desistir.
+            if self.is_360 and response.status_code == 400:
+                try:
+                    # O primeiro candidato já foi tentado. Vamos tentar os demais.
+                    for cand in candidates[1:]:
+                        payload_try = dict(payload)
+                        payload_try["to"] = cand
+                        response = await client.post(self.api_url, json=payload_try, headers=headers)
+                        phone_used = cand
+                        if response.status_code == 200:
+                            break
+                        if response.status_code != 400:
+                            break
+                except Exception:
+                    # fallback silencioso: mantém o response original
+                    pass
 
-                # 360dialog pode rejeitar o telefone dependendo do formato (com/sem 55 e/ou 9).
-                # Se for erro 400, tentamos variantes antes de desistir.
-                if self.is_360 and response.status_code == 400:
-                    try:
-                        candidates = variantes_telefone_para_envio_whatsapp(phone_formatted or recipient)
-                        # O primeiro candidato geralmente já foi tentado (phone_formatted). Vamos tentar os demais.
-                        for cand in candidates[1:]:
-                            if isinstance(payload, dict):
-                                payload_try = dict(payload)
-                                payload_try["to"] = cand
-                            else:
-                                payload_try = payload
-                            response = await client.post(self.api_url, json=payload_try, headers=headers)
-                            if response.status_code == 200:
-                                break
-                            if response.status_code != 400:
-                                break
-                    except Exception:
-                        # fallback silencioso: mantém o response original
-                        pass
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    message_id = result.get("messages", [{}])[0].get("id")
-                    self._log_success(phone_formatted, message_id)
-                    return self._create_success_result(
-                        "Mensagem WhatsApp enviada com sucesso",
-                        external_id=message_id
-                    )
-                else:
-                    error_data = response.json() if response.text else {}
-                    error_info = error_data.get("error", {}) if isinstance(error_data, dict) else {}
-                    error_msg = error_info.get("message", "Erro ao enviar WhatsApp")
-                    self._log_error(phone_formatted, error_msg, error_data)
-                    return self._create_error_result(error_msg, {
-                        "status_code": response.status_code,
-                        "whatsapp_error": error_data,
-                        "error_code": error_info.get("code"),
-                        "error_type": error_info.get("type")
-                    })
-                        
+            if self.is_360 and response.status_code == 200:
+                await registrar_variante_aceita_async(phone_formatted or recipient, phone_used)
+            
+            if response.status_code == 200:
+                result = response.json()
+                message_id = result.get("messages", [{}])[0].get("id")
+                self._log_success(phone_formatted, message_id)
+                return self._create_success_result(
+                    "Mensagem WhatsApp enviada com sucesso",
+                    external_id=message_id
+                )
+            else:
+                error_data = response.json() if response.text else {}
+                error_info = error_data.get("error", {}) if isinstance(error_data, dict) else {}
+                error_msg = error_info.get("message", "Erro ao enviar WhatsApp")
+                self._log_error(phone_formatted, error_msg, error_data)
+                return self._create_error_result(error_msg, {
+                    "status_code": response.status_code,
+                    "whatsapp_error": error_data,
+                    "error_code": error_info.get("code"),
+                    "error_type": error_info.get("type")
+                })
+                    
         except Exception as e:
             error_msg = f"Erro ao enviar WhatsApp: {str(e)}"
             self._log_error(recipient, error_msg)
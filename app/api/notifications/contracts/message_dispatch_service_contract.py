@@ -6,7 +6,8 @@ from datetime import datetime
 from ..schemas.message_dispatch_schemas import (
     DispatchMessageRequest,
     DispatchMessageResponse,
-    BulkDispatchRequest
+    BulkDispatchRequest,
+    DispatchJobProgress
 )
 from ..models.notification import MessageType
 
@@ -39,6 +40,19 @@ class IMessageDispatchService(ABC):
         """
         pass
     
+    @abstractmethod
+    def get_dispatch_job(self, job_id: str) -> DispatchJobProgress:
+        """
+        Obtém o progresso de um disparo
+        
+        Args:
+            job_id: ID do disparo
+            
+        Returns:
+            Contagem das notificações do disparo por status
+        """
+        pass
+    
     @abstractmethod
     def get_dispatch_stats(
         self,
@@ -0,0 +1,216 @@
+"""
+Outbox durável de notificações.
+
+A tabela `notifications.notifications` é o outbox: criar uma notificação apenas
+insere a linha (status pending). Um pool de workers assíncronos, presente em cada
+processo da aplicação, reserva lotes com `FOR UPDATE SKIP LOCKED` e entrega pelo
+canal correspondente, com limite de concorrência por canal. Falhas seguem o
+backoff exponencial de `NotificationRepository.increment_attempts`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.database.db_connection import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_channel_limits(raw: str) -> Dict[str, int]:
+    """Converte "whatsapp=4,email=2" em {"whatsapp": 4, "email": 2}."""
+    limits: Dict[str, int] = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        channel, _, value = part.partition("=")
+        try:
+            limits[channel.strip().lower()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"[OUTBOX] Limite de canal inválido ignorado: {part!r}")
+    return limits
+
+
+def _channel_value(channel) -> str:
+    return str(channel.value if hasattr(channel, "value") else channel).lower()
+
+
+class NotificationOutbox:
+    """Pool de workers que consome o outbox de notificações."""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[int] = None,
+        channel_limits: Optional[Dict[str, int]] = None,
+    ):
+        self._session_factory = session_factory
+        self.workers = max(1, int(workers or settings.NOTIFICATION_OUTBOX_WORKERS))
+        self.batch_size = max(1, int(batch_size or settings.NOTIFICATION_OUTBOX_BATCH_SIZE))
+        self.poll_interval = float(poll_interval or settings.NOTIFICATION_OUTBOX_POLL_SEGUNDOS)
+        self.lease_seconds = int(lease_seconds or settings.NOTIFICATION_OUTBOX_LEASE_SEGUNDOS)
+        self.channel_limits = (
+            channel_limits if channel_limits is not None
+            else _parse_channel_limits(settings.NOTIFICATION_OUTBOX_CHANNEL_LIMITS)
+        )
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        # Fila curta: não reserva muito mais do que o pool consegue enviar dentro do lease
+        self._queue = asyncio.Queue(maxsize=self.workers * 2)
+        self._wake_event = asyncio.Event()
+        self._running = True
+        self._loop = loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._claim_loop())]
+        self._tasks += [loop.create_task(self._worker_loop()) for _ in range(self.workers)]
+        logger.info(
+            f"[OUTBOX] Iniciado: {self.workers} workers, lote={self.batch_size}, "
+            f"limites por canal={self.channel_limits}"
+        )
+
+    async def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("[OUTBOX] Parado")
+
+    def wake(self) -> None:
+        """
+        Acorda o loop de reserva (chamado logo após inserir notificações neste processo).
+
+        Pode ser chamado de qualquer thread (services síncronos, `asyncio.run` em threads):
+        o evento é setado no loop do outbox.
+        """
+        if self._wake_event is None or self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake_event.set)
+        except RuntimeError:
+            # Loop já encerrado (shutdown); a notificação fica para o próximo start
+            pass
+
+    # ------------------------------------------------------------------
+    # Reserva
+    # ------------------------------------------------------------------
+    def _claim(self, limit: int) -> List[Tuple[str, str, datetime]]:
+        from ..repositories.notification_repository import NotificationRepository
+
+        with self._session_factory() as db:
+            notifications = NotificationRepository(db).claim_due_notifications(limit, self.lease_seconds)
+            # next_retry_at é o lease gravado na reserva (conferido de novo antes do envio)
+            return [(n.id, _channel_value(n.channel), n.next_retry_at) for n in notifications]
+
+    async def _claim_loop(self) -> None:
+        while self._running:
+            try:
+                free = max(1, min(self.batch_size, self._queue.maxsize - self._queue.qsize()))
+                claimed = await asyncio.to_thread(self._claim, free)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[OUTBOX] Erro ao reservar notificações: {e}")
+                claimed = []
+
+            for item in claimed:
+                await self._queue.put(item)
+
+            # Lote cheio: provavelmente há mais; volta a reservar sem esperar
+            if len(claimed) >= free:
+                continue
+
+            self._wake_event.clear()
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Entrega
+    # ------------------------------------------------------------------
+    async def _worker_loop(self) -> None:
+        while self._running:
+            notification_id, channel, lease = await self._queue.get()
+            try:
+                await self.deliver(notification_id, channel, lease)
+            except Exception as e:
+                logger.error(f"[OUTBOX] Erro ao entregar notificação {notification_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _semaphore(self, channel: str) -> Optional[asyncio.Semaphore]:
+        limit = self.channel_limits.get(channel)
+        if not limit:
+            return None
+        semaphore = self._semaphores.get(channel)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(limit)
+            self._semaphores[channel] = semaphore
+        return semaphore
+
+    async def deliver(self, notification_id: str, channel: str, lease: Optional[datetime] = None) -> None:
+        """
+        Entrega uma notificação em sessão própria, respeitando o limite do canal.
+
+        `lease` é o `next_retry_at` da reserva; sem ele a notificação é reservada aqui.
+        """
+        semaphore = self._semaphore(channel)
+        if semaphore is None:
+            await self._deliver(notification_id, lease)
+            return
+        async with semaphore:
+            await self._deliver(notification_id, lease)
+
+    async def deliver_many(self, items: Iterable[Tuple]) -> None:
+        """Entrega várias notificações em paralelo (itens `(id, canal)` ou `(id, canal, lease)`)."""
+        await asyncio.gather(*(self.deliver(*item) for item in items), return_exceptions=True)
+
+    async def _deliver(self, notification_id: str, lease: Optional[datetime] = None) -> None:
+        from ..repositories.event_repository import EventRepository
+        from ..repositories.notification_repository import NotificationRepository
+        from ..repositories.subscription_repository import SubscriptionRepository
+        from ..services.notification_service import NotificationService
+
+        db = self._session_factory()
+        try:
+            service = NotificationService(
+                notification_repo=NotificationRepository(db),
+                subscription_repo=SubscriptionRepository(db),
+                event_repo=EventRepository(db),
+            )
+            # O lease pode ter vencido enquanto a notificação esperava na fila: se outro worker
+            # já a reservou, enviou ou marcou como falha, não envia de novo
+            if not service.notification_repo.reservar_para_entrega(notification_id, self.lease_seconds, lease):
+                logger.debug(f"[OUTBOX] Notificação {notification_id} não está mais reservada para este worker")
+                return
+            notification = service.notification_repo.get_by_id(notification_id)
+            if notification is None:
+                return
+            await service.process_notification(notification)
+        finally:
+            db.close()
+
+
+# Instância do processo (iniciada junto com o sistema de notificações)
+notification_outbox = NotificationOutbox()
@@ -5,18 +5,20 @@ from datetime import datetime
 
 from .event_bus import event_bus
 from .websocket_manager import websocket_manager
+from .notification_outbox import notification_outbox
+from ..channels.http_clients import close_http_clients
+from app.config import settings
+from app.database.db_connection import SessionLocal
 from ..services.event_processor import EventProcessor
-from ..repositories.event_repository import EventRepository
-from ..repositories.subscription_repository import SubscriptionRepository
-from ..repositories.notification_repository import NotificationRepository
 
 logger = logging.getLogger(__name__)
 
 class NotificationSystem:
     """Sistema principal de notificações"""
     
-    def __init__(self, db_session):
-        self.db_session = db_session
+    def __init__(self, session_factory=SessionLocal):
+        # Fábrica de sessões: cada evento abre a sua (ver EventProcessor.handle)
+        self.session_factory = session_factory
         self.event_processor: Optional[EventProcessor] = None
         self._running = False
     
@@ -25,15 +27,8 @@ class NotificationSystem:
         try:
             logger.info("Inicializando sistema de notificações...")
             
-            # Cria repositórios
-            event_repo = EventRepository(self.db_session)
-            subscription_repo = SubscriptionRepository(self.db_session)
-            notification_repo = NotificationRepository(self.db_session)
-            
             # Cria processador de eventos
-            self.event_processor = EventProcessor(
-                event_repo, subscription_repo, notification_repo
-            )
+            self.event_processor = EventProcessor(self.session_factory)
             
             # Registra o processador de eventos no event bus
             event_bus.subscribe("pedido_criado", self.event_processor)
@@ -46,6 +41,13 @@ class NotificationSystem:
             
             # Inicia o event bus
             await event_bus.start()
+
+            # Inicia o broadcast de WebSocket entre workers
+            await websocket_manager.start_broadcast()
+
+            # Inicia o pool de entrega do outbox de notificações
+            if settings.NOTIFICATION_OUTBOX_ENABLED:
+                await notification_outbox.start()
             
             self._running = True
             logger.info("Sistema de notificações inicializado com sucesso")
@@ -62,8 +64,17 @@ class NotificationSystem:
             
             self._running = False
             
+            # Para o outbox antes do event bus (entregas em andamento são retomadas após o lease)
+            await notification_outbox.stop()
+
             # Para o event bus
             await event_bus.stop()
+
+            # Para o broadcast de WebSocket entre workers
+            await websocket_manager.stop_broadcast()
+
+            # Fecha os clientes HTTP compartilhados dos canais
+            await close_http_clients()
             
             logger.info("Sistema de notificações parado com sucesso")
             
@@ -106,10 +117,10 @@ class NotificationSystem:
 # Instância global do sistema de notificações
 notification_system: Optional[NotificationSystem] = None
 
-async def initialize_notification_system(db_session):
+async def initialize_notification_system(session_factory=SessionLocal):
     """Inicializa o sistema de notificações globalmente"""
     global notification_system
-    notification_system = NotificationSystem(db_session)
+    notification_system = NotificationSystem(session_factory)
     await notification_system.initialize()
     return notification_system
 
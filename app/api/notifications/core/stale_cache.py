@@ -0,0 +1,82 @@
+"""
+Cache assíncrono em memória com stale-while-revalidate.
+
+- idade < ttl: devolve o valor em cache
+- ttl <= idade < stale: devolve o valor antigo e recalcula em segundo plano
+- idade >= stale (ou ausente): recalcula e aguarda
+
+Cargas da mesma chave são compartilhadas (uma só execução por vez, por worker).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.utils.prometheus_metrics import memory_cache_requests_total
+
+logger = logging.getLogger(__name__)
+
+Carregar = Callable[[], Awaitable[Any]]
+
+
+class StaleWhileRevalidateCache:
+    """Cache por worker de resultados caros (ex.: dashboard por empresa)."""
+
+    def __init__(self, nome: str, ttl_segundos: float, stale_segundos: float, max_itens: int = 1000):
+        self.nome = nome
+        self.ttl_segundos = float(ttl_segundos)
+        self.stale_segundos = max(float(stale_segundos), self.ttl_segundos)
+        self.max_itens = max(1, int(max_itens))
+        self._entradas: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._em_andamento: Dict[Hashable, asyncio.Task] = {}
+
+    async def get(self, chave: Hashable, carregar: Carregar) -> Any:
+        entrada = self._entradas.get(chave)
+        if entrada is not None:
+            criado_em, valor = entrada
+            idade = monotonic() - criado_em
+            if idade < self.ttl_segundos:
+                self._metrica("hit")
+                return valor
+            if idade < self.stale_segundos:
+                self._metrica("stale")
+                self._iniciar_carga(chave, carregar)
+                return valor
+
+        self._metrica("miss")
+        # shield: se o request for cancelado, a carga continua para os demais
+        return await asyncio.shield(self._iniciar_carga(chave, carregar))
+
+    def invalidar(self, chave: Optional[Hashable] = None) -> None:
+        if chave is None:
+            self._entradas.clear()
+        else:
+            self._entradas.pop(chave, None)
+
+    def _iniciar_carga(self, chave: Hashable, carregar: Carregar) -> asyncio.Task:
+        task = self._em_andamento.get(chave)
+        if task is None or task.done():
+            task = asyncio.get_running_loop().create_task(self._carregar(chave, carregar))
+            self._em_andamento[chave] = task
+            task.add_done_callback(lambda t, c=chave: self._finalizar(c, t))
+        return task
+
+    async def _carregar(self, chave: Hashable, carregar: Carregar) -> Any:
+        valor = await carregar()
+        self._entradas[chave] = (monotonic(), valor)
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self.max_itens:
+            self._entradas.popitem(last=False)
+        return valor
+
+    def _finalizar(self, chave: Hashable, task: asyncio.Task) -> None:
+        if self._em_andamento.get(chave) is task:
+            self._em_andamento.pop(chave, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"[{self.nome}] Falha ao recalcular {chave!r}: {task.exception()}")
+
+    def _metrica(self, resultado: str) -> None:
+        memory_cache_requests_total.labels(cache=self.nome, resultado=resultado).inc()
@@ -0,0 +1,90 @@
+"""
+Índice em memória das assinaturas ativas, por (empresa_id, event_type).
+
+O EventProcessor consulta as assinaturas a cada evento; como elas mudam raramente,
+cada worker guarda um snapshot por chave, carregado sob demanda. Alterações feitas
+pelo `SubscriptionRepository` limpam o índice local e avançam a versão compartilhada
+(sequence no Postgres), o que faz os demais workers descartarem seus índices na
+próxima checagem.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.config import settings
+from app.utils.prometheus_metrics import memory_cache_requests_total
+from app.utils.versao_compartilhada import CacheVersionado, VersaoCompartilhada
+
+SEQUENCE_VERSAO = "notifications.subscriptions_version_seq"
+
+
+@dataclass(frozen=True)
+class SubscriptionSnapshot:
+    """Cópia somente leitura de uma assinatura (independente da sessão que a carregou)."""
+
+    id: str
+    empresa_id: str
+    user_id: Optional[str]
+    event_type: str
+    channel: str
+    channel_config: Dict[str, Any]
+    filters: Optional[Dict[str, Any]]
+    active: bool = True
+
+    @classmethod
+    def from_model(cls, subscription) -> "SubscriptionSnapshot":
+        return cls(
+            id=subscription.id,
+            empresa_id=subscription.empresa_id,
+            user_id=subscription.user_id,
+            event_type=subscription.event_type,
+            channel=subscription.channel,
+            channel_config=subscription.channel_config or {},
+            filters=subscription.filters,
+            active=bool(subscription.active),
+        )
+
+
+def _valor(valor) -> str:
+    return str(valor.value if hasattr(valor, "value") else valor)
+
+
+class SubscriptionIndex:
+    """Cache por worker das assinaturas ativas, invalidado por versão compartilhada."""
+
+    def __init__(self, cache: Optional[CacheVersionado] = None):
+        self._cache = cache or CacheVersionado(
+            VersaoCompartilhada(
+                SEQUENCE_VERSAO,
+                intervalo_checagem=settings.NOTIFICATION_SUBSCRIPTION_INDEX_CHECAGEM_SEGUNDOS,
+            ),
+            max_itens=settings.NOTIFICATION_SUBSCRIPTION_INDEX_MAX_ITENS,
+            ttl_segundos=settings.NOTIFICATION_SUBSCRIPTION_INDEX_TTL_SEGUNDOS,
+        )
+
+    @staticmethod
+    def chave(empresa_id, event_type) -> str:
+        return f"{_valor(empresa_id)}:{_valor(event_type)}"
+
+    def get(
+        self,
+        empresa_id,
+        event_type,
+        carregar: Callable[[], Iterable[Any]],
+    ) -> List[SubscriptionSnapshot]:
+        """Assinaturas ativas da chave; `carregar` consulta o banco em caso de miss."""
+        snapshots, hit = self._cache.get(
+            self.chave(empresa_id, event_type),
+            lambda: [SubscriptionSnapshot.from_model(s) for s in carregar()],
+        )
+        memory_cache_requests_total.labels(cache="subscriptions", resultado="hit" if hit else "miss").inc()
+        return snapshots
+
+    def invalidar(self) -> None:
+        """Descarta o índice deste worker e avança a versão para os demais."""
+        self._cache.invalidar()
+
+
+# Instância do processo
+subscription_index = SubscriptionIndex()
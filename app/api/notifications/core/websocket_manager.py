@@ -4,15 +4,31 @@ import json
 import logging
 import asyncio
 import os
+import socket
+import uuid
 from urllib.parse import urlparse
 from datetime import datetime
 
+from .ws_broadcast import BroadcastBackend, create_broadcast_backend
+from .ws_outbound import ConnectionSender
+
 logger = logging.getLogger(__name__)
 
 class ConnectionManager:
-    """Gerenciador de conexões WebSocket para notificações em tempo real"""
+    """
+    Gerenciador de conexões WebSocket para notificações em tempo real.
+
+    Cada worker guarda apenas as conexões que aceitou. Os métodos públicos de envio
+    entregam localmente e publicam a mensagem no backend de broadcast
+    (ver `ws_broadcast`), para que os demais workers entreguem às suas conexões.
+    Os retornos (contagens/bool) refletem apenas as entregas do worker atual.
+
+    As conexões pertencem ao loop principal (onde `start_broadcast` roda no startup);
+    envios feitos de outro loop/thread (workers do inbox do chatbot, `asyncio.run`
+    em services síncronos) são executados nele via `run_coroutine_threadsafe`.
+    """
     
-    def __init__(self):
+    def __init__(self, broadcast_backend: Optional[BroadcastBackend] = None):
         # Armazena conexões por user_id
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         # Armazena conexões por empresa_id
@@ -25,6 +41,8 @@ class ConnectionManager:
         self.websocket_to_route: Dict[WebSocket, str] = {}
         # Mapeia WebSocket para timestamp de conexão (usado para expulsar conexões antigas)
         self.websocket_to_connected_at: Dict[WebSocket, datetime] = {}
+        # Fila de saída (e task de envio) de cada WebSocket
+        self.websocket_to_sender: Dict[WebSocket, ConnectionSender] = {}
 
         # Lock para evitar race conditions em connect/disconnect concorrentes
         self._lock = asyncio.Lock()
@@ -35,6 +53,111 @@ class ConnectionManager:
             os.getenv("WS_MAX_CONNECTIONS_PER_USER_EMPRESA", "1")
         )
 
+        # Tempo máximo para enviar uma mensagem a um socket; acima disso a conexão é removida
+        self.send_timeout_seconds: float = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+
+        # Fila de saída por conexão: tamanho máximo e política quando cheia
+        # (drop_oldest | coalesce | disconnect)
+        self.outbound_queue_max: int = int(os.getenv("WS_OUTBOUND_QUEUE_MAX", "100"))
+        self.outbound_overflow_policy: str = os.getenv("WS_OUTBOUND_OVERFLOW_POLICY", "drop_oldest").strip().lower()
+
+        # Broadcast entre workers
+        self.instance_id: str = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._broadcast_backend: Optional[BroadcastBackend] = broadcast_backend
+        self._broadcast_started: bool = False
+        # Loop dono das conexões (definido em start_broadcast)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def is_distributed(self) -> bool:
+        """True quando as mensagens também são entregues por outros workers."""
+        return bool(
+            self._broadcast_started
+            and self._broadcast_backend is not None
+            and self._broadcast_backend.distributed
+        )
+
+    async def start_broadcast(self) -> None:
+        """Inicia o backend de broadcast (chamado no startup da aplicação)."""
+        if self._broadcast_started:
+            return
+        self._loop = asyncio.get_running_loop()
+        if self._broadcast_backend is None:
+            self._broadcast_backend = create_broadcast_backend()
+        try:
+            await self._broadcast_backend.start(self._on_broadcast)
+            self._broadcast_started = True
+            logger.info(
+                f"[WS_BROADCAST] Backend {type(self._broadcast_backend).__name__} iniciado "
+                f"(instance_id={self.instance_id})"
+            )
+        except Exception as e:
+            # Sem backend, o worker continua entregando apenas às próprias conexões
+            logger.error(f"[WS_BROADCAST] Falha ao iniciar backend de broadcast: {e}")
+            self._broadcast_started = False
+
+    async def stop_broadcast(self) -> None:
+        """Para o backend de broadcast (chamado no shutdown da aplicação)."""
+        if not self._broadcast_started or self._broadcast_backend is None:
+            return
+        self._broadcast_started = False
+        try:
+            await self._broadcast_backend.stop()
+        except Exception as e:
+            logger.error(f"[WS_BROADCAST] Erro ao parar backend de broadcast: {e}")
+
+    async def _publish(self, op: str, message: Dict[str, Any], **args: Any) -> None:
+        """Publica a mensagem para os demais workers (falhas não afetam a entrega local)."""
+        if not self._broadcast_started or self._broadcast_backend is None:
+            return
+        envelope = {"origin": self.instance_id, "op": op, "args": args, "message": message}
+        try:
+            await self._broadcast_backend.publish(envelope)
+        except Exception as e:
+            logger.error(f"[WS_BROADCAST] Erro ao publicar mensagem ({op}): {e}")
+
+    def _fora_do_loop_principal(self) -> bool:
+        loop = self._loop
+        return loop is not None and loop.is_running() and asyncio.get_running_loop() is not loop
+
+    async def _no_loop_principal(self, coro):
+        """Executa `coro` no loop dono das conexões e aguarda o resultado."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    def _log_sem_conexao(self, msg: str) -> None:
+        # Com broadcast entre workers é normal o destino não estar neste processo
+        if self.is_distributed:
+            logger.debug(msg)
+        else:
+            logger.warning(msg)
+
+    async def _on_broadcast(self, envelope: Dict[str, Any]) -> None:
+        """Entrega localmente uma mensagem publicada por outro worker."""
+        if envelope.get("origin") == self.instance_id:
+            # O worker de origem já entregou às próprias conexões
+            return
+
+        op = envelope.get("op")
+        args = envelope.get("args") or {}
+        message = envelope.get("message") or {}
+        try:
+            if op == "user":
+                await self._send_to_user_local(args["user_id"], message)
+            elif op == "empresa":
+                await self._send_to_empresa_local(args["empresa_id"], message)
+            elif op == "empresa_on_route":
+                await self._send_to_empresa_on_route_local(
+                    args["empresa_id"], message, required_route=args.get("required_route") or ""
+                )
+            elif op == "broadcast":
+                await self._broadcast_local(message)
+            elif op == "broadcast_on_route":
+                await self._broadcast_on_route_local(message, required_route=args.get("required_route") or "")
+            else:
+                logger.warning(f"[WS_BROADCAST] Operação desconhecida recebida: {op}")
+        except Exception as e:
+            logger.error(f"[WS_BROADCAST] Erro ao entregar mensagem recebida ({op}): {e}")
+
     @staticmethod
     def _normalize_route(route: str | None) -> str:
         """
@@ -81,6 +204,80 @@ class ConnectionManager:
 
         return r
 
+    @staticmethod
+    def _route_matches(current_route: str, required_route: str) -> bool:
+        """
+        Verifica se a rota atual (já normalizada em `set_route`) atende à rota requerida.
+
+        Regra:
+        - aceita rota exatamente igual ("/chatbot")
+        - aceita prefixo ("/chatbot/..." ) para rotas aninhadas
+        - mantém compatibilidade com comportamento antigo (endswith) para casos como "/admin/pedidos"
+        """
+        if not current_route:
+            return False
+        if current_route == required_route:
+            return True
+        required_route_norm = required_route.rstrip("/")
+        if required_route_norm and current_route.startswith(required_route_norm + "/"):
+            return True
+        return current_route.endswith(required_route)
+
+    @staticmethod
+    def _coalesce_key(message: Dict[str, Any]) -> Optional[str]:
+        """Chave usada para juntar mensagens equivalentes quando a fila de saída enche."""
+        name = message.get("event") or message.get("type")
+        if not name:
+            return None
+        payload = message.get("payload") or message.get("data") or {}
+        ref = payload.get("pedido_id") if isinstance(payload, dict) else None
+        return f"{name}:{ref}" if ref is not None else str(name)
+
+    def _sender_for(self, websocket: WebSocket) -> ConnectionSender:
+        sender = self.websocket_to_sender.get(websocket)
+        if sender is None:
+            sender = ConnectionSender(
+                websocket,
+                on_failure=self._on_sender_failure,
+                max_size=self.outbound_queue_max,
+                overflow_policy=self.outbound_overflow_policy,
+                send_timeout_seconds=self.send_timeout_seconds,
+            )
+            sender.start()
+            self.websocket_to_sender[websocket] = sender
+        return sender
+
+    async def _on_sender_failure(self, websocket: WebSocket, motivo: str) -> None:
+        """Remove e fecha uma conexão cuja fila de saída falhou (erro, timeout ou overflow)."""
+        logger.warning(f"Removendo conexão websocket={id(websocket)}: {motivo}")
+        await self.disconnect(websocket)
+        try:
+            await asyncio.wait_for(
+                self._best_effort_close(websocket, code=4002, reason="Conexão lenta ou inválida"),
+                timeout=self.send_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            pass
+
+    async def _send_many(self, websockets, message: Dict[str, Any], contexto: str) -> int:
+        """
+        Enfileira a mesma mensagem para vários sockets.
+
+        O payload é serializado uma única vez e colocado na fila de saída de cada
+        conexão; a task de envio da conexão aplica o timeout e remove sockets que
+        falham. Retorna o número de conexões que aceitaram a mensagem.
+        """
+        websockets = list(websockets)
+        if not websockets:
+            return 0
+
+        data = json.dumps(message)
+        key = self._coalesce_key(message)
+        enqueued = sum(1 for ws in websockets if self._sender_for(ws).enqueue(data, key))
+        if enqueued < len(websockets):
+            logger.debug(f"Mensagem não enfileirada para {len(websockets) - enqueued} conexão(ões) ({contexto})")
+        return enqueued
+
     def _remove_connection_no_lock(self, websocket: WebSocket) -> None:
         """Remove um websocket das estruturas internas (NÃO faz await e pressupõe lock)."""
         user_id = self.websocket_to_user.get(websocket)
@@ -101,6 +298,10 @@ class ConnectionManager:
         self.websocket_to_route.pop(websocket, None)
         self.websocket_to_connected_at.pop(websocket, None)
 
+        sender = self.websocket_to_sender.pop(websocket, None)
+        if sender is not None:
+            sender.stop()
+
     def _is_websocket_active(self, websocket: WebSocket) -> bool:
         """Verifica se um WebSocket ainda está ativo/aberto"""
         try:
@@ -228,6 +429,7 @@ class ConnectionManager:
             self.websocket_to_empresa[websocket] = empresa_id
             self.websocket_to_route[websocket] = ""
             self.websocket_to_connected_at[websocket] = datetime.utcnow()
+            self._sender_for(websocket)
         
         # Fecha as conexões expulsas (fora do lock, best-effort)
         for ws in websockets_to_evict:
@@ -331,30 +533,80 @@ class ConnectionManager:
         )
     
     async def send_to_user(self, user_id: str, message: Dict[str, Any]) -> bool:
-        """Envia mensagem para um usuário específico"""
+        """
+        Envia mensagem para um usuário específico (em qualquer worker).
+
+        Retorna True se entregue localmente ou, com backend distribuído, se publicada
+        para os demais workers (o usuário pode estar conectado em outro processo).
+        """
+        if self._fora_do_loop_principal():
+            return await self._no_loop_principal(self.send_to_user(user_id, message))
+        user_id = str(user_id)
+        delivered = await self._send_to_user_local(user_id, message)
+        await self._publish("user", message, user_id=user_id)
+        return delivered or self.is_distributed
+
+    async def send_to_empresa(self, empresa_id: str, message: Dict[str, Any]) -> int:
+        """Envia mensagem para todos os usuários de uma empresa (em todos os workers)"""
+        if self._fora_do_loop_principal():
+            return await self._no_loop_principal(self.send_to_empresa(empresa_id, message))
+        empresa_id = str(empresa_id)
+        sent = await self._send_to_empresa_local(empresa_id, message)
+        await self._publish("empresa", message, empresa_id=empresa_id)
+        return sent
+
+    async def broadcast(self, message: Dict[str, Any]) -> int:
+        """Envia mensagem para todos os usuários conectados (em todos os workers)"""
+        if self._fora_do_loop_principal():
+            return await self._no_loop_principal(self.broadcast(message))
+        sent = await self._broadcast_local(message)
+        await self._publish("broadcast", message)
+        return sent
+
+    async def send_to_empresa_on_route(
+        self,
+        empresa_id: str,
+        message: Dict[str, Any],
+        required_route: str = "/pedidos"
+    ) -> int:
+        """
+        Envia mensagem apenas para usuários de uma empresa que estão em uma rota
+        específica (em todos os workers). Retorna o número de conexões locais atingidas.
+        """
+        if self._fora_do_loop_principal():
+            return await self._no_loop_principal(
+                self.send_to_empresa_on_route(empresa_id, message, required_route=required_route)
+            )
+        empresa_id = str(empresa_id)
+        sent = await self._send_to_empresa_on_route_local(empresa_id, message, required_route=required_route)
+        await self._publish("empresa_on_route", message, empresa_id=empresa_id, required_route=required_route)
+        return sent
+
+    async def broadcast_on_route(self, message: Dict[str, Any], required_route: str) -> int:
+        """Broadcast para conexões em uma rota específica (em todos os workers)."""
+        if self._fora_do_loop_principal():
+            return await self._no_loop_principal(self.broadcast_on_route(message, required_route=required_route))
+        sent = await self._broadcast_on_route_local(message, required_route=required_route)
+        await self._publish("broadcast_on_route", message, required_route=required_route)
+        return sent
+
+    async def _send_to_user_local(self, user_id: str, message: Dict[str, Any]) -> bool:
+        """Envia mensagem para um usuário específico (apenas conexões deste worker)"""
         if user_id not in self.active_connections:
-            logger.warning(f"Usuário {user_id} não está conectado")
+            self._log_sem_conexao(f"Usuário {user_id} não está conectado")
             return False
         
         connections = self.active_connections[user_id].copy()
         if not connections:
             return False
         
-        success_count = 0
-        for websocket in connections:
-            try:
-                await websocket.send_text(json.dumps(message))
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Erro ao enviar mensagem para usuário {user_id}: {e}")
-                # Remove conexão inválida
-                await self.disconnect(websocket)
+        success_count = await self._send_many(connections, message, contexto=f"usuário {user_id}")
         
-        logger.info(f"Mensagem enviada para {success_count}/{len(connections)} conexões do usuário {user_id}")
+        logger.debug(f"Mensagem enviada para {success_count}/{len(connections)} conexões do usuário {user_id}")
         return success_count > 0
     
-    async def send_to_empresa(self, empresa_id: str, message: Dict[str, Any]) -> int:
-        """Envia mensagem para todos os usuários de uma empresa"""
+    async def _send_to_empresa_local(self, empresa_id: str, message: Dict[str, Any]) -> int:
+        """Envia mensagem para todos os usuários de uma empresa (apenas conexões deste worker)"""
         # Normaliza empresa_id para string para evitar inconsistências
         empresa_id = str(empresa_id)
         
@@ -371,7 +623,7 @@ class ConnectionManager:
                 # Se encontrou com int, usa esse
                 empresa_id = empresa_id_int
             else:
-                logger.warning(
+                self._log_sem_conexao(
                     f"Empresa {empresa_id} não tem conexões ativas. "
                     f"Empresas conectadas: {list(self.empresa_connections.keys())}"
                 )
@@ -382,21 +634,13 @@ class ConnectionManager:
             logger.warning(f"Empresa {empresa_id} não tem conexões ativas (conjunto vazio)")
             return 0
         
-        success_count = 0
-        for websocket in connections:
-            try:
-                await websocket.send_text(json.dumps(message))
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Erro ao enviar mensagem para empresa {empresa_id}: {e}")
-                # Remove conexão inválida
-                await self.disconnect(websocket)
+        success_count = await self._send_many(connections, message, contexto=f"empresa {empresa_id}")
         
-        logger.info(f"Mensagem enviada para {success_count}/{len(connections)} conexões da empresa {empresa_id}")
+        logger.debug(f"Mensagem enviada para {success_count}/{len(connections)} conexões da empresa {empresa_id}")
         return success_count
     
-    async def broadcast(self, message: Dict[str, Any]) -> int:
-        """Envia mensagem para todos os usuários conectados"""
+    async def _broadcast_local(self, message: Dict[str, Any]) -> int:
+        """Envia mensagem para todos os usuários conectados (apenas conexões deste worker)"""
         all_connections = set()
         for connections in self.active_connections.values():
             all_connections.update(connections)
@@ -404,17 +648,9 @@ class ConnectionManager:
         if not all_connections:
             return 0
         
-        success_count = 0
-        for websocket in all_connections:
-            try:
-                await websocket.send_text(json.dumps(message))
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Erro no broadcast: {e}")
-                # Remove conexão inválida
-                await self.disconnect(websocket)
+        success_count = await self._send_many(all_connections, message, contexto="broadcast")
         
-        logger.info(f"Broadcast enviado para {success_count}/{len(all_connections)} conexões")
+        logger.debug(f"Broadcast enviado para {success_count}/{len(all_connections)} conexões")
         return success_count
     
     def get_connection_stats(self) -> Dict[str, Any]:
@@ -524,7 +760,7 @@ class ConnectionManager:
         """Retorna a rota atual de um cliente"""
         return self.websocket_to_route.get(websocket, "")
     
-    async def send_to_empresa_on_route(
+    async def _send_to_empresa_on_route_local(
         self, 
         empresa_id: str, 
         message: Dict[str, Any], 
@@ -547,7 +783,7 @@ class ConnectionManager:
 
         # Se não há rota requerida válida, envia para toda a empresa (fallback seguro)
         if not required_route:
-            return await self.send_to_empresa(empresa_id, message)
+            return await self._send_to_empresa_local(empresa_id, message)
         
         # Verifica se a empresa tem conexões
         if empresa_id not in self.empresa_connections:
@@ -561,7 +797,7 @@ class ConnectionManager:
             if empresa_id_int and empresa_id_int in self.empresa_connections:
                 empresa_id = empresa_id_int
             else:
-                logger.warning(
+                self._log_sem_conexao(
                     f"Empresa {empresa_id} não tem conexões ativas para rota {required_route}. "
                     f"Empresas conectadas: {list(self.empresa_connections.keys())}"
                 )
@@ -573,26 +809,10 @@ class ConnectionManager:
             return 0
         
         # Filtra conexões que estão na rota requerida
-        # Regra:
-        # - aceita rota exatamente igual ("/chatbot")
-        # - aceita prefixo ("/chatbot/..." ) para rotas aninhadas
-        # - mantém compatibilidade com comportamento antigo (endswith) para casos como "/admin/pedidos"
-        filtered_connections = []
-        required_route_norm = required_route.rstrip("/")
-        for websocket in connections:
-            current_route = self._normalize_route(self.websocket_to_route.get(websocket, ""))
-            if not current_route:
-                continue
-            if current_route == required_route:
-                filtered_connections.append(websocket)
-                continue
-            # Prefix match (ex: /chatbot/conversations/123)
-            if required_route_norm and current_route.startswith(required_route_norm + "/"):
-                filtered_connections.append(websocket)
-                continue
-            # Compat: rota pode ser uma URL completa ou rota com prefixo (ex: /admin/pedidos)
-            if current_route.endswith(required_route):
-                filtered_connections.append(websocket)
+        filtered_connections = [
+            websocket for websocket in connections
+            if self._route_matches(self.websocket_to_route.get(websocket, ""), required_route)
+        ]
         
         if not filtered_connections:
             logger.info(
@@ -602,31 +822,24 @@ class ConnectionManager:
             )
             return 0
         
-        success_count = 0
-        for websocket in filtered_connections:
-            try:
-                await websocket.send_text(json.dumps(message))
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Erro ao enviar mensagem para empresa {empresa_id} na rota {required_route}: {e}")
-                # Remove conexão inválida
-                await self.disconnect(websocket)
+        success_count = await self._send_many(
+            filtered_connections, message, contexto=f"empresa {empresa_id} na rota {required_route}"
+        )
         
-        logger.info(
+        logger.debug(
             f"Mensagem enviada para {success_count}/{len(filtered_connections)} conexões "
             f"da empresa {empresa_id} na rota {required_route} "
             f"(total de conexões da empresa: {len(connections)})"
         )
         return success_count
 
-    async def broadcast_on_route(self, message: Dict[str, Any], required_route: str) -> int:
+    async def _broadcast_on_route_local(self, message: Dict[str, Any], required_route: str) -> int:
         """
         Broadcast apenas para conexões que estão em uma rota específica.
 
         Útil para eventos que só fazem sentido quando o usuário está na tela (ex: /chatbot).
         """
         required_route = self._normalize_route(required_route)
-        required_route_norm = required_route.rstrip("/")
 
         all_connections = set()
         for connections in self.active_connections.values():
@@ -635,33 +848,19 @@ class ConnectionManager:
         if not all_connections:
             return 0
 
-        filtered_connections = []
-        for websocket in all_connections:
-            current_route = self._normalize_route(self.websocket_to_route.get(websocket, ""))
-            if not current_route:
-                continue
-            if current_route == required_route:
-                filtered_connections.append(websocket)
-                continue
-            if required_route_norm and current_route.startswith(required_route_norm + "/"):
-                filtered_connections.append(websocket)
-                continue
-            if current_route.endswith(required_route):
-                filtered_connections.append(websocket)
+        filtered_connections = [
+            websocket for websocket in all_connections
+            if self._route_matches(self.websocket_to_route.get(websocket, ""), required_route)
+        ]
 
         if not filtered_connections:
             return 0
 
-        success_count = 0
-        for websocket in filtered_connections:
-            try:
-                await websocket.send_text(json.dumps(message))
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Erro no broadcast_on_route ({required_route}): {e}")
-                await self.disconnect(websocket)
+        success_count = await self._send_many(
+            filtered_connections, message, contexto=f"broadcast_on_route ({required_route})"
+        )
 
-        logger.info(
+        logger.debug(
             f"Broadcast_on_route enviado para {success_count}/{len(filtered_connections)} conexões "
             f"(route={required_route})"
         )
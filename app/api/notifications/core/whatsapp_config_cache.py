@@ -0,0 +1,123 @@
+"""
+Cache por worker da configuração ativa do WhatsApp de cada empresa.
+
+Cada envio (notificações e chatbot) precisa da configuração da empresa; ela muda
+só quando alguém salva a tela de configuração. O `WhatsAppConfigRepository`
+invalida o cache após create/update/delete, e a versão compartilhada (sequence no
+Postgres) propaga a invalidação para os outros workers.
+
+O mesmo cache guarda o mapa phone_number_id / display_phone_number /
+business_account_id -> empresa usado para identificar a empresa dos webhooks
+(`resolver_empresa_whatsapp`), então salvar uma configuração também o renova.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.database.db_connection import SessionLocal
+from app.utils.prometheus_metrics import memory_cache_requests_total
+from app.utils.versao_compartilhada import CacheVersionado, VersaoCompartilhada
+
+SEQUENCE_VERSAO = "notifications.whatsapp_config_version_seq"
+
+# Chave usada quando empresa_id não é informado (última configuração ativa de qualquer empresa)
+_CHAVE_SEM_EMPRESA = "*"
+
+# Chave do mapa identificador -> empresa (resolução de webhooks)
+_CHAVE_MAPA_EMPRESAS = "mapa_empresas"
+
+# Identificadores aceitos por `resolver_empresa_whatsapp`
+TIPOS_IDENTIFICADOR = ("phone_number_id", "display_phone_number", "business_account_id")
+
+_cache = CacheVersionado(
+    VersaoCompartilhada(SEQUENCE_VERSAO, intervalo_checagem=settings.WHATSAPP_CONFIG_CACHE_CHECAGEM_SEGUNDOS),
+    max_itens=5000,
+    ttl_segundos=settings.WHATSAPP_CONFIG_CACHE_TTL_SEGUNDOS,
+)
+
+
+def _carregar(empresa_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    from ..repositories.whatsapp_config_repository import WhatsAppConfigRepository
+    from ..services.whatsapp_config_service import WhatsAppConfigService
+
+    db = SessionLocal()
+    try:
+        config = WhatsAppConfigService(WhatsAppConfigRepository(db)).get_active_config(empresa_id)
+        return WhatsAppConfigService.to_response_dict(config) if config else None
+    finally:
+        db.close()
+
+
+def get_active_whatsapp_config(empresa_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Configuração ativa da empresa (dict de `WhatsAppConfigService.to_response_dict`)
+    ou None se não houver. Retorna uma cópia: o chamador pode alterá-la.
+    """
+    chave = str(empresa_id) if empresa_id else _CHAVE_SEM_EMPRESA
+    config, hit = _cache.get(chave, lambda: _carregar(empresa_id))
+    memory_cache_requests_total.labels(cache="whatsapp_config", resultado="hit" if hit else "miss").inc()
+    return dict(config) if config else None
+
+
+def invalidate_whatsapp_config_cache() -> None:
+    """Descarta a configuração em cache (neste worker e, via versão, nos demais)."""
+    _cache.invalidar()
+
+
+def chave_identificador(tipo: str, valor: Any) -> str:
+    """Forma normalizada do identificador (display_phone_number: só dígitos)."""
+    valor = str(valor or "").strip()
+    if tipo == "display_phone_number":
+        return "".join(ch for ch in valor if ch.isdigit()) or valor
+    return valor
+
+
+def _carregar_mapa_empresas() -> Dict[str, Dict[str, str]]:
+    from ..models.whatsapp_config_model import WhatsAppConfigModel
+
+    db = SessionLocal()
+    try:
+        # Ordem crescente de prioridade: inativas antes de ativas, mais antigas antes das recentes;
+        # a última atribuição vence (mesma preferência das buscas do repositório)
+        configs = (
+            db.query(WhatsAppConfigModel)
+            .order_by(WhatsAppConfigModel.is_active.asc(), WhatsAppConfigModel.updated_at.asc().nullsfirst())
+            .all()
+        )
+        mapa: Dict[str, Dict[str, str]] = {tipo: {} for tipo in TIPOS_IDENTIFICADOR}
+        for config in configs:
+            for tipo in TIPOS_IDENTIFICADOR:
+                chave = chave_identificador(tipo, getattr(config, tipo))
+                if chave:
+                    mapa[tipo][chave] = str(config.empresa_id)
+        return mapa
+    finally:
+        db.close()
+
+
+def aquecer_mapa_empresas() -> int:
+    """Carrega o mapa identificador -> empresa (startup). Retorna quantos identificadores foram mapeados."""
+    mapa, _ = _cache.get(_CHAVE_MAPA_EMPRESAS, _carregar_mapa_empresas)
+    return sum(len(ids) for ids in mapa.values())
+
+
+def resolver_empresa_whatsapp(tipo: str, valor: Any, consultar_banco: Callable[[], Optional[str]]) -> Optional[str]:
+    """
+    empresa_id (str) dono do identificador do webhook, ou None.
+
+    Consulta o mapa em memória; se o identificador não estiver nele, chama
+    `consultar_banco` (resultado, inclusive None, fica em cache até a próxima invalidação).
+    """
+    chave = chave_identificador(tipo, valor)
+    if not chave:
+        return None
+
+    def carregar() -> Optional[str]:
+        mapa, _ = _cache.get(_CHAVE_MAPA_EMPRESAS, _carregar_mapa_empresas)
+        empresa_id = mapa.get(tipo, {}).get(chave)
+        return empresa_id if empresa_id is not None else consultar_banco()
+
+    empresa_id, hit = _cache.get(f"{tipo}:{chave}", carregar)
+    memory_cache_requests_total.labels(cache="whatsapp_empresa", resultado="hit" if hit else "miss").inc()
+    return empresa_id
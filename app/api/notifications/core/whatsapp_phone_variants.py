@@ -0,0 +1,139 @@
+"""
+Mapeamento aprendido telefone -> variante aceita pelo 360dialog.
+
+O 360dialog pode rejeitar o "to" conforme o formato (com/sem 55, com/sem o nono
+dígito), e o envio tenta as variantes de `variantes_telefone_para_envio_whatsapp`
+em sequência — até quatro chamadas por mensagem. Quando uma variante é aceita,
+ela é gravada em `notifications.whatsapp_phone_variants` (compartilhada entre
+workers, com cache em memória na frente) e passa a ser tentada primeiro.
+
+Nos envios (código async) use as versões `_async`: o cache em memória é consultado
+direto e só a ida ao banco (cache miss / gravação) roda numa thread, sem travar o
+event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.localizacao.adapters.cache_adapter import CacheAdapter
+from app.config import settings
+from app.database.db_connection import SessionLocal
+from app.utils.logger import logger
+from app.utils.prometheus_metrics import memory_cache_requests_total
+from app.utils.telefone import normalizar_telefone_para_armazenar, variantes_telefone_para_envio_whatsapp
+
+from ..models.whatsapp_phone_variant_model import WhatsAppPhoneVariantModel
+
+# "" marca "sem variante aprendida" (o CacheAdapter não distingue None de ausente)
+_SEM_VARIANTE = ""
+
+_memoria = CacheAdapter(
+    max_itens=settings.WHATSAPP_PHONE_VARIANT_CACHE_MAX_ITENS,
+    ttl_segundos=settings.WHATSAPP_PHONE_VARIANT_CACHE_TTL_SEGUNDOS,
+)
+
+
+def _chave(telefone: Optional[str]) -> Optional[str]:
+    if not telefone or not str(telefone).strip():
+        return None
+    return normalizar_telefone_para_armazenar(str(telefone).strip()) or None
+
+
+def variante_aprendida(telefone: Optional[str]) -> Optional[str]:
+    """Variante aceita anteriormente pelo provedor para este telefone (ou None)."""
+    chave = _chave(telefone)
+    if not chave:
+        return None
+
+    valor = _memoria.get(chave)
+    if valor is not None:
+        memory_cache_requests_total.labels(cache="whatsapp_phone_variants", resultado="hit").inc()
+        return valor or None
+    memory_cache_requests_total.labels(cache="whatsapp_phone_variants", resultado="miss").inc()
+
+    try:
+        with SessionLocal() as session:
+            row = (
+                session.query(WhatsAppPhoneVariantModel.variante)
+                .filter(WhatsAppPhoneVariantModel.telefone == chave)
+                .first()
+            )
+    except Exception as e:
+        logger.warning(f"[WhatsAppPhoneVariants] Falha ao ler variante de {chave}: {e}")
+        return None
+
+    valor = row[0] if row else _SEM_VARIANTE
+    _memoria.set(chave, valor)
+    return valor or None
+
+
+def _em_memoria(telefone: Optional[str]) -> bool:
+    """True se `variante_aprendida(telefone)` não precisa ir ao banco."""
+    chave = _chave(telefone)
+    return not chave or _memoria.get(chave) is not None
+
+
+def _com_primeira(aprendida: Optional[str], candidatas: List[str]) -> List[str]:
+    if not aprendida:
+        return list(candidatas)
+    return [aprendida] + [c for c in candidatas if c != aprendida]
+
+
+def priorizar_variantes(telefone: Optional[str], candidatas: List[str]) -> List[str]:
+    """Coloca a variante aprendida (se houver) no início de `candidatas`."""
+    return _com_primeira(variante_aprendida(telefone), candidatas)
+
+
+def variantes_envio_whatsapp(telefone: Optional[str]) -> List[str]:
+    """`variantes_telefone_para_envio_whatsapp` com a variante aprendida primeiro."""
+    return priorizar_variantes(telefone, variantes_telefone_para_envio_whatsapp(telefone))
+
+
+async def variantes_envio_whatsapp_async(telefone: Optional[str]) -> List[str]:
+    """`variantes_envio_whatsapp` para código async (a consulta ao banco roda numa thread)."""
+    if _em_memoria(telefone):
+        aprendida = variante_aprendida(telefone)
+    else:
+        aprendida = await asyncio.to_thread(variante_aprendida, telefone)
+    return _com_primeira(aprendida, variantes_telefone_para_envio_whatsapp(telefone))
+
+
+def registrar_variante_aceita(telefone: Optional[str], variante: Optional[str]) -> None:
+    """Grava a variante aceita pelo provedor (só escreve no banco quando ela muda)."""
+    chave = _chave(telefone)
+    if not chave or not variante:
+        return
+    if _memoria.get(chave) == variante:
+        return
+
+    _memoria.set(chave, variante)
+    agora = datetime.utcnow()
+    try:
+        with SessionLocal() as session:
+            stmt = insert(WhatsAppPhoneVariantModel).values(
+                telefone=chave,
+                variante=variante,
+                created_at=agora,
+                updated_at=agora,
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[WhatsAppPhoneVariantModel.telefone],
+                set_={"variante": stmt.excluded.variante, "updated_at": stmt.excluded.updated_at},
+            )
+            session.execute(stmt)
+            session.commit()
+        logger.info(f"[WhatsAppPhoneVariants] {chave} -> {variante}")
+    except Exception as e:
+        logger.warning(f"[WhatsAppPhoneVariants] Falha ao gravar variante de {chave}: {e}")
+
+
+async def registrar_variante_aceita_async(telefone: Optional[str], variante: Optional[str]) -> None:
+    """`registrar_variante_aceita` para código async (o upsert roda numa thread)."""
+    chave = _chave(telefone)
+    if not chave or not variante or _memoria.get(chave) == variante:
+        return
+    await asyncio.to_thread(registrar_variante_aceita, telefone, variante)
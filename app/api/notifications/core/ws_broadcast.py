@@ -0,0 +1,231 @@
+"""
+Backends de broadcast entre workers para o ConnectionManager (WebSocket).
+
+Cada worker (processo uvicorn/gunicorn) mantém apenas as conexões WebSocket que
+ele aceitou. Para que um evento emitido no worker A chegue aos sockets do
+worker B, o ConnectionManager publica o envelope em um backend de broadcast e
+cada worker entrega localmente ao receber.
+
+Backends:
+- InProcessBroadcastBackend: sem infraestrutura; entrega apenas para managers do
+  mesmo processo (útil em testes e quando há um único worker).
+- PostgresBroadcastBackend: usa LISTEN/NOTIFY do próprio Postgres da aplicação.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OnMessage = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Limite do payload do NOTIFY é 8000 bytes; deixamos margem.
+_NOTIFY_MAX_BYTES = 7900
+_COMPRESSED_PREFIX = "z:"
+
+
+class BroadcastBackend(ABC):
+    """Interface para backends de broadcast entre workers."""
+
+    # True quando o backend entrega para outros processos (ex.: Postgres).
+    distributed: bool = False
+
+    @abstractmethod
+    async def start(self, on_message: OnMessage) -> None:
+        """Começa a escutar mensagens publicadas por qualquer worker."""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Para de escutar e libera recursos."""
+
+    @abstractmethod
+    async def publish(self, envelope: Dict[str, Any]) -> None:
+        """Publica um envelope para todos os workers (inclusive o próprio)."""
+
+
+class InProcessBroadcastBackend(BroadcastBackend):
+    """
+    Backend em memória. Managers que compartilham o mesmo `hub` recebem as
+    mensagens uns dos outros, simulando múltiplos workers em um único processo.
+    """
+
+    def __init__(self, hub: Optional[List[OnMessage]] = None):
+        self._hub: List[OnMessage] = hub if hub is not None else []
+        self._on_message: Optional[OnMessage] = None
+
+    async def start(self, on_message: OnMessage) -> None:
+        self._on_message = on_message
+        self._hub.append(on_message)
+
+    async def stop(self) -> None:
+        if self._on_message in self._hub:
+            self._hub.remove(self._on_message)
+        self._on_message = None
+
+    async def publish(self, envelope: Dict[str, Any]) -> None:
+        for on_message in list(self._hub):
+            try:
+                await on_message(envelope)
+            except Exception as e:
+                logger.error(f"[WS_BROADCAST] Erro ao entregar mensagem em memória: {e}")
+
+
+def _encode(envelope: Dict[str, Any]) -> Optional[str]:
+    data = json.dumps(envelope, default=str, separators=(",", ":"))
+    if len(data.encode("utf-8")) <= _NOTIFY_MAX_BYTES:
+        return data
+    compressed = _COMPRESSED_PREFIX + base64.b64encode(zlib.compress(data.encode("utf-8"))).decode("ascii")
+    if len(compressed) <= _NOTIFY_MAX_BYTES:
+        return compressed
+    return None
+
+
+def _decode(payload: str) -> Dict[str, Any]:
+    if payload.startswith(_COMPRESSED_PREFIX):
+        payload = zlib.decompress(base64.b64decode(payload[len(_COMPRESSED_PREFIX):])).decode("utf-8")
+    return json.loads(payload)
+
+
+class PostgresBroadcastBackend(BroadcastBackend):
+    """
+    Broadcast via Postgres LISTEN/NOTIFY.
+
+    - Uma conexão dedicada (autocommit) faz LISTEN e é lida pelo event loop (add_reader).
+    - Publicações usam `pg_notify` em uma conexão do pool, fora do event loop.
+    - Se a conexão de escuta cair, reconecta com backoff.
+    """
+
+    distributed = True
+
+    def __init__(self, channel: str = "ws_broadcast", engine=None):
+        self.channel = channel
+        self._engine = engine
+        self._listen_conn = None
+        self._raw_conn = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._on_message: Optional[OnMessage] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._publish_lock = threading.Lock()
+
+    def _get_engine(self):
+        if self._engine is None:
+            from app.database.db_connection import engine
+            self._engine = engine
+        return self._engine
+
+    async def start(self, on_message: OnMessage) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._on_message = on_message
+        self._stopping = False
+        await self._connect_listener()
+
+    async def _connect_listener(self) -> None:
+        raw = await asyncio.to_thread(self._get_engine().raw_connection)
+        conn = getattr(raw, "driver_connection", None) or raw.connection
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f'LISTEN "{self.channel}"')
+        self._raw_conn = raw
+        self._listen_conn = conn
+        self._loop.add_reader(conn.fileno(), self._on_readable)
+        logger.info(f"[WS_BROADCAST] LISTEN ativo no canal '{self.channel}'")
+
+    def _close_listener(self) -> None:
+        conn = self._listen_conn
+        self._listen_conn = None
+        if conn is not None and self._loop is not None:
+            try:
+                self._loop.remove_reader(conn.fileno())
+            except Exception:
+                pass
+        if self._raw_conn is not None:
+            try:
+                # Conexão em LISTEN não deve voltar ao pool
+                self._raw_conn.invalidate()
+            except Exception:
+                pass
+            self._raw_conn = None
+
+    def _on_readable(self) -> None:
+        conn = self._listen_conn
+        if conn is None:
+            return
+        try:
+            conn.poll()
+        except Exception as e:
+            logger.error(f"[WS_BROADCAST] Conexão LISTEN perdida: {e}")
+            self._close_listener()
+            self._schedule_reconnect()
+            return
+
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            try:
+                envelope = _decode(notify.payload)
+            except Exception as e:
+                logger.error(f"[WS_BROADCAST] Payload inválido recebido: {e}")
+                continue
+            if self._on_message is not None:
+                self._loop.create_task(self._on_message(envelope))
+
+    def _schedule_reconnect(self) -> None:
+        if self._stopping or (self._reconnect_task and not self._reconnect_task.done()):
+            return
+        self._reconnect_task = self._loop.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        delay = 1.0
+        while not self._stopping:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect_listener()
+                return
+            except Exception as e:
+                logger.warning(f"[WS_BROADCAST] Falha ao reconectar LISTEN (nova tentativa em {delay:.0f}s): {e}")
+                delay = min(delay * 2, 30.0)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        self._close_listener()
+        self._on_message = None
+
+    async def publish(self, envelope: Dict[str, Any]) -> None:
+        payload = _encode(envelope)
+        if payload is None:
+            logger.warning(
+                "[WS_BROADCAST] Mensagem excede o limite do NOTIFY; entregue apenas no worker de origem."
+            )
+            return
+        await asyncio.to_thread(self._notify, payload)
+
+    def _notify(self, payload: str) -> None:
+        from sqlalchemy import text
+
+        with self._publish_lock:
+            with self._get_engine().connect() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+                conn.commit()
+
+
+def create_broadcast_backend() -> BroadcastBackend:
+    """
+    Cria o backend configurado por `WS_BROADCAST_BACKEND`:
+    - "postgres" (padrão): LISTEN/NOTIFY
+    - "memory": apenas o processo atual
+    """
+    kind = os.getenv("WS_BROADCAST_BACKEND", "postgres").strip().lower()
+    if kind == "memory":
+        return InProcessBroadcastBackend()
+    return PostgresBroadcastBackend(channel=os.getenv("WS_BROADCAST_CHANNEL", "ws_broadcast"))
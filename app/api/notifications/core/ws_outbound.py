@@ -0,0 +1,185 @@
+"""
+Fila de saída por conexão WebSocket.
+
+Quem emite eventos (criação de pedido, chatbot etc.) apenas enfileira o texto já
+serializado; uma task por conexão faz o envio. Assim um cliente lento nunca
+bloqueia o produtor, e a memória por conexão fica limitada a `max_size` mensagens.
+
+Políticas quando a fila está cheia:
+- drop_oldest: descarta a mensagem mais antiga
+- coalesce: substitui a mensagem pendente com a mesma chave de evento
+  (se não houver, descarta a mais antiga)
+- disconnect: desconecta o cliente
+
+A fila e a task pertencem ao loop em que a conexão foi aceita. Serviços síncronos
+que emitem eventos via `asyncio.run` em outra thread chamam `enqueue` fora desse
+loop; nesse caso a operação é repassada ao loop da conexão com `call_soon_threadsafe`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from app.utils.prometheus_metrics import websocket_outbound_overflow_total, websocket_outbound_queue_depth
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_COALESCE = "coalesce"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE, OVERFLOW_DISCONNECT)
+
+# Chamado quando a conexão deve ser encerrada (erro, timeout ou overflow com "disconnect")
+OnFailure = Callable[[WebSocket, str], Awaitable[None]]
+
+# Referências fortes para as tasks de encerramento (o loop guarda apenas referências fracas)
+_background_tasks: Set[asyncio.Task] = set()
+
+
+class ConnectionSender:
+    """Fila limitada + task de envio de uma conexão WebSocket."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_failure: OnFailure,
+        max_size: int = 100,
+        overflow_policy: str = OVERFLOW_DROP_OLDEST,
+        send_timeout_seconds: float = 5.0,
+    ):
+        self.websocket = websocket
+        self.max_size = max(1, int(max_size))
+        self.overflow_policy = overflow_policy if overflow_policy in OVERFLOW_POLICIES else OVERFLOW_DROP_OLDEST
+        self.send_timeout_seconds = send_timeout_seconds
+        self._on_failure = on_failure
+        self._queue: Deque[Tuple[Optional[str], str]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = self._loop.create_task(self._run())
+
+    def _fora_do_loop(self) -> bool:
+        """True se chamado de outra thread/loop que não o da task de envio."""
+        if self._loop is None:
+            return False
+        try:
+            return asyncio.get_running_loop() is not self._loop
+        except RuntimeError:
+            return True
+
+    def _no_loop(self, callback: Callable[..., object], *args: object) -> bool:
+        """Agenda `callback` no loop da conexão; False se o loop já foi encerrado."""
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+            return True
+        except RuntimeError:
+            return False
+
+    def stop(self) -> None:
+        """Encerra a task e descarta mensagens pendentes (não faz await)."""
+        if self._closed:
+            return
+        self._closed = True
+        websocket_outbound_queue_depth.dec(len(self._queue))
+        self._queue.clear()
+        if self._task is None:
+            return
+        if self._fora_do_loop():
+            # Task.cancel não é thread-safe: cancela no loop dono da task
+            self._no_loop(self._task.cancel)
+        elif self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def enqueue(self, data: str, key: Optional[str] = None) -> bool:
+        """
+        Enfileira uma mensagem já serializada.
+
+        Retorna False se a conexão está encerrada ou foi desconectada por overflow.
+        Chamado de outra thread/loop, a mensagem é repassada ao loop da conexão e o
+        retorno só reflete se o repasse foi aceito.
+        """
+        if self._closed:
+            return False
+        if self._fora_do_loop():
+            return self._no_loop(self._enqueue, data, key)
+        return self._enqueue(data, key)
+
+    def _enqueue(self, data: str, key: Optional[str]) -> bool:
+        if self._closed:
+            return False
+
+        if len(self._queue) >= self.max_size:
+            if self.overflow_policy == OVERFLOW_DISCONNECT:
+                websocket_outbound_overflow_total.labels(acao=OVERFLOW_DISCONNECT).inc()
+                logger.warning(
+                    f"[WS_OUTBOUND] Fila cheia ({self.max_size}); desconectando websocket={id(self.websocket)}"
+                )
+                self._fail("fila de saída cheia")
+                return False
+
+            if self.overflow_policy == OVERFLOW_COALESCE and key is not None:
+                for i, (pending_key, _) in enumerate(self._queue):
+                    if pending_key == key:
+                        # Remove a versão pendente; a nova vai para o fim da fila
+                        del self._queue[i]
+                        self._queue.append((key, data))
+                        websocket_outbound_overflow_total.labels(acao=OVERFLOW_COALESCE).inc()
+                        self._wakeup.set()
+                        return True
+
+            self._queue.popleft()
+            websocket_outbound_queue_depth.dec()
+            websocket_outbound_overflow_total.labels(acao=OVERFLOW_DROP_OLDEST).inc()
+
+        self._queue.append((key, data))
+        websocket_outbound_queue_depth.inc()
+        self._wakeup.set()
+        return True
+
+    async def _run(self) -> None:
+        try:
+            while not self._closed:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                _, data = self._queue.popleft()
+                websocket_outbound_queue_depth.dec()
+                try:
+                    # asyncio.timeout (e não wait_for) para não engolir o cancelamento da task
+                    async with asyncio.timeout(self.send_timeout_seconds):
+                        await self.websocket.send_text(data)
+                except TimeoutError:
+                    self._fail(f"timeout de {self.send_timeout_seconds}s no envio")
+                    return
+                except Exception as e:
+                    self._fail(f"erro no envio: {e}")
+                    return
+        except asyncio.CancelledError:
+            pass
+
+    def _fail(self, motivo: str) -> None:
+        if self._closed:
+            return
+        if self._fora_do_loop():
+            # A task de encerramento precisa rodar no loop da conexão (um loop temporário a cancelaria)
+            self._no_loop(self._fail, motivo)
+            return
+        self.stop()
+        # Em task separada: o handler desconecta a conexão, o que chamaria stop() sobre esta task
+        task = asyncio.get_running_loop().create_task(self._on_failure(self.websocket, motivo))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
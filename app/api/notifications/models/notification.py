@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Enum, TypeDecorator
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Enum, TypeDecorator, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum as PyEnum
@@ -92,7 +92,11 @@ class MessageType(PyEnum):
 
 class Notification(Base):
     __tablename__ = "notifications"
-    __table_args__ = {"schema": "notifications"}
+    __table_args__ = (
+        # Reserva do outbox: status pendente/retrying com next_retry_at vencido
+        Index("ix_notifications_outbox", "status", "next_retry_at", "created_at"),
+        {"schema": "notifications"},
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     empresa_id = Column(String, nullable=False, index=True)
@@ -117,11 +121,17 @@ class Notification(Base):
     recipient = Column(String, nullable=False)  # email, phone, webhook_url, etc.
     channel_metadata = Column(JSON, nullable=True)  # configurações específicas do canal
     
+    # Disparo em massa que gerou a notificação (acompanhamento de progresso)
+    job_id = Column(String, nullable=True, index=True)
+    
     # Controle de tentativas
     attempts = Column(Integer, default=0)
     max_attempts = Column(Integer, default=3)
     last_attempt_at = Column(DateTime, nullable=True)
     next_retry_at = Column(DateTime, nullable=True)
+    # Envio agendado (UTC). Na criação, next_retry_at recebe o mesmo valor: é por ele
+    # que o outbox decide quando a notificação fica disponível para envio.
+    scheduled_at = Column(DateTime, nullable=True)
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
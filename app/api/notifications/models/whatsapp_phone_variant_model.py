@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+
+from app.database.db_connection import Base
+
+
+class WhatsAppPhoneVariantModel(Base):
+    """
+    Variante de telefone aceita pelo provedor de WhatsApp (360dialog) para cada cliente.
+
+    `telefone` é o número canônico (`normalizar_telefone_para_armazenar`);
+    `variante` é o valor de "to" que o provedor aceitou por último (com/sem 55, com/sem 9).
+    """
+
+    __tablename__ = "whatsapp_phone_variants"
+    __table_args__ = {"schema": "notifications"}
+
+    telefone = Column(String(20), primary_key=True)
+    variante = Column(String(20), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import and_, or_, desc, func, insert
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import logging
+import uuid
 
 from ..models.notification import Notification, NotificationLog, NotificationStatus, NotificationChannel, NotificationPriority, MessageType
 from ..schemas.notification_schemas import NotificationFilter
@@ -124,6 +125,54 @@ class NotificationRepository:
             logger.error(f"Erro ao criar notificação: {e}")
             raise
     
+    def bulk_create(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """
+        Cria várias notificações em um único INSERT em lote (sem carregar objetos ORM).
+
+        Os valores de channel/priority/message_type podem vir como string ou enum;
+        o EnumValueType normaliza para o valor em minúsculas.
+        """
+        if not rows:
+            return []
+        
+        now = datetime.utcnow()
+        values = []
+        for row in rows:
+            data = dict(row)
+            data.setdefault("id", str(uuid.uuid4()))
+            data.setdefault("status", NotificationStatus.PENDING)
+            data.setdefault("priority", NotificationPriority.NORMAL)
+            data.setdefault("message_type", MessageType.UTILITY)
+            data.setdefault("attempts", 0)
+            data.setdefault("created_at", now)
+            # Mesmo conjunto de colunas em todas as linhas (um único INSERT em lote)
+            data.setdefault("job_id", None)
+            data.setdefault("scheduled_at", None)
+            data.setdefault("next_retry_at", None)
+            values.append(data)
+        
+        try:
+            self.db.execute(insert(Notification), values)
+            self.db.commit()
+            return [v["id"] for v in values]
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Erro ao criar notificações em lote: {e}")
+            raise
+    
+    def get_job_progress(self, job_id: str) -> Dict[str, int]:
+        """Conta as notificações de um disparo (job_id) por status"""
+        rows = (
+            self.db.query(Notification.status, func.count(Notification.id))
+            .filter(Notification.job_id == job_id)
+            .group_by(Notification.status)
+            .all()
+        )
+        return {
+            (status.value if hasattr(status, "value") else str(status)): int(total)
+            for status, total in rows
+        }
+    
     def get_by_id(self, notification_id: str) -> Optional[Notification]:
         """Busca notificação por ID"""
         return self.db.query(Notification).filter(Notification.id == notification_id).first()
@@ -157,6 +206,80 @@ class NotificationRepository:
             .all()
         )
     
+    def claim_due_notifications(self, limit: int = 50, lease_seconds: int = 120) -> List[Notification]:
+        """
+        Reserva notificações prontas para envio (pendentes ou aguardando nova tentativa).
+
+        Usa `FOR UPDATE SKIP LOCKED`, então vários workers/processos podem reservar em
+        paralelo sem pegar as mesmas linhas. A reserva é um lease: `next_retry_at` é
+        empurrado para frente, e se o worker morrer a notificação volta a ficar disponível.
+        """
+        now = datetime.utcnow()
+        try:
+            notifications = (
+                self.db.query(Notification)
+                .filter(
+                    and_(
+                        Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.RETRYING]),
+                        or_(
+                            Notification.next_retry_at.is_(None),
+                            Notification.next_retry_at <= now
+                        )
+                    )
+                )
+                # Ordem pelo vencimento: sem next_retry_at (novas) primeiro, depois agendadas/retries
+                .order_by(Notification.next_retry_at.asc().nullsfirst(), Notification.created_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            lease_until = now + timedelta(seconds=lease_seconds)
+            for notification in notifications:
+                notification.next_retry_at = lease_until
+            self.db.commit()
+            return notifications
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Erro ao reservar notificações pendentes: {e}")
+            return []
+
+    def reservar_para_entrega(
+        self, notification_id: str, lease_seconds: int = 120, lease_atual: Optional[datetime] = None
+    ) -> bool:
+        """
+        Confirma, logo antes do envio, que a notificação ainda cabe a este worker e renova o lease.
+
+        Com `lease_atual` (o `next_retry_at` gravado por `claim_due_notifications`) exige que
+        o lease não tenha mudado: se venceu e outro worker reservou, enviou ou falhou a
+        notificação, retorna False. Sem ele (entrega manual), exige status pendente,
+        retrying ou failed e nenhum lease em vigor.
+        """
+        now = datetime.utcnow()
+        query = self.db.query(Notification).filter(Notification.id == notification_id)
+        if lease_atual is not None:
+            query = query.filter(
+                Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.RETRYING]),
+                Notification.next_retry_at == lease_atual,
+            )
+        else:
+            query = query.filter(
+                Notification.status.in_(
+                    [NotificationStatus.PENDING, NotificationStatus.RETRYING, NotificationStatus.FAILED]
+                ),
+                or_(Notification.next_retry_at.is_(None), Notification.next_retry_at <= now),
+            )
+        try:
+            atualizadas = query.update(
+                {Notification.next_retry_at: now + timedelta(seconds=lease_seconds)},
+                synchronize_session=False,
+            )
+            self.db.commit()
+            return atualizadas == 1
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Erro ao confirmar reserva da notificação {notification_id}: {e}")
+            return False
+
     def get_failed_notifications(self, max_attempts: int = 3, limit: int = 100) -> List[Notification]:
         """Busca notificações que falharam e podem ser reprocessadas"""
         return (
@@ -206,7 +329,12 @@ class NotificationRepository:
             logger.error(f"Erro ao atualizar status da notificação {notification_id}: {e}")
             return False
     
-    def increment_attempts(self, notification_id: str) -> bool:
+    def increment_attempts(
+        self,
+        notification_id: str,
+        backoff_base_seconds: int = 60,
+        backoff_max_seconds: int = 3600,
+    ) -> bool:
         """Incrementa contador de tentativas"""
         try:
             notification = self.get_by_id(notification_id)
@@ -216,10 +344,10 @@ class NotificationRepository:
             notification.attempts += 1
             notification.last_attempt_at = datetime.utcnow()
             
-            # Calcula próxima tentativa (backoff exponencial)
+            # Calcula próxima tentativa (backoff exponencial; padrão 2, 4, 8 minutos)
             if notification.attempts < notification.max_attempts:
-                delay_minutes = 2 ** notification.attempts  # 2, 4, 8 minutos
-                notification.next_retry_at = datetime.utcnow() + timedelta(minutes=delay_minutes)
+                delay_seconds = min(backoff_base_seconds * (2 ** notification.attempts), backoff_max_seconds)
+                notification.next_retry_at = datetime.utcnow() + timedelta(seconds=delay_seconds)
                 notification.status = NotificationStatus.RETRYING
             else:
                 notification.status = NotificationStatus.FAILED
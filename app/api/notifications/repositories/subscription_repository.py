@@ -4,6 +4,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
 
+from ..core.subscription_index import SubscriptionSnapshot, subscription_index
 from ..models.subscription import NotificationSubscription
 from ..schemas.subscription_schemas import SubscriptionFilter
 
@@ -22,6 +23,7 @@ class SubscriptionRepository:
             self.db.add(subscription)
             self.db.commit()
             self.db.refresh(subscription)
+            subscription_index.invalidar()
             
             logger.info(f"Assinatura criada: {subscription.id}")
             return subscription
@@ -45,8 +47,15 @@ class SubscriptionRepository:
             .all()
         )
     
-    def get_active_subscriptions(self, empresa_id: str, event_type: str) -> List[NotificationSubscription]:
-        """Busca assinaturas ativas para um evento específico"""
+    def get_active_subscriptions(self, empresa_id: str, event_type: str) -> List[SubscriptionSnapshot]:
+        """Busca assinaturas ativas para um evento específico (via índice em memória)"""
+        return subscription_index.get(
+            empresa_id,
+            event_type,
+            lambda: self._query_active_subscriptions(empresa_id, event_type),
+        )
+
+    def _query_active_subscriptions(self, empresa_id: str, event_type: str) -> List[NotificationSubscription]:
         return (
             self.db.query(NotificationSubscription)
             .filter(
@@ -83,6 +92,7 @@ class SubscriptionRepository:
             
             subscription.updated_at = datetime.utcnow()
             self.db.commit()
+            subscription_index.invalidar()
             
             logger.info(f"Assinatura {subscription_id} atualizada")
             return True
@@ -100,6 +110,7 @@ class SubscriptionRepository:
             
             self.db.delete(subscription)
             self.db.commit()
+            subscription_index.invalidar()
             
             logger.info(f"Assinatura {subscription_id} removida")
             return True
@@ -118,6 +129,7 @@ class SubscriptionRepository:
             subscription.active = not subscription.active
             subscription.updated_at = datetime.utcnow()
             self.db.commit()
+            subscription_index.invalidar()
             
             status = "ativada" if subscription.active else "desativada"
             logger.info(f"Assinatura {subscription_id} {status}")
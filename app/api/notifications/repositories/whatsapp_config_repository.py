@@ -2,6 +2,7 @@ from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 
+from ..core.whatsapp_config_cache import invalidate_whatsapp_config_cache
 from ..models.whatsapp_config_model import WhatsAppConfigModel
 
 
@@ -22,6 +23,7 @@ class WhatsAppConfigRepository:
             self.db.add(config)
             logger.info("Added to session, committing")
             self.db.commit()
+            invalidate_whatsapp_config_cache()
             logger.info("Committed, refreshing")
             self.db.refresh(config)
             logger.info(f"Config created successfully: id={config.id}, empresa_id={config.empresa_id}")
@@ -291,6 +293,7 @@ class WhatsAppConfigRepository:
                 setattr(config, key, value)
 
         self.db.commit()
+        invalidate_whatsapp_config_cache()
         self.db.refresh(config)
         return config
 
@@ -301,5 +304,6 @@ class WhatsAppConfigRepository:
 
         self.db.delete(config)
         self.db.commit()
+        invalidate_whatsapp_config_cache()
         return True
 
@@ -14,7 +14,8 @@ from ..repositories.event_repository import EventRepository
 from ..schemas.message_dispatch_schemas import (
     DispatchMessageRequest,
     DispatchMessageResponse,
-    BulkDispatchRequest
+    BulkDispatchRequest,
+    DispatchJobProgress
 )
 from ..models.notification import MessageType
 from ..adapters.recipient_adapters import ClienteRecipientAdapter, CompositeRecipientAdapter
@@ -102,6 +103,23 @@ async def bulk_dispatch_message(
         logger.error(f"Erro no disparo em massa: {e}")
         raise HTTPException(status_code=500, detail=f"Erro no disparo em massa: {str(e)}")
 
+@router.get("/jobs/{job_id}", response_model=DispatchJobProgress)
+async def get_dispatch_job(
+    job_id: str,
+    service: MessageDispatchService = Depends(get_message_dispatch_service),
+    current_user = Depends(get_current_user)
+):
+    """
+    Consulta o progresso de um disparo (job_id retornado por /dispatch ou /bulk-dispatch).
+    """
+    try:
+        return service.get_dispatch_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao consultar disparo {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar disparo: {str(e)}")
+
 @router.get("/stats")
 async def get_dispatch_stats(
     empresa_id: str = Query(..., description="ID da empresa"),
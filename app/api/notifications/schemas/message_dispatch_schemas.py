@@ -59,12 +59,23 @@ class DispatchMessageResponse(BaseModel):
     """Resposta do disparo de mensagens"""
     success: bool = Field(..., description="Indica se o disparo foi iniciado com sucesso")
     message_type: MessageType = Field(..., description="Tipo da mensagem disparada")
+    job_id: Optional[str] = Field(None, description="ID do disparo (consultar progresso em /messages/jobs/{job_id})")
     notification_ids: List[str] = Field(..., description="IDs das notificações criadas")
     total_recipients: int = Field(..., description="Total de destinatários")
     channels_used: List[NotificationChannel] = Field(..., description="Canais utilizados")
     scheduled: bool = Field(False, description="Indica se a mensagem foi agendada")
     scheduled_at: Optional[datetime] = Field(None, description="Data/hora do agendamento")
 
+class DispatchJobProgress(BaseModel):
+    """Progresso de um disparo de mensagens"""
+    job_id: str = Field(..., description="ID do disparo")
+    total: int = Field(..., description="Total de notificações do disparo")
+    pending: int = Field(..., description="Aguardando envio (pendentes ou em nova tentativa)")
+    sent: int = Field(..., description="Enviadas")
+    failed: int = Field(..., description="Falharam definitivamente")
+    cancelled: int = Field(0, description="Canceladas")
+    finished: bool = Field(..., description="Indica se não há mais notificações aguardando envio")
+
 class BulkDispatchRequest(BaseModel):
     """Schema para disparo em massa de mensagens"""
     empresa_id: str = Field(..., description="ID da empresa")
@@ -84,6 +95,9 @@ class BulkDispatchRequest(BaseModel):
     # Limites
     max_recipients: Optional[int] = Field(None, ge=1, description="Limite máximo de destinatários")
     
+    # Agendamento
+    scheduled_at: Optional[datetime] = Field(None, description="Data/hora para envio agendado (opcional)")
+    
     @field_validator('channels')
     @classmethod
     def validate_channels(cls, v):
@@ -49,6 +49,7 @@ class CreateNotificationRequest(BaseModel):
     message_type: MessageType = Field(..., description="Tipo da mensagem (marketing, utility, transactional, etc)")
     channel_metadata: Optional[Dict[str, Any]] = Field(None, description="Metadados específicos do canal")
     max_attempts: int = Field(3, ge=1, le=10, description="Número máximo de tentativas")
+    scheduled_at: Optional[datetime] = Field(None, description="Data/hora para envio agendado (opcional)")
 
 class SendNotificationRequest(BaseModel):
     empresa_id: str = Field(..., description="ID da empresa")
@@ -81,6 +82,7 @@ class NotificationResponse(BaseModel):
     max_attempts: int
     last_attempt_at: Optional[datetime]
     next_retry_at: Optional[datetime]
+    scheduled_at: Optional[datetime] = None
     created_at: datetime
     sent_at: Optional[datetime]
     failed_at: Optional[datetime]
@@ -1,20 +1,49 @@
 from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import asyncio
 import logging
+import time
 from sqlalchemy.orm import Session
 from sqlalchemy import text, func
 
+from app.config import settings
+from app.database.db_connection import SessionLocal
+from app.utils.prometheus_metrics import dashboard_section_duration_seconds
+from ..core.stale_cache import StaleWhileRevalidateCache
 from ..repositories.event_repository import EventRepository
 from ..repositories.notification_repository import NotificationRepository
 from ..repositories.subscription_repository import SubscriptionRepository
 
 logger = logging.getLogger(__name__)
 
+# (chave no resultado, método da seção)
+_SECOES = (
+    ("resumo", "_get_resumo_geral"),
+    ("atividade", "_get_atividade_recente"),
+    ("pedidos", "_get_dados_pedidos"),
+    ("usuarios", "_get_dados_usuarios"),
+    ("sistema", "_get_dados_sistema"),
+    ("notificacoes", "_get_dados_notificacoes"),
+    ("performance", "_get_dados_performance"),
+    ("alertas", "_get_alertas"),
+)
+
+# Pool próprio: as seções não disputam o executor padrão usado por asyncio.to_thread
+_executor = ThreadPoolExecutor(max_workers=settings.DASHBOARD_THREADS, thread_name_prefix="dashboard")
+
+_dashboard_cache = StaleWhileRevalidateCache(
+    nome="dashboard",
+    ttl_segundos=settings.DASHBOARD_CACHE_TTL_SEGUNDOS,
+    stale_segundos=settings.DASHBOARD_CACHE_STALE_SEGUNDOS,
+)
+
 class DashboardService:
     """Serviço para dashboard unificado com dados de todo o sistema"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, session_factory=SessionLocal):
         self.db = db
+        self._session_factory = session_factory
         self.event_repo = EventRepository(db)
         self.notification_repo = NotificationRepository(db)
         self.subscription_repo = SubscriptionRepository(db)
@@ -24,34 +53,44 @@ class DashboardService:
         empresa_id: str,
         periodo_dias: int = 30
     ) -> Dict[str, Any]:
-        """Dashboard completo com todos os dados da empresa"""
+        """
+        Dashboard completo com todos os dados da empresa.
+
+        Resultado em cache por (empresa, período): dentro do TTL é servido direto;
+        até o limite de "stale" é servido o valor antigo enquanto um refresh roda
+        em segundo plano; depois disso é recalculado na hora.
+        """
         try:
-            data_fim = datetime.utcnow()
-            data_inicio = data_fim - timedelta(days=periodo_dias)
-            
-            # Executa todas as consultas em paralelo
-            dados = await self._buscar_dados_dashboard(empresa_id, data_inicio, data_fim)
-            
-            return {
-                "empresa_id": empresa_id,
-                "periodo": {
-                    "dias": periodo_dias,
-                    "inicio": data_inicio.isoformat(),
-                    "fim": data_fim.isoformat()
-                },
-                "resumo": dados["resumo"],
-                "atividade": dados["atividade"],
-                "pedidos": dados["pedidos"],
-                "usuarios": dados["usuarios"],
-                "sistema": dados["sistema"],
-                "notificacoes": dados["notificacoes"],
-                "performance": dados["performance"],
-                "alertas": dados["alertas"]
-            }
-            
+            return await _dashboard_cache.get(
+                (str(empresa_id), int(periodo_dias)),
+                lambda: self._montar_dashboard(empresa_id, periodo_dias),
+            )
         except Exception as e:
             logger.error(f"Erro ao buscar dashboard completo da empresa {empresa_id}: {e}")
             raise
+
+    async def _montar_dashboard(self, empresa_id: str, periodo_dias: int) -> Dict[str, Any]:
+        data_fim = datetime.utcnow()
+        data_inicio = data_fim - timedelta(days=periodo_dias)
+
+        dados = await self._buscar_dados_dashboard(empresa_id, data_inicio, data_fim)
+
+        return {
+            "empresa_id": empresa_id,
+            "periodo": {
+                "dias": periodo_dias,
+                "inicio": data_inicio.isoformat(),
+                "fim": data_fim.isoformat()
+            },
+            "resumo": dados["resumo"],
+            "atividade": dados["atividade"],
+            "pedidos": dados["pedidos"],
+            "usuarios": dados["usuarios"],
+            "sistema": dados["sistema"],
+            "notificacoes": dados["notificacoes"],
+            "performance": dados["performance"],
+            "alertas": dados["alertas"]
+        }
     
     async def _buscar_dados_dashboard(
         self,
@@ -59,44 +98,35 @@ class DashboardService:
         data_inicio: datetime,
         data_fim: datetime
     ) -> Dict[str, Any]:
-        """Busca todos os dados do dashboard"""
-        
-        # Resumo geral
-        resumo = await self._get_resumo_geral(empresa_id, data_inicio, data_fim)
-        
-        # Atividade recente
-        atividade = await self._get_atividade_recente(empresa_id, data_inicio, data_fim)
-        
-        # Dados de pedidos
-        pedidos = await self._get_dados_pedidos(empresa_id, data_inicio, data_fim)
-        
-        # Dados de usuários
-        usuarios = await self._get_dados_usuarios(empresa_id, data_inicio, data_fim)
-        
-        # Dados do sistema
-        sistema = await self._get_dados_sistema(empresa_id, data_inicio, data_fim)
-        
-        # Dados de notificações
-        notificacoes = await self._get_dados_notificacoes(empresa_id, data_inicio, data_fim)
-        
-        # Performance
-        performance = await self._get_dados_performance(empresa_id, data_inicio, data_fim)
-        
-        # Alertas
-        alertas = await self._get_alertas(empresa_id, data_inicio, data_fim)
-        
-        return {
-            "resumo": resumo,
-            "atividade": atividade,
-            "pedidos": pedidos,
-            "usuarios": usuarios,
-            "sistema": sistema,
-            "notificacoes": notificacoes,
-            "performance": performance,
-            "alertas": alertas
-        }
+        """Busca todas as seções do dashboard em paralelo (uma sessão por seção, no pool de threads)"""
+        loop = asyncio.get_running_loop()
+        resultados = await asyncio.gather(*(
+            loop.run_in_executor(
+                _executor, self._executar_secao, secao, metodo, empresa_id, data_inicio, data_fim
+            )
+            for secao, metodo in _SECOES
+        ))
+        return {secao: resultado for (secao, _), resultado in zip(_SECOES, resultados)}
+
+    def _executar_secao(
+        self,
+        secao: str,
+        metodo: str,
+        empresa_id: str,
+        data_inicio: datetime,
+        data_fim: datetime
+    ) -> Dict[str, Any]:
+        """Executa uma seção em sessão própria (Session não é thread-safe)"""
+        inicio = time.perf_counter()
+        db = self._session_factory()
+        try:
+            service = DashboardService(db, session_factory=self._session_factory)
+            return getattr(service, metodo)(empresa_id, data_inicio, data_fim)
+        finally:
+            db.close()
+            dashboard_section_duration_seconds.labels(secao=secao).observe(time.perf_counter() - inicio)
     
-    async def _get_resumo_geral(
+    def _get_resumo_geral(
         self,
         empresa_id: str,
         data_inicio: datetime,
@@ -141,7 +171,7 @@ class DashboardService:
             logger.error(f"Erro ao buscar resumo geral: {e}")
             return {}
     
-    async def _get_atividade_recente(
+    def _get_atividade_recente(
         self,
         empresa_id: str,
         data_inicio: datetime,
@@ -173,7 +203,7 @@ class DashboardService:
             logger.error(f"Erro ao buscar atividade recente: {e}")
             return {}
     
-    async def _get_dados_pedidos(
+    def _get_dados_pedidos(
         self,
         empresa_id: str,
         data_inicio: datetime,
@@ -204,7 +234,7 @@ class DashboardService:
             logger.error(f"Erro ao buscar dados de pedidos: {e}")
             return {}
     
-    async def _get_dados_usuarios(
+    def _get_dados_usuarios(
         self,
         empresa_id: str,
         data_inicio: datetime,
@@ -231,7 +261,7 @@ class DashboardService:
             logger.error(f"Erro ao buscar dados de usuários: {e}")
             return {}
     
-    async def _get_dados_sistema(
+    def _get_dados_sistema(
         self,
         empresa_id: str,
         data_inicio: datetime,
@@ -258,7 +288,7 @@ class DashboardService:
             logger.error(f"Erro ao buscar dados do sistema: {e}")
             return {}
     
-    async def _get_dados_notificacoes(
+    def _get_dados_notificacoes(
         self,
         empresa_id: str,
         data_inicio: datetime,
@@ -285,7 +315,7 @@ class DashboardService:
             logger.error(f"Erro ao buscar dados de notificações: {e}")
             return {}
     
-    async def _get_dados_performance(
+    def _get_dados_performance(
         self,
         empresa_id: str,
         data_inicio: datetime,
@@ -312,7 +342,7 @@ class DashboardService:
             logger.error(f"Erro ao buscar dados de performance: {e}")
             return {}
     
-    async def _get_alertas(
+    def _get_alertas(
         self,
         empresa_id: str,
         data_inicio: datetime,
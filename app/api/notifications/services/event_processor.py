@@ -3,11 +3,14 @@ import logging
 import asyncio
 from datetime import datetime
 
+from sqlalchemy.orm import Session
+
+from app.database.db_connection import SessionLocal
 from ..repositories.event_repository import EventRepository
 from ..repositories.subscription_repository import SubscriptionRepository
 from ..repositories.notification_repository import NotificationRepository
 from ..core.event_bus import EventHandler, Event, EventType
-from ..models.subscription import NotificationSubscription
+from ..core.subscription_index import SubscriptionSnapshot
 from ..models.notification import NotificationChannel, NotificationPriority
 
 logger = logging.getLogger(__name__)
@@ -15,23 +18,21 @@ logger = logging.getLogger(__name__)
 class EventProcessor(EventHandler):
     """Processador de eventos que gera notificações baseadas em assinaturas"""
     
-    def __init__(
-        self,
-        event_repo: EventRepository,
-        subscription_repo: SubscriptionRepository,
-        notification_repo: NotificationRepository
-    ):
-        self.event_repo = event_repo
-        self.subscription_repo = subscription_repo
-        self.notification_repo = notification_repo
+    def __init__(self, session_factory=SessionLocal):
+        # Cada evento é processado em uma sessão própria, aberta e fechada em `handle`:
+        # handlers concorrentes não compartilham identity map nem transação.
+        self._session_factory = session_factory
     
     async def handle(self, event: Event) -> None:
         """Processa um evento e gera notificações baseadas nas assinaturas"""
+        db = self._session_factory()
         try:
             logger.info(f"Processando evento {event.id} - {event.event_type}")
+            event_repo = EventRepository(db)
+            subscription_repo = SubscriptionRepository(db)
             
             # Busca assinaturas ativas para este tipo de evento
-            subscriptions = self.subscription_repo.get_active_subscriptions(
+            subscriptions = subscription_repo.get_active_subscriptions(
                 event.empresa_id,
                 event.event_type
             )
@@ -42,20 +43,23 @@ class EventProcessor(EventHandler):
             
             # Gera notificações para cada assinatura
             for subscription in subscriptions:
-                await self._create_notification_from_subscription(event, subscription)
+                await self._create_notification_from_subscription(event, subscription, db)
             
             # Marca evento como processado
-            self.event_repo.mark_as_processed(event.id)
+            event_repo.mark_as_processed(event.id)
             logger.info(f"Evento {event.id} processado com sucesso")
             
         except Exception as e:
+            db.rollback()
             logger.error(f"Erro ao processar evento {event.id}: {e}")
+        finally:
+            db.close()
     
     def can_handle(self, event_type: EventType) -> bool:
         """Sempre pode processar qualquer tipo de evento"""
         return True
     
-    async def _create_notification_from_subscription(self, event: Event, subscription: NotificationSubscription):
+    async def _create_notification_from_subscription(self, event: Event, subscription: SubscriptionSnapshot, db: Session):
         """Cria notificação baseada em uma assinatura"""
         try:
             # Verifica filtros se existirem
@@ -104,17 +108,14 @@ class EventProcessor(EventHandler):
                 channel_metadata = None
 
             # Cria e envia a notificação via NotificationService (garante entrega imediata)
-            from ..repositories.notification_repository import NotificationRepository
-            from ..repositories.subscription_repository import SubscriptionRepository
-            from ..repositories.event_repository import EventRepository
             from ..services.notification_service import NotificationService
             from ..schemas.notification_schemas import CreateNotificationRequest, MessageType
             from ..models.notification import NotificationChannel as ModelChannel
 
             service = NotificationService(
-                notification_repo=NotificationRepository(self.notification_repo.db),
-                subscription_repo=SubscriptionRepository(self.subscription_repo.db),
-                event_repo=EventRepository(self.event_repo.db),
+                notification_repo=NotificationRepository(db),
+                subscription_repo=SubscriptionRepository(db),
+                event_repo=EventRepository(db),
             )
 
             # Normaliza channel para enum do schema
@@ -160,7 +161,7 @@ class EventProcessor(EventHandler):
             logger.error(f"Erro ao verificar filtros: {e}")
             return False
     
-    def _generate_notification_content(self, event: Event, subscription: NotificationSubscription) -> tuple[str, str]:
+    def _generate_notification_content(self, event: Event, subscription: SubscriptionSnapshot) -> tuple[str, str]:
         """Gera título e mensagem da notificação baseado no evento"""
         event_templates = {
             EventType.PEDIDO_CRIADO: {
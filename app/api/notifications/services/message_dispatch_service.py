@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
+import uuid
 from sqlalchemy.orm import Session
 
 from ..repositories.notification_repository import NotificationRepository
@@ -10,8 +11,10 @@ from ..models.notification import MessageType, NotificationChannel, Notification
 from ..schemas.message_dispatch_schemas import (
     DispatchMessageRequest,
     DispatchMessageResponse,
-    BulkDispatchRequest
+    BulkDispatchRequest,
+    DispatchJobProgress
 )
+from ..schemas.notification_schemas import CreateNotificationRequest
 from .notification_service import NotificationService
 from ..contracts.message_dispatch_service_contract import IMessageDispatchService
 from ..contracts.recipient_provider_contract import IRecipientProvider
@@ -53,9 +56,10 @@ class MessageDispatchService(IMessageDispatchService):
             Resposta com informações sobre o disparo
         """
         try:
-            notification_ids = []
+            notification_requests: List[CreateNotificationRequest] = []
             total_recipients = 0
             channels_used = set()
+            job_id = str(uuid.uuid4())
             
             # Determina lista de destinatários
             recipients = self._build_recipients_list(request)
@@ -90,10 +94,7 @@ class MessageDispatchService(IMessageDispatchService):
                             continue
                     # Para outros canais (push, webhook, in_app), aceita qualquer recipient
                     
-                    # Cria notificação usando o serviço existente
-                    from ..schemas.notification_schemas import CreateNotificationRequest
-                    
-                    notification_request = CreateNotificationRequest(
+                    notification_requests.append(CreateNotificationRequest(
                         empresa_id=request.empresa_id,
                         user_id=user_id,
                         event_type=request.event_type or f"message_dispatch_{request.message_type.value}",
@@ -105,21 +106,29 @@ class MessageDispatchService(IMessageDispatchService):
                         priority=request.priority,
                         message_type=request.message_type,
                         channel_metadata=request.channel_metadata,
-                        max_attempts=3
-                    )
-                    
-                    notification_id = await self.notification_service.create_notification(notification_request)
-                    notification_ids.append(notification_id)
+                        max_attempts=3,
+                        scheduled_at=request.scheduled_at
+                    ))
+            
+            # Nenhum destinatário compatível com os canais: não cria job (ele nunca seria registrado)
+            if not notification_requests:
+                raise ValueError("Nenhum destinatário válido para os canais selecionados")
+
+            # Um único INSERT em lote; a entrega (com limite por canal) fica com o outbox
+            notification_ids = await self.notification_service.create_notifications_bulk(
+                notification_requests, job_id=job_id
+            )
             
             logger.info(
                 f"Mensagem tipo {request.message_type.value} disparada: "
                 f"{total_recipients} destinatários, {len(channels_used)} canais, "
-                f"{len(notification_ids)} notificações criadas"
+                f"{len(notification_ids)} notificações criadas (job_id={job_id})"
             )
             
             return DispatchMessageResponse(
                 success=True,
                 message_type=request.message_type,
+                job_id=job_id,
                 notification_ids=notification_ids,
                 total_recipients=total_recipients,
                 channels_used=list(channels_used),
@@ -244,6 +253,7 @@ class MessageDispatchService(IMessageDispatchService):
                 channels=request.channels,
                 priority=request.priority,
                 event_type=f"bulk_dispatch_{request.message_type.value}",
+                scheduled_at=request.scheduled_at,
                 event_data={
                     "filter_by_empresa": request.filter_by_empresa,
                     "filter_by_user_type": request.filter_by_user_type,
@@ -286,6 +296,32 @@ class MessageDispatchService(IMessageDispatchService):
             logger.error(f"Erro ao buscar destinatários por filtros: {e}")
             raise
     
+    def get_dispatch_job(self, job_id: str) -> DispatchJobProgress:
+        """
+        Obtém o progresso de um disparo pelo job_id
+        
+        Args:
+            job_id: ID retornado por dispatch_message/bulk_dispatch
+            
+        Returns:
+            Contagem das notificações do disparo por status
+        """
+        by_status = self.notification_repo.get_job_progress(job_id)
+        total = sum(by_status.values())
+        if total == 0:
+            raise ValueError(f"Disparo {job_id} não encontrado")
+        
+        pending = by_status.get("pending", 0) + by_status.get("retrying", 0)
+        return DispatchJobProgress(
+            job_id=job_id,
+            total=total,
+            pending=pending,
+            sent=by_status.get("sent", 0),
+            failed=by_status.get("failed", 0),
+            cancelled=by_status.get("cancelled", 0),
+            finished=pending == 0,
+        )
+    
     def get_dispatch_stats(
         self,
         empresa_id: str,
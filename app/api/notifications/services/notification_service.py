@@ -1,19 +1,26 @@
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
+from time import perf_counter
 import logging
-import asyncio
 
 from ..repositories.notification_repository import NotificationRepository
 from ..repositories.subscription_repository import SubscriptionRepository
 from ..repositories.event_repository import EventRepository
 from ..channels.channel_factory import ChannelFactory
 from ..core.websocket_manager import websocket_manager
+from ..core.notification_outbox import notification_outbox
 from ..core.event_bus import EventHandler, Event, EventType
 from ..models.notification import NotificationStatus, NotificationChannel, NotificationPriority
 from ..schemas.notification_schemas import CreateNotificationRequest, SendNotificationRequest
 from ..contracts.notification_service_contract import INotificationService
 from ..contracts.channel_config_provider_contract import IChannelConfigProvider
 from ..adapters.channel_config_adapters import DefaultChannelConfigAdapter
+from app.config import settings
+from app.utils.prometheus_metrics import (
+    notification_deliveries_total,
+    notification_delivery_latency_seconds,
+    notification_send_duration_seconds,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -33,41 +40,86 @@ class NotificationService(INotificationService):
         self.channel_factory = ChannelFactory()
         self.channel_config_provider = channel_config_provider or DefaultChannelConfigAdapter()
     
+    def _build_notification_data(self, request: CreateNotificationRequest) -> Dict[str, Any]:
+        """Monta os dados da linha de notificação a partir da requisição"""
+        # Extrai os valores dos enums para garantir compatibilidade com SQLAlchemy
+        # Isso previne problemas de serialização onde o nome do enum é usado em vez do valor
+        channel_value = request.channel.value if hasattr(request.channel, 'value') else str(request.channel)
+        priority_value = request.priority.value if hasattr(request.priority, 'value') else str(request.priority)
+        message_type_value = request.message_type.value if hasattr(request.message_type, 'value') else str(request.message_type)
+        
+        notification_data = {
+            "empresa_id": request.empresa_id,
+            "user_id": request.user_id,
+            "event_type": request.event_type,
+            "event_data": request.event_data,
+            "title": request.title,
+            "message": request.message,
+            "channel": channel_value, 
+            "recipient": request.recipient,
+            "priority": priority_value,  # Passa o valor do enum, não o enum em si
+            "message_type": message_type_value,  # Passa o valor do enum, não o enum em si
+            "channel_metadata": request.channel_metadata,
+            "max_attempts": request.max_attempts
+        }
+        
+        # Agendamento: o outbox só reserva a notificação quando next_retry_at vencer
+        scheduled_at = self._to_utc_naive(request.scheduled_at)
+        if scheduled_at is not None:
+            notification_data["scheduled_at"] = scheduled_at
+            notification_data["next_retry_at"] = scheduled_at
+        
+        return notification_data
+    
     async def create_notification(self, request: CreateNotificationRequest) -> str:
         """Cria uma nova notificação"""
         try:
-            # Extrai os valores dos enums para garantir compatibilidade com SQLAlchemy
-            # Isso previne problemas de serialização onde o nome do enum é usado em vez do valor
-            channel_value = request.channel.value if hasattr(request.channel, 'value') else str(request.channel)
-            priority_value = request.priority.value if hasattr(request.priority, 'value') else str(request.priority)
-            message_type_value = request.message_type.value if hasattr(request.message_type, 'value') else str(request.message_type)
-            
-            notification_data = {
-                "empresa_id": request.empresa_id,
-                "user_id": request.user_id,
-                "event_type": request.event_type,
-                "event_data": request.event_data,
-                "title": request.title,
-                "message": request.message,
-                "channel": channel_value, 
-                "recipient": request.recipient,
-                "priority": priority_value,  # Passa o valor do enum, não o enum em si
-                "message_type": message_type_value,  # Passa o valor do enum, não o enum em si
-                "channel_metadata": request.channel_metadata,
-                "max_attempts": request.max_attempts
-            }
-            
+            notification_data = self._build_notification_data(request)
             notification = self.notification_repo.create(notification_data)
             logger.info(f"Notificação criada: {notification.id}")
             
-            # Processa a notificação imediatamente
-            await self._process_notification(notification)
+            # A entrega fica com o outbox (sem envio no caminho da requisição)
+            await self._enqueue_or_process(notification)
             
             return notification.id
         except Exception as e:
             logger.error(f"Erro ao criar notificação: {e}")
             raise
     
+    async def create_notifications_bulk(
+        self,
+        requests: List[CreateNotificationRequest],
+        job_id: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Cria várias notificações com um único INSERT em lote e entrega pelo outbox.
+
+        `job_id` agrupa as linhas para acompanhamento do progresso do disparo.
+        """
+        if not requests:
+            return []
+        
+        rows = []
+        for request in requests:
+            notification_data = self._build_notification_data(request)
+            notification_data["job_id"] = job_id
+            rows.append(notification_data)
+        
+        notification_ids = self.notification_repo.bulk_create(rows)
+        logger.info(f"{len(notification_ids)} notificações criadas em lote (job_id={job_id})")
+        
+        if notification_outbox.is_running:
+            notification_outbox.wake()
+        else:
+            agora = datetime.utcnow()
+            await notification_outbox.deliver_many(
+                (notification_id, str(row["channel"]).lower())
+                for notification_id, row in zip(notification_ids, rows)
+                if not row.get("next_retry_at") or row["next_retry_at"] <= agora
+            )
+        
+        return notification_ids
+    
     async def send_notification(self, request: SendNotificationRequest) -> List[str]:
         """Envia notificação para múltiplos canais"""
         notification_ids = []
@@ -102,16 +154,33 @@ class NotificationService(INotificationService):
                 notification = self.notification_repo.create(notification_data)
                 notification_ids.append(notification.id)
                 
-                # Processa a notificação
-                await self._process_notification(notification)
+                await self._enqueue_or_process(notification)
                 
             except Exception as e:
                 logger.error(f"Erro ao criar notificação para canal {channel}: {e}")
         
         return notification_ids
     
-    async def _process_notification(self, notification):
+    @staticmethod
+    def _to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+        """Converte para UTC sem tzinfo (padrão das colunas DateTime do módulo)."""
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    async def _enqueue_or_process(self, notification):
+        """Acorda o outbox; sem outbox ativo (ex.: scripts), entrega na hora."""
+        if notification.next_retry_at and notification.next_retry_at > datetime.utcnow():
+            # Agendada: será reservada pelo outbox quando vencer
+            return
+        if notification_outbox.is_running:
+            notification_outbox.wake()
+        else:
+            await self.process_notification(notification)
+    
+    async def process_notification(self, notification):
         """Processa uma notificação enviando pelo canal apropriado"""
+        channel_label = notification.channel.value if hasattr(notification.channel, 'value') else str(notification.channel)
         try:
             # Busca configuração do canal
             channel_config = self._get_channel_config(notification.empresa_id, notification.channel)
@@ -129,14 +198,21 @@ class NotificationService(INotificationService):
             # Inclui empresa_id no metadata para decisões de canal (ex.: janela 24h do WhatsApp)
             channel_metadata = dict(notification.channel_metadata or {})
             channel_metadata.setdefault("_empresa_id", str(notification.empresa_id))
+            inicio = perf_counter()
             result = await channel.send(
                 recipient=notification.recipient,
                 title=notification.title,
                 message=notification.message,
                 channel_metadata=channel_metadata
             )
+            notification_send_duration_seconds.labels(channel=channel_label).observe(perf_counter() - inicio)
             
             if result.success:
+                notification_deliveries_total.labels(channel=channel_label, resultado="sent").inc()
+                if notification.created_at:
+                    notification_delivery_latency_seconds.labels(channel=channel_label).observe(
+                        max(0.0, (datetime.utcnow() - notification.created_at).total_seconds())
+                    )
                 self.notification_repo.update_status(
                     notification.id,
                     NotificationStatus.SENT,
@@ -172,7 +248,9 @@ class NotificationService(INotificationService):
     
     def _handle_notification_failure(self, notification, error_message: str, error_details: Optional[Dict[str, Any]] = None):
         """Trata falha no envio de notificação"""
+        channel_label = notification.channel.value if hasattr(notification.channel, 'value') else str(notification.channel)
         if notification.attempts + 1 >= notification.max_attempts:
+            notification_deliveries_total.labels(channel=channel_label, resultado="failed").inc()
             # Máximo de tentativas atingido
             self.notification_repo.update_status(
                 notification.id,
@@ -187,8 +265,13 @@ class NotificationService(INotificationService):
             )
             logger.error(f"Notificação {notification.id} falhou definitivamente após {notification.attempts + 1} tentativas")
         else:
-            # Agenda nova tentativa
-            self.notification_repo.increment_attempts(notification.id)
+            notification_deliveries_total.labels(channel=channel_label, resultado="retry").inc()
+            # Agenda nova tentativa (backoff exponencial)
+            self.notification_repo.increment_attempts(
+                notification.id,
+                backoff_base_seconds=settings.NOTIFICATION_OUTBOX_BACKOFF_BASE_SEGUNDOS,
+                backoff_max_seconds=settings.NOTIFICATION_OUTBOX_BACKOFF_MAX_SEGUNDOS,
+            )
             self.notification_repo.add_log(
                 notification.id,
                 NotificationStatus.RETRYING,
@@ -203,21 +286,18 @@ class NotificationService(INotificationService):
         self.notification_repo.add_log(notification_id, NotificationStatus.FAILED, error_message)
     
     async def process_pending_notifications(self, limit: int = 50):
-        """Processa notificações pendentes"""
-        pending_notifications = self.notification_repo.get_pending_notifications(limit)
-        
-        for notification in pending_notifications:
-            await self._process_notification(notification)
-            # Pequena pausa entre processamentos para não sobrecarregar
-            await asyncio.sleep(0.1)
+        """Processa notificações pendentes (em paralelo, com limite por canal)"""
+        pending_notifications = self.notification_repo.claim_due_notifications(
+            limit, settings.NOTIFICATION_OUTBOX_LEASE_SEGUNDOS
+        )
+        await notification_outbox.deliver_many(
+            (n.id, n.channel.value, n.next_retry_at) for n in pending_notifications
+        )
     
     async def retry_failed_notifications(self, limit: int = 50):
-        """Tenta reenviar notificações que falharam"""
+        """Tenta reenviar notificações que falharam (em paralelo, com limite por canal)"""
         failed_notifications = self.notification_repo.get_failed_notifications(limit=limit)
-        
-        for notification in failed_notifications:
-            await self._process_notification(notification)
-            await asyncio.sleep(0.1)
+        await notification_outbox.deliver_many((n.id, n.channel.value) for n in failed_notifications)
     
     def get_notification_by_id(self, notification_id: str):
         """Busca notificação por ID"""
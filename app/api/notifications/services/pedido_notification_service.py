@@ -255,10 +255,11 @@ class PedidoNotificationService:
                 f"pedido_id={pedido_id}, empresa_id={empresa_id} (normalized={empresa_id_normalized})"
             )
             
-            # Verifica se há empresa e clientes conectados
+            # Verifica se há empresa e clientes conectados.
+            # Com broadcast entre workers, os clientes podem estar em outro processo.
             is_connected = websocket_manager.is_empresa_connected(empresa_id_normalized)
             
-            if not is_connected:
+            if not is_connected and not websocket_manager.is_distributed:
                 logger.debug(
                     f"[NOTIFY] Notificação kanban não enviada: empresa {empresa_id_normalized} "
                     f"não tem conexões ativas. Pedido {pedido_id} impresso mas nenhum cliente conectado."
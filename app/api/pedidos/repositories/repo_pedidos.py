@@ -2,18 +2,21 @@ from __future__ import annotations
 
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Optional
+from typing import Iterable, Optional
 import re
 
 from fastapi import HTTPException
 from starlette import status as http_status
-from sqlalchemy import func, or_, and_, text
+from sqlalchemy import func, or_, and_, text, select, intersect, cast, tuple_
+from geoalchemy2 import Geography
 from sqlalchemy.orm import Session, joinedload, defer, selectinload
 from sqlalchemy.exc import IntegrityError
 
 from app.api.cadastros.models.model_mesa import MesaModel
 from app.api.catalogo.models.model_produto import ProdutoModel
 from app.api.catalogo.models.model_produto_emp import ProdutoEmpModel
+from app.api.catalogo.models.model_receita import ReceitaModel
+from app.api.catalogo.models.model_combo import ComboModel
 from app.api.pedidos.models.model_pedido_unificado import (
     PedidoUnificadoModel,
     TipoEntrega,
@@ -167,6 +170,74 @@ class PedidoRepository:
             .first()
         )
 
+    def get_empresas_com_itens_disponiveis(
+        self,
+        empresa_ids: Iterable[int],
+        *,
+        produto_cod_barras: Iterable[str] = (),
+        receita_ids: Iterable[int] = (),
+        combo_ids: Iterable[int] = (),
+    ) -> set[int]:
+        """
+        Retorna, dentre `empresa_ids`, as empresas que têm TODOS os itens disponíveis.
+
+        Uma única consulta (INTERSECT de agregações por empresa) substitui uma busca
+        por item × empresa:
+        - produtos: produto_emp disponível e produto ativo;
+        - receitas: receita da empresa ativa e disponível;
+        - combos: combo da empresa ativo.
+        """
+        empresas = {int(e) for e in empresa_ids or []}
+        codigos = {c for c in produto_cod_barras or []}
+        receitas = {int(r) for r in receita_ids or []}
+        combos = {int(c) for c in combo_ids or []}
+        if not empresas:
+            return set()
+
+        consultas = []
+        if codigos:
+            consultas.append(
+                select(ProdutoEmpModel.empresa_id)
+                .join(ProdutoModel, ProdutoModel.id == ProdutoEmpModel.produto_id)
+                .where(
+                    ProdutoEmpModel.empresa_id.in_(empresas),
+                    ProdutoEmpModel.cod_barras.in_(codigos),
+                    ProdutoEmpModel.disponivel.is_(True),
+                    ProdutoModel.ativo.is_(True),
+                )
+                .group_by(ProdutoEmpModel.empresa_id)
+                .having(func.count(func.distinct(ProdutoEmpModel.cod_barras)) == len(codigos))
+            )
+        if receitas:
+            consultas.append(
+                select(ReceitaModel.empresa_id)
+                .where(
+                    ReceitaModel.empresa_id.in_(empresas),
+                    ReceitaModel.id.in_(receitas),
+                    ReceitaModel.ativo.is_(True),
+                    ReceitaModel.disponivel.is_(True),
+                )
+                .group_by(ReceitaModel.empresa_id)
+                .having(func.count(func.distinct(ReceitaModel.id)) == len(receitas))
+            )
+        if combos:
+            consultas.append(
+                select(ComboModel.empresa_id)
+                .where(
+                    ComboModel.empresa_id.in_(empresas),
+                    ComboModel.id.in_(combos),
+                    ComboModel.ativo.is_(True),
+                )
+                .group_by(ComboModel.empresa_id)
+                .having(func.count(func.distinct(ComboModel.id)) == len(combos))
+            )
+
+        if not consultas:
+            return empresas
+
+        stmt = consultas[0] if len(consultas) == 1 else intersect(*consultas)
+        return {int(row[0]) for row in self.db.execute(stmt).all()}
+
     def get_cupom(self, cupom_id: int) -> Optional[CupomDescontoModel]:
         return self.db.get(CupomDescontoModel, cupom_id)
 
@@ -277,6 +348,122 @@ class PedidoRepository:
 
     # -------------------- Mutations -------------------
     # -------------------- Helpers para cálculos -------------------
+    # ------------- Consultas geográficas (dispatch) -------------
+    def _query_pedidos_geo(
+        self,
+        *,
+        status: Optional[list[str]] = None,
+        tipos_entrega: Optional[list[str]] = None,
+        empresa_id: Optional[int] = None,
+    ):
+        tipos = tipos_entrega or [TipoEntrega.DELIVERY.value]
+        query = (
+            self.db.query(PedidoUnificadoModel)
+            .options(
+                joinedload(PedidoUnificadoModel.cliente),
+                joinedload(PedidoUnificadoModel.endereco),
+                joinedload(PedidoUnificadoModel.entregador),
+                joinedload(PedidoUnificadoModel.meio_pagamento),
+            )
+            .filter(
+                PedidoUnificadoModel.endereco_geo.isnot(None),
+                PedidoUnificadoModel.tipo_entrega.in_(tipos),
+            )
+        )
+        if status:
+            query = query.filter(PedidoUnificadoModel.status.in_(status))
+        if empresa_id is not None:
+            query = query.filter(PedidoUnificadoModel.empresa_id == empresa_id)
+        return query
+
+    def list_pedidos_por_regiao(
+        self,
+        latitude_centro: float,
+        longitude_centro: float,
+        raio_km: float,
+        *,
+        status: Optional[list[str]] = None,
+        tipos_entrega: Optional[list[str]] = None,
+        empresa_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[tuple[float, int]] = None,
+    ) -> tuple[list[tuple[PedidoUnificadoModel, float]], Optional[tuple[float, int]]]:
+        """
+        Pedidos dentro do raio (km) do centro, ordenados por distância, em uma única consulta.
+
+        - Ponto e raio vão como parâmetros (ST_DWithin usa o índice GIST de `endereco_geo`).
+        - Paginação por keyset: `cursor` = (distancia_metros, id) do último item da página anterior.
+
+        Retorna ([(pedido, distancia_metros)], próximo_cursor | None).
+        """
+        centro = cast(
+            func.ST_SetSRID(func.ST_MakePoint(float(longitude_centro), float(latitude_centro)), 4326),
+            Geography(srid=4326),
+        )
+        distancia = func.ST_Distance(PedidoUnificadoModel.endereco_geo, centro)
+
+        query = (
+            self._query_pedidos_geo(status=status, tipos_entrega=tipos_entrega, empresa_id=empresa_id)
+            .add_columns(distancia.label("distancia_metros"))
+            .filter(func.ST_DWithin(PedidoUnificadoModel.endereco_geo, centro, float(raio_km) * 1000))
+        )
+        if cursor is not None:
+            query = query.filter(tuple_(distancia, PedidoUnificadoModel.id) > tuple_(float(cursor[0]), int(cursor[1])))
+        query = query.order_by(distancia.asc(), PedidoUnificadoModel.id.asc())
+        if limit:
+            query = query.limit(int(limit) + 1)
+
+        rows = [(pedido, float(dist)) for pedido, dist in query.all()]
+        proximo_cursor = None
+        if limit and len(rows) > int(limit):
+            rows = rows[: int(limit)]
+            proximo_cursor = (rows[-1][1], rows[-1][0].id)
+        return rows, proximo_cursor
+
+    def list_pedidos_por_poligono(
+        self,
+        coordenadas_poligono: list,
+        *,
+        status: Optional[list[str]] = None,
+        tipos_entrega: Optional[list[str]] = None,
+        empresa_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[int] = None,
+    ) -> tuple[list[PedidoUnificadoModel], Optional[int]]:
+        """
+        Pedidos dentro do polígono [(lon, lat), ...], ordenados por id, em uma única consulta.
+
+        O WKT é montado apenas com floats validados e enviado como parâmetro.
+        Paginação por keyset: `cursor` = id do último pedido da página anterior.
+        """
+        pontos = [(float(lon), float(lat)) for lon, lat in coordenadas_poligono or []]
+        if len(pontos) < 3:
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail="Polígono precisa de pelo menos 3 coordenadas.",
+            )
+        if pontos[0] != pontos[-1]:
+            pontos.append(pontos[0])
+        poligono_wkt = "POLYGON((" + ", ".join(f"{lon} {lat}" for lon, lat in pontos) + "))"
+        poligono = func.ST_GeogFromText(f"SRID=4326;{poligono_wkt}")
+
+        query = (
+            self._query_pedidos_geo(status=status, tipos_entrega=tipos_entrega, empresa_id=empresa_id)
+            .filter(func.ST_Intersects(PedidoUnificadoModel.endereco_geo, poligono))
+        )
+        if cursor is not None:
+            query = query.filter(PedidoUnificadoModel.id > int(cursor))
+        query = query.order_by(PedidoUnificadoModel.id.asc())
+        if limit:
+            query = query.limit(int(limit) + 1)
+
+        pedidos = query.all()
+        proximo_cursor = None
+        if limit and len(pedidos) > int(limit):
+            pedidos = pedidos[: int(limit)]
+            proximo_cursor = pedidos[-1].id
+        return pedidos, proximo_cursor
+
     def _sum_complementos_total_relacional(self, item: PedidoItemUnificadoModel) -> Decimal:
         """
         Soma totais de complementos usando o modelo relacional.
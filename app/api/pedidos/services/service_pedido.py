@@ -7,7 +7,7 @@ from decimal import Decimal
 from typing import Callable, Optional, TYPE_CHECKING
 from urllib.parse import quote_plus
 
-from sqlalchemy import func, text, update
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session, joinedload
 
 from fastapi import HTTPException, status
@@ -53,9 +53,10 @@ from app.api.pedidos.services.service_pedido_helpers import (
 from app.api.pedidos.services.service_pedido_responses import PedidoResponseBuilder
 from app.api.pedidos.utils.complementos import resolve_produto_complementos, resolve_complementos_diretos
 from app.api.pedidos.services.service_pedido_taxas import TaxaService
+from app.api.pedidos.services.service_pedido_selecao_empresa import SelecaoEmpresaService
 from app.api.empresas.contracts.empresa_contract import IEmpresaContract
 from app.api.cadastros.contracts.regiao_entrega_contract import IRegiaoEntregaContract
-from app.api.catalogo.contracts.produto_contract import IProdutoContract, ProdutoEmpDTO
+from app.api.catalogo.contracts.produto_contract import IProdutoContract
 from app.api.catalogo.contracts.complemento_contract import IComplementoContract
 from app.api.pedidos.services.service_pedido_kanban import KanbanService
 # Migrado para modelos unificados - contratos não são mais necessários
@@ -102,6 +103,11 @@ class PedidoService:
             empresa_contract=empresa_contract,
             regiao_contract=regiao_contract,
         )
+        self.selecao_empresa_service = SelecaoEmpresaService(
+            db,
+            self.taxa_service,
+            repo_empresa=self.repo_empresa,
+        )
         self.produto_contract = produto_contract
         self.adicional_contract = adicional_contract
         self.complemento_contract = complemento_contract
@@ -264,74 +270,26 @@ class PedidoService:
         return empresa_encontrada, distancia
 
     def _selecionar_empresa_mais_proxima(self, endereco, itens):
-        # Busca todas as empresas sem limite para garantir que encontra a mais próxima
-        empresas = self.repo_empresa.list(skip=0, limit=None)
-        if not empresas:
-            return None, None
-
-        # filtros: empresas com faixas ativas e todos os produtos disponíveis
-        empresas_validas = []
-        for empresa in empresas:
-            if not self.taxa_service.verificar_regioes_cadastradas(empresa.id):
-                continue
-            if not self._empresa_possui_produtos(empresa.id, itens):
-                continue
-            empresas_validas.append(empresa)
-
-        if not empresas_validas:
-            return None, None
-
-        # Obtém coordenadas do destino
-        destino_coords_tuple = self.taxa_service.obter_coordenadas_endereco(endereco)
-        if not destino_coords_tuple or destino_coords_tuple[0] is None or destino_coords_tuple[1] is None:
-            return None, None
-        
-        from app.api.localizacao.models.coordenadas import Coordenadas
-        destino_coords = Coordenadas.from_tuple(destino_coords_tuple)
-        if destino_coords is None:
-            return None, None
-
-        melhor_empresa = None
-        menor_distancia = None
-        for empresa in empresas_validas:
-            origem_coords_tuple = self.taxa_service.obter_coordenadas_empresa(empresa.id)
-            if not origem_coords_tuple or origem_coords_tuple[0] is None or origem_coords_tuple[1] is None:
-                continue
-
-            origem_coords = Coordenadas.from_tuple(origem_coords_tuple)
-            if origem_coords is None:
-                continue
-
-            distancia = self.taxa_service.geo_service.calcular_distancia(
-                origem_coords,
-                destino_coords,
-            )
-            if distancia is None:
-                continue
-
-            # Aqui a lógica é apenas escolher a empresa mais próxima.
-            # A validação da faixa de entrega e cálculo da taxa são feitos depois,
-            # em TaxaService.calcular_taxas, já com a empresa escolhida.
-            if menor_distancia is None or distancia < menor_distancia:
-                menor_distancia = distancia
-                melhor_empresa = empresa
-
-        return melhor_empresa, menor_distancia
+        return self.selecao_empresa_service.selecionar(
+            endereco,
+            lambda empresa_ids: self._empresas_com_produtos(empresa_ids, itens),
+        )
 
-    def _empresa_possui_produtos(self, empresa_id: int, itens) -> bool:
+    def _empresas_com_produtos(self, empresa_ids, itens) -> set[int]:
+        """Filtra, em uma única consulta, as empresas que possuem todos os produtos do pedido."""
+        codigos = []
         for item in itens or []:
             codigo = getattr(item, "produto_cod_barras", None)
             if not codigo:
-                return False
-            if self.produto_contract is not None:
-                pe_dto: ProdutoEmpDTO | None = self.produto_contract.obter_produto_emp_por_cod(empresa_id, codigo)
-                if not pe_dto or not pe_dto.disponivel or not (pe_dto.produto and bool(pe_dto.produto.ativo)):
-                    return False
-            else:
-                produto = self.repo.get_produto_emp(empresa_id, codigo)
-                if not produto or not produto.produto or not produto.disponivel or not produto.produto.ativo:
-                    return False#
-        return True
+                return set()
+            codigos.append(codigo)
+        return self.repo.get_empresas_com_itens_disponiveis(
+            empresa_ids,
+            produto_cod_barras=codigos,
+        )
+
+    def _empresa_possui_produtos(self, empresa_id: int, itens) -> bool:
+        return empresa_id in self._empresas_com_produtos([empresa_id], itens)
 
     def _aplicar_cupom(
         self,
@@ -365,71 +323,107 @@ class PedidoService:
         )
         return pedidos_ativos > 0
 
-    def get_pedidos_por_regiao(self, latitude_centro: float, longitude_centro: float, raio_km: float = 5.0):
+    def get_pedidos_por_regiao(
+        self,
+        latitude_centro: float,
+        longitude_centro: float,
+        raio_km: float = 5.0,
+        *,
+        status: Optional[list[str]] = None,
+        tipos_entrega: Optional[list[str]] = None,
+        empresa_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[tuple[float, int]] = None,
+    ):
         """Retorna pedidos dentro de uma região geográfica específica usando PostGIS."""
-        ponto_centro = f"ST_GeomFromText('POINT({longitude_centro} {latitude_centro})', 4326)"
-        raio_metros = raio_km * 1000
-        
-        query = text(f"""
-            SELECT p.*, 
-                   ST_Distance(p.endereco_geo, {ponto_centro}) as distancia_metros
-            FROM pedidos.pedidos p
-            WHERE p.endereco_geo IS NOT NULL
-              AND p.tipo_entrega = 'DELIVERY'
-              AND ST_DWithin(p.endereco_geo, {ponto_centro}, :raio_metros)
-            ORDER BY distancia_metros
-        """)
-        
-        result = self.db.execute(query, {"raio_metros": raio_metros})
-        
-        pedidos_na_regiao = []
-        for row in result:
-            pedido = (
-                self.db.query(PedidoUnificadoModel)
-                .filter(
-                    PedidoUnificadoModel.id == row.id,
-                    PedidoUnificadoModel.tipo_entrega == TipoEntrega.DELIVERY.value
-                )
-                .first()
-            )
-            if pedido:
-                pedidos_na_regiao.append({
-                    "pedido": pedido,
-                    "distancia_km": row.distancia_metros / 1000
-                })
-        
-        return pedidos_na_regiao
+        rows, _ = self.repo.list_pedidos_por_regiao(
+            latitude_centro,
+            longitude_centro,
+            raio_km,
+            status=status,
+            tipos_entrega=tipos_entrega,
+            empresa_id=empresa_id,
+            limit=limit,
+            cursor=cursor,
+        )
+        return [
+            {"pedido": pedido, "distancia_km": distancia_metros / 1000}
+            for pedido, distancia_metros in rows
+        ]
+
+    def get_pedidos_por_regiao_paginado(
+        self,
+        latitude_centro: float,
+        longitude_centro: float,
+        raio_km: float = 5.0,
+        *,
+        limit: int = 50,
+        cursor: Optional[tuple[float, int]] = None,
+        status: Optional[list[str]] = None,
+        tipos_entrega: Optional[list[str]] = None,
+        empresa_id: Optional[int] = None,
+    ) -> dict:
+        """Versão paginada (keyset) de `get_pedidos_por_regiao`."""
+        rows, proximo_cursor = self.repo.list_pedidos_por_regiao(
+            latitude_centro,
+            longitude_centro,
+            raio_km,
+            status=status,
+            tipos_entrega=tipos_entrega,
+            empresa_id=empresa_id,
+            limit=limit,
+            cursor=cursor,
+        )
+        return {
+            "itens": [
+                {"pedido": pedido, "distancia_km": distancia_metros / 1000}
+                for pedido, distancia_metros in rows
+            ],
+            "proximo_cursor": proximo_cursor,
+        }
 
-    def get_pedidos_por_poligono(self, coordenadas_poligono: list):
+    def get_pedidos_por_poligono(
+        self,
+        coordenadas_poligono: list,
+        *,
+        status: Optional[list[str]] = None,
+        tipos_entrega: Optional[list[str]] = None,
+        empresa_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[int] = None,
+    ):
         """Retorna pedidos dentro de um polígono específico."""
-        coords_str = ", ".join([f"{lon} {lat}" for lon, lat in coordenadas_poligono])
-        poligono_wkt = f"POLYGON(({coords_str}))"
-        
-        query = text("""
-            SELECT p.*
-            FROM pedidos.pedidos p
-            WHERE p.endereco_geo IS NOT NULL
-              AND p.tipo_entrega = 'DELIVERY'
-              AND ST_Within(p.endereco_geo, ST_GeomFromText(:poligono, 4326))
-        """)
-        
-        result = self.db.execute(query, {"poligono": poligono_wkt})
-        
-        pedidos = []
-        for row in result:
-            pedido = (
-                self.db.query(PedidoUnificadoModel)
-                .filter(
-                    PedidoUnificadoModel.id == row.id,
-                    PedidoUnificadoModel.tipo_entrega == TipoEntrega.DELIVERY.value
-                )
-                .first()
-            )
-            if pedido:
-                pedidos.append(pedido)
-        
+        pedidos, _ = self.repo.list_pedidos_por_poligono(
+            coordenadas_poligono,
+            status=status,
+            tipos_entrega=tipos_entrega,
+            empresa_id=empresa_id,
+            limit=limit,
+            cursor=cursor,
+        )
         return pedidos
 
+    def get_pedidos_por_poligono_paginado(
+        self,
+        coordenadas_poligono: list,
+        *,
+        limit: int = 50,
+        cursor: Optional[int] = None,
+        status: Optional[list[str]] = None,
+        tipos_entrega: Optional[list[str]] = None,
+        empresa_id: Optional[int] = None,
+    ) -> dict:
+        """Versão paginada (keyset) de `get_pedidos_por_poligono`."""
+        pedidos, proximo_cursor = self.repo.list_pedidos_por_poligono(
+            coordenadas_poligono,
+            status=status,
+            tipos_entrega=tipos_entrega,
+            empresa_id=empresa_id,
+            limit=limit,
+            cursor=cursor,
+        )
+        return {"itens": pedidos, "proximo_cursor": proximo_cursor}
+
     def _recalcular_pedido(self, pedido: PedidoUnificadoModel):
         """Recalcula subtotal, desconto, taxas e valor total do pedido e salva no banco."""
         # Alguns fluxos de edição atualizam tabelas relacionais (ex.: complementos) via DELETE/INSERT.
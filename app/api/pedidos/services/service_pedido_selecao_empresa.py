@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.api.empresas.models.empresa_model import EmpresaModel
+from app.api.empresas.repositories.empresa_repo import EmpresaRepository
+from app.api.localizacao.models.coordenadas import Coordenadas
+from app.api.pedidos.services.service_pedido_taxas import TaxaService
+from app.config import settings
+from app.utils.logger import logger
+
+
+class SelecaoEmpresaService:
+    """
+    Seleciona a empresa mais próxima para um pedido de delivery.
+
+    Etapas:
+    1) Uma consulta ranqueia as empresas com faixa de entrega ativa pela distância
+       em linha reta até o destino (PostGIS, com fallback haversine).
+    2) Descarta as sem faixa ativa cobrindo 0 km (critério de
+       `TaxaService.verificar_regioes_cadastradas`) e as que estão além do raio máximo
+       de entrega (a distância por rota nunca é menor que a distância em linha reta).
+    3) Filtra, em lote, as empresas que possuem os produtos e consulta a API de
+       rotas apenas para as top-K.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        taxa_service: TaxaService,
+        repo_empresa: EmpresaRepository | None = None,
+        top_k: int | None = None,
+    ):
+        self.db = db
+        self.taxa_service = taxa_service
+        self.repo_empresa = repo_empresa or EmpresaRepository(db)
+        self.top_k = max(1, int(top_k or settings.PEDIDOS_SELECAO_EMPRESA_TOP_K))
+
+    def selecionar(
+        self,
+        endereco,
+        filtrar_empresas_com_produtos: Callable[[Iterable[int]], set[int]],
+    ) -> Tuple[Optional[EmpresaModel], Optional[float]]:
+        destino_coords_tuple = self.taxa_service.obter_coordenadas_endereco(endereco)
+        if not destino_coords_tuple or destino_coords_tuple[0] is None or destino_coords_tuple[1] is None:
+            return None, None
+
+        destino_coords = Coordenadas.from_tuple(destino_coords_tuple)
+        if destino_coords is None:
+            return None, None
+
+        candidatas = self.repo_empresa.list_candidatas_entrega(
+            destino_coords.latitude,
+            destino_coords.longitude,
+        )
+
+        no_raio = [
+            empresa
+            for empresa, distancia_linha_km, raio_max_km, tem_faixa_inicial in candidatas
+            if tem_faixa_inicial
+            and (distancia_linha_km is None or raio_max_km is None or distancia_linha_km <= raio_max_km)
+        ]
+        if not no_raio:
+            return None, None
+
+        com_produtos = filtrar_empresas_com_produtos([e.id for e in no_raio])
+        finalistas: list[EmpresaModel] = [e for e in no_raio if e.id in com_produtos][: self.top_k]
+
+        if not finalistas:
+            return None, None
+
+        melhor_empresa = None
+        menor_distancia = None
+        for empresa in finalistas:
+            origem_coords_tuple = self.taxa_service.obter_coordenadas_empresa(empresa.id)
+            if not origem_coords_tuple or origem_coords_tuple[0] is None or origem_coords_tuple[1] is None:
+                continue
+
+            origem_coords = Coordenadas.from_tuple(origem_coords_tuple)
+            if origem_coords is None:
+                continue
+
+            distancia = self.taxa_service.geo_service.calcular_distancia(origem_coords, destino_coords)
+            if distancia is None:
+                continue
+
+            # Aqui a lógica é apenas escolher a empresa mais próxima.
+            # A validação da faixa de entrega e cálculo da taxa são feitos depois,
+            # em TaxaService.calcular_taxas, já com a empresa escolhida.
+            if menor_distancia is None or distancia < menor_distancia:
+                menor_distancia = distancia
+                melhor_empresa = empresa
+
+        logger.debug(
+            "[SelecaoEmpresa] candidatas=%s finalistas=%s escolhida=%s",
+            len(candidatas),
+            [e.id for e in finalistas],
+            getattr(melhor_empresa, "id", None),
+        )
+        return melhor_empresa, menor_distancia
@@ -34,15 +34,14 @@ class TaxaService:
         # Usa o serviço de geolocalização se fornecido, senão cria um padrão
         if geolocalizacao_service is None:
             from app.api.localizacao.adapters.google_maps_adapter import GoogleMapsAdapter
-            from app.api.localizacao.adapters.cache_adapter import CacheAdapter
             from app.api.localizacao.services.geolocalizacao_service import GeolocalizacaoService
             
+            # O adapter usa o cache compartilhado do processo (memória + banco),
+            # então geocodificações/distâncias são reaproveitadas entre requests.
             google_adapter = GoogleMapsAdapter()
-            cache = CacheAdapter()
             geolocalizacao_service = GeolocalizacaoService(
                 geocodificacao_provider=google_adapter,
                 distancia_provider=google_adapter,
-                cache=cache
             )
         
         self.geo_service = geolocalizacao_service
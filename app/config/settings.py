@@ -48,3 +48,99 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_API_URL = os.getenv("GROQ_API_URL", "")
 MODEL_NAME = os.getenv("MODEL_NAME", "gpt-default")
 STATE_CADASTRO_NOME = os.getenv("STATE_CADASTRO_NOME", "cadastro_nome")
+
+# Cliente LLM compartilhado do chatbot: limite de chamadas simultâneas (total e por
+# empresa), circuit breaker e cache das respostas determinísticas (temperature 0)
+CHATBOT_LLM_TIMEOUT_SEGUNDOS = float(os.getenv("CHATBOT_LLM_TIMEOUT_SEGUNDOS", 30))
+CHATBOT_LLM_MAX_CONCORRENCIA = int(os.getenv("CHATBOT_LLM_MAX_CONCORRENCIA", 16))
+CHATBOT_LLM_MAX_CONCORRENCIA_EMPRESA = int(os.getenv("CHATBOT_LLM_MAX_CONCORRENCIA_EMPRESA", 4))
+# Quanto tempo uma chamada espera por vaga antes de desistir (cai no fallback)
+CHATBOT_LLM_ESPERA_MAX_SEGUNDOS = float(os.getenv("CHATBOT_LLM_ESPERA_MAX_SEGUNDOS", 10))
+CHATBOT_LLM_CIRCUITO_FALHAS = int(os.getenv("CHATBOT_LLM_CIRCUITO_FALHAS", 5))
+CHATBOT_LLM_CIRCUITO_ABERTO_SEGUNDOS = float(os.getenv("CHATBOT_LLM_CIRCUITO_ABERTO_SEGUNDOS", 30))
+CHATBOT_LLM_CACHE_MAX_ITENS = int(os.getenv("CHATBOT_LLM_CACHE_MAX_ITENS", 2000))
+CHATBOT_LLM_CACHE_TTL_SEGUNDOS = int(os.getenv("CHATBOT_LLM_CACHE_TTL_SEGUNDOS", 3600))
+
+# Cache de geolocalização (Google Maps)
+GEO_CACHE_MAX_ITENS = int(os.getenv("GEO_CACHE_MAX_ITENS", 5000))
+GEO_CACHE_TTL_SEGUNDOS = int(os.getenv("GEO_CACHE_TTL_SEGUNDOS", 3600))
+GEO_CACHE_DB_TTL_DIAS = int(os.getenv("GEO_CACHE_DB_TTL_DIAS", 30))
+
+# Seleção da empresa mais próxima (delivery): quantas candidatas (por distância
+# em linha reta) são consultadas na API de rotas
+PEDIDOS_SELECAO_EMPRESA_TOP_K = int(os.getenv("PEDIDOS_SELECAO_EMPRESA_TOP_K", 3))
+
+# Outbox de notificações: pool de workers que entrega as notificações pendentes
+NOTIFICATION_OUTBOX_ENABLED = os.getenv("NOTIFICATION_OUTBOX_ENABLED", "true").lower() in ("1", "true", "yes")
+NOTIFICATION_OUTBOX_WORKERS = int(os.getenv("NOTIFICATION_OUTBOX_WORKERS", 8))
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv("NOTIFICATION_OUTBOX_BATCH_SIZE", 50))
+NOTIFICATION_OUTBOX_POLL_SEGUNDOS = float(os.getenv("NOTIFICATION_OUTBOX_POLL_SEGUNDOS", 2))
+# Tempo que uma notificação reservada fica invisível para outros workers (se o worker morrer, ela volta)
+NOTIFICATION_OUTBOX_LEASE_SEGUNDOS = int(os.getenv("NOTIFICATION_OUTBOX_LEASE_SEGUNDOS", 120))
+# Limite de envios simultâneos por canal, ex.: "whatsapp=4,email=4,webhook=8" (canais omitidos: sem limite extra)
+NOTIFICATION_OUTBOX_CHANNEL_LIMITS = os.getenv("NOTIFICATION_OUTBOX_CHANNEL_LIMITS", "whatsapp=4,email=4,webhook=8,push=8")
+# Backoff exponencial entre tentativas: base * 2^tentativas, limitado ao máximo
+NOTIFICATION_OUTBOX_BACKOFF_BASE_SEGUNDOS = int(os.getenv("NOTIFICATION_OUTBOX_BACKOFF_BASE_SEGUNDOS", 60))
+NOTIFICATION_OUTBOX_BACKOFF_MAX_SEGUNDOS = int(os.getenv("NOTIFICATION_OUTBOX_BACKOFF_MAX_SEGUNDOS", 3600))
+
+# Índice em memória das assinaturas ativas (por worker). A versão compartilhada
+# é checada no banco no máximo a cada CHECAGEM segundos.
+NOTIFICATION_SUBSCRIPTION_INDEX_CHECAGEM_SEGUNDOS = float(os.getenv("NOTIFICATION_SUBSCRIPTION_INDEX_CHECAGEM_SEGUNDOS", 2))
+NOTIFICATION_SUBSCRIPTION_INDEX_TTL_SEGUNDOS = int(os.getenv("NOTIFICATION_SUBSCRIPTION_INDEX_TTL_SEGUNDOS", 600))
+NOTIFICATION_SUBSCRIPTION_INDEX_MAX_ITENS = int(os.getenv("NOTIFICATION_SUBSCRIPTION_INDEX_MAX_ITENS", 5000))
+
+# Cache por worker da configuração ativa do WhatsApp (invalidado ao salvar a configuração)
+WHATSAPP_CONFIG_CACHE_CHECAGEM_SEGUNDOS = float(os.getenv("WHATSAPP_CONFIG_CACHE_CHECAGEM_SEGUNDOS", 2))
+WHATSAPP_CONFIG_CACHE_TTL_SEGUNDOS = int(os.getenv("WHATSAPP_CONFIG_CACHE_TTL_SEGUNDOS", 600))
+
+# Variante de telefone aceita pelo 360dialog por cliente (cache em memória na frente da tabela)
+WHATSAPP_PHONE_VARIANT_CACHE_MAX_ITENS = int(os.getenv("WHATSAPP_PHONE_VARIANT_CACHE_MAX_ITENS", 20000))
+WHATSAPP_PHONE_VARIANT_CACHE_TTL_SEGUNDOS = int(os.getenv("WHATSAPP_PHONE_VARIANT_CACHE_TTL_SEGUNDOS", 3600))
+
+# Telefones dos entregadores em memória (chatbot ignora mensagens de entregadores);
+# invalidado ao editar entregadores
+ENTREGADORES_TELEFONES_CHECAGEM_SEGUNDOS = float(os.getenv("ENTREGADORES_TELEFONES_CHECAGEM_SEGUNDOS", 5))
+ENTREGADORES_TELEFONES_TTL_SEGUNDOS = int(os.getenv("ENTREGADORES_TELEFONES_TTL_SEGUNDOS", 3600))
+
+# Dashboard administrativo: seções em paralelo (threads) e cache por empresa.
+# Até TTL o resultado é servido do cache; até STALE é servido e recalculado em segundo plano.
+DASHBOARD_THREADS = int(os.getenv("DASHBOARD_THREADS", 8))
+DASHBOARD_CACHE_TTL_SEGUNDOS = float(os.getenv("DASHBOARD_CACHE_TTL_SEGUNDOS", 30))
+DASHBOARD_CACHE_STALE_SEGUNDOS = float(os.getenv("DASHBOARD_CACHE_STALE_SEGUNDOS", 300))
+
+# Clientes HTTP compartilhados dos canais de notificação (keep-alive / HTTP/2)
+NOTIFICATION_HTTP_MAX_CONNECTIONS = int(os.getenv("NOTIFICATION_HTTP_MAX_CONNECTIONS", 100))
+NOTIFICATION_HTTP_MAX_KEEPALIVE = int(os.getenv("NOTIFICATION_HTTP_MAX_KEEPALIVE", 20))
+NOTIFICATION_HTTP_KEEPALIVE_SEGUNDOS = float(os.getenv("NOTIFICATION_HTTP_KEEPALIVE_SEGUNDOS", 60))
+NOTIFICATION_HTTP2_ENABLED = os.getenv("NOTIFICATION_HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Inbox durável dos webhooks do chatbot: o POST /webhook só grava o payload e um pool
+# de workers processa em ordem por telefone (telefones diferentes em paralelo)
+CHATBOT_WEBHOOK_INBOX_ENABLED = os.getenv("CHATBOT_WEBHOOK_INBOX_ENABLED", "true").lower() in ("1", "true", "yes")
+CHATBOT_WEBHOOK_INBOX_WORKERS = int(os.getenv("CHATBOT_WEBHOOK_INBOX_WORKERS", 8))
+CHATBOT_WEBHOOK_INBOX_BATCH_SIZE = int(os.getenv("CHATBOT_WEBHOOK_INBOX_BATCH_SIZE", 20))
+CHATBOT_WEBHOOK_INBOX_POLL_SEGUNDOS = float(os.getenv("CHATBOT_WEBHOOK_INBOX_POLL_SEGUNDOS", 1))
+# Tempo que um webhook reservado fica invisível para outros workers (cobre a resposta da IA)
+CHATBOT_WEBHOOK_INBOX_LEASE_SEGUNDOS = int(os.getenv("CHATBOT_WEBHOOK_INBOX_LEASE_SEGUNDOS", 300))
+CHATBOT_WEBHOOK_INBOX_MAX_TENTATIVAS = int(os.getenv("CHATBOT_WEBHOOK_INBOX_MAX_TENTATIVAS", 5))
+# Backoff exponencial entre tentativas: base * 2^(tentativas-1), limitado ao máximo
+CHATBOT_WEBHOOK_INBOX_BACKOFF_BASE_SEGUNDOS = int(os.getenv("CHATBOT_WEBHOOK_INBOX_BACKOFF_BASE_SEGUNDOS", 5))
+CHATBOT_WEBHOOK_INBOX_BACKOFF_MAX_SEGUNDOS = int(os.getenv("CHATBOT_WEBHOOK_INBOX_BACKOFF_MAX_SEGUNDOS", 600))
+# Webhooks processados (done) são apagados após este prazo
+CHATBOT_WEBHOOK_INBOX_RETENCAO_DIAS = int(os.getenv("CHATBOT_WEBHOOK_INBOX_RETENCAO_DIAS", 3))
+
+# Deduplicação das mensagens recebidas pelo id do provedor (messages[].id):
+# ids recentes ficam em memória (por worker) e todos na tabela chatbot.whatsapp_inbound_ids
+CHATBOT_WHATSAPP_MESSAGE_IDS_MEMORIA = int(os.getenv("CHATBOT_WHATSAPP_MESSAGE_IDS_MEMORIA", 10000))
+# A Meta reenvia webhooks por até 7 dias
+CHATBOT_WHATSAPP_MESSAGE_IDS_RETENCAO_DIAS = int(os.getenv("CHATBOT_WHATSAPP_MESSAGE_IDS_RETENCAO_DIAS", 7))
+
+# Cache por worker do status do bot (global e por telefone), invalidado ao pausar/retomar
+CHATBOT_BOT_STATUS_CACHE_CHECAGEM_SEGUNDOS = float(os.getenv("CHATBOT_BOT_STATUS_CACHE_CHECAGEM_SEGUNDOS", 1))
+CHATBOT_BOT_STATUS_CACHE_TTL_SEGUNDOS = int(os.getenv("CHATBOT_BOT_STATUS_CACHE_TTL_SEGUNDOS", 30))
+CHATBOT_BOT_STATUS_CACHE_MAX_ITENS = int(os.getenv("CHATBOT_BOT_STATUS_CACHE_MAX_ITENS", 20000))
+
+# Cache por worker da configuração do chatbot por empresa e dos prompts, invalidado nas edições do admin
+CHATBOT_CONFIG_CACHE_CHECAGEM_SEGUNDOS = float(os.getenv("CHATBOT_CONFIG_CACHE_CHECAGEM_SEGUNDOS", 2))
+CHATBOT_CONFIG_CACHE_TTL_SEGUNDOS = int(os.getenv("CHATBOT_CONFIG_CACHE_TTL_SEGUNDOS", 600))
+CHATBOT_CONFIG_CACHE_MAX_ITENS = int(os.getenv("CHATBOT_CONFIG_CACHE_MAX_ITENS", 5000))
@@ -403,6 +403,7 @@ def importar_models():
     from app.api.cadastros.models.model_meio_pagamento import MeioPagamentoModel
     from app.api.cadastros.models.model_parceiros import ParceiroModel, BannerParceiroModel
     from app.api.cadastros.models.model_regiao_entrega import RegiaoEntregaModel
+    from app.api.localizacao.models.model_geo_cache import GeoCacheModel
     from app.api.catalogo.models.model_complemento import ComplementoModel
     from app.api.catalogo.models.model_complemento_vinculo_item import ComplementoVinculoItemModel
     # ─── Models Notifications ───────────────────────────────────────────
@@ -410,6 +411,7 @@ def importar_models():
     from app.api.notifications.models.event import Event
     from app.api.notifications.models.subscription import NotificationSubscription
     from app.api.notifications.models.whatsapp_config_model import WhatsAppConfigModel
+    from app.api.notifications.models.whatsapp_phone_variant_model import WhatsAppPhoneVariantModel
     # ─── Models Chatbot ───────────────────────────────────────────
     from app.api.chatbot.models.model_chatbot_config import ChatbotConfigModel
     from app.api.chatbot.models.model_carrinho import CarrinhoTemporarioModel, TipoEntregaCarrinhoEnum
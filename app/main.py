@@ -15,7 +15,7 @@ from app.core.exception_handlers import (
 from fastapi.exceptions import RequestValidationError
 from fastapi import HTTPException
 from app.utils.logger import logger 
-from app.config.settings import CORS_ORIGINS, CORS_ALLOW_ALL, BASE_URL as SETTINGS_BASE_URL, ENABLE_DOCS
+from app.config.settings import CORS_ORIGINS, CORS_ALLOW_ALL, BASE_URL as SETTINGS_BASE_URL, ENABLE_DOCS, CHATBOT_WEBHOOK_INBOX_ENABLED
 
 # ───────────────────────────
 # Importar modelos antes das rotas
@@ -224,8 +224,7 @@ async def startup():
 
     # Inicializa sistema de notificações
     try:
-        db = next(get_db())
-        await initialize_notification_system(db)
+        await initialize_notification_system()
         logger.info("Sistema de notificações inicializado com sucesso.")
     except Exception as e:
         logger.error(f"Erro ao inicializar sistema de notificações: {e}")
@@ -239,6 +238,24 @@ async def startup():
     except Exception as e:
         logger.error(f"Erro ao inicializar sistema de chatbot: {e}")
 
+    # Aquece o mapa identificador do WhatsApp -> empresa usado pelos webhooks
+    try:
+        from app.api.notifications.core.whatsapp_config_cache import aquecer_mapa_empresas
+
+        total = aquecer_mapa_empresas()
+        logger.info(f"Mapa de empresas do WhatsApp carregado ({total} identificadores).")
+    except Exception as e:
+        logger.error(f"Erro ao carregar mapa de empresas do WhatsApp: {e}")
+
+    # Inicia o pool que processa o inbox de webhooks do WhatsApp (tabela criada acima)
+    if CHATBOT_WEBHOOK_INBOX_ENABLED:
+        try:
+            from app.api.chatbot.core.webhook_inbox import webhook_inbox
+
+            await webhook_inbox.start()
+        except Exception as e:
+            logger.error(f"Erro ao iniciar inbox de webhooks do chatbot: {e}")
+
     logger.info("API iniciada com sucesso.")
 
 # ───────────────────────────
@@ -249,6 +266,14 @@ async def shutdown():
     from app.api.notifications.core.notification_system import shutdown_notification_system
     
     logger.info("Encerrando API...")
+
+    # Para o inbox de webhooks (webhooks em andamento voltam para a fila após o lease)
+    try:
+        from app.api.chatbot.core.webhook_inbox import webhook_inbox
+
+        await webhook_inbox.stop()
+    except Exception as e:
+        logger.error(f"Erro ao encerrar inbox de webhooks do chatbot: {e}")
     
     # Encerra sistema de notificações
     try:
@@ -46,6 +46,104 @@ log_messages_total = Counter(
     ['level']
 )
 
+# Métricas de cache de geolocalização (Google Maps)
+geo_cache_requests_total = Counter(
+    'geo_cache_requests_total',
+    'Consultas ao cache de geolocalização',
+    ['tipo', 'resultado']  # resultado: hit_memoria, hit_banco, miss
+)
+
+# Métricas das filas de saída por conexão WebSocket
+websocket_outbound_queue_depth = Gauge(
+    'websocket_outbound_queue_depth',
+    'Mensagens aguardando envio nas filas de saída WebSocket (soma das conexões do worker)'
+)
+
+websocket_outbound_overflow_total = Counter(
+    'websocket_outbound_overflow_total',
+    'Mensagens afetadas por fila de saída WebSocket cheia',
+    ['acao']  # acao: drop_oldest, coalesce, disconnect
+)
+
+# Métricas do outbox de notificações
+notification_delivery_latency_seconds = Histogram(
+    'notification_delivery_latency_seconds',
+    'Tempo entre a criação da notificação e o envio com sucesso',
+    ['channel'],
+    buckets=[0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0]
+)
+
+notification_send_duration_seconds = Histogram(
+    'notification_send_duration_seconds',
+    'Duração da chamada de envio ao canal',
+    ['channel'],
+    buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+)
+
+notification_deliveries_total = Counter(
+    'notification_deliveries_total',
+    'Tentativas de entrega de notificações',
+    ['channel', 'resultado']  # resultado: sent, retry, failed
+)
+
+# Métricas dos caches em memória por worker (assinaturas, config WhatsApp, ...)
+memory_cache_requests_total = Counter(
+    'memory_cache_requests_total',
+    'Consultas aos caches em memória dos workers',
+    ['cache', 'resultado']  # resultado: hit, miss, stale
+)
+
+# Métricas do dashboard administrativo
+dashboard_section_duration_seconds = Histogram(
+    'dashboard_section_duration_seconds',
+    'Duração de cada seção do dashboard (consulta em sessão própria)',
+    ['secao'],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+
+
+# Métricas do inbox de webhooks do chatbot
+chatbot_webhook_inbox_depth = Gauge(
+    'chatbot_webhook_inbox_depth',
+    'Webhooks no inbox do chatbot por status (pending, processing, failed)',
+    ['status']
+)
+
+chatbot_webhook_inbox_processed_total = Counter(
+    'chatbot_webhook_inbox_processed_total',
+    'Processamentos de webhooks do inbox do chatbot',
+    ['resultado']  # resultado: done, retry, failed
+)
+
+chatbot_webhook_inbox_lag_seconds = Histogram(
+    'chatbot_webhook_inbox_lag_seconds',
+    'Tempo entre o recebimento do webhook e o fim do processamento com sucesso',
+    buckets=[0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0]
+)
+
+chatbot_whatsapp_messages_total = Counter(
+    'chatbot_whatsapp_messages_total',
+    'Mensagens recebidas pelo webhook do chatbot, por resultado da deduplicação',
+    ['resultado']  # resultado: nova, duplicada_memoria, duplicada_banco
+)
+
+# Métricas do cliente LLM (Groq) do chatbot
+chatbot_llm_requests_total = Counter(
+    'chatbot_llm_requests_total',
+    'Chamadas ao LLM do chatbot por resultado',
+    ['resultado']  # resultado: ok, erro, cache, circuito_aberto, sem_vaga
+)
+
+chatbot_llm_duration_seconds = Histogram(
+    'chatbot_llm_duration_seconds',
+    'Duração das chamadas HTTP ao LLM do chatbot',
+    buckets=[0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0]
+)
+
+chatbot_llm_circuito_aberto = Gauge(
+    'chatbot_llm_circuito_aberto',
+    'Circuit breaker do LLM do chatbot aberto (1) ou fechado (0)'
+)
 
 class PrometheusMiddleware(BaseHTTPMiddleware):
     """Middleware para coletar métricas Prometheus das requisições HTTP."""
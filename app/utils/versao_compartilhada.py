@@ -0,0 +1,127 @@
+"""
+Contador de versão compartilhado entre workers, usado para invalidar caches em memória.
+
+Cada cache usa uma sequence do Postgres como contador: quem altera os dados chama
+`incrementar()` (nextval) e os demais workers comparam `atual()` (last_value, ou 0
+enquanto a sequence nunca foi usada) com a versão que carregaram. A leitura é feita
+no máximo uma vez a cada `intervalo_checagem` segundos, inclusive quando falha
+(sequence ausente), então o custo por requisição é só uma comparação.
+
+`CacheVersionado` junta o contador a um `CacheAdapter` (LRU com TTL) por worker.
+"""
+from __future__ import annotations
+
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.database.db_connection import SessionLocal
+from app.utils.logger import logger
+
+
+class VersaoCompartilhada:
+    """Versão de um cache, lida de uma sequence do Postgres (ex.: "notifications.subscriptions_version_seq")."""
+
+    def __init__(self, sequence: str, intervalo_checagem: float = 2.0, session_factory=SessionLocal):
+        self.sequence = sequence
+        self.intervalo_checagem = float(intervalo_checagem)
+        self._session_factory = session_factory
+        self._versao: Optional[int] = None
+        self._checado_em: Optional[float] = None
+        self._lock = Lock()
+
+    def atual(self) -> Optional[int]:
+        """
+        Versão atual (com leitura limitada pelo intervalo de checagem).
+
+        Retorna None se o contador não pôde ser lido; o chamador deve tratar
+        como "versão desconhecida" e não confiar no cache.
+        """
+        with self._lock:
+            if self._checado_em is not None and (monotonic() - self._checado_em) < self.intervalo_checagem:
+                return self._versao
+        try:
+            with self._session_factory() as db:
+                # Antes do primeiro nextval last_value já vale o START (1); 0 garante que o primeiro
+                # incremento mude a versão
+                versao = db.execute(
+                    text(f"SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {self.sequence}")
+                ).scalar()
+        except Exception as e:
+            logger.warning(f"[VersaoCompartilhada] Falha ao ler {self.sequence}: {e}")
+            versao = None
+        with self._lock:
+            self._versao = versao
+            # Falhas também respeitam o intervalo (None = cache ignorado até a próxima leitura)
+            self._checado_em = monotonic()
+        return versao
+
+    def incrementar(self) -> Optional[int]:
+        """Avança a versão (invalida o cache em todos os workers) e retorna o novo valor."""
+        try:
+            with self._session_factory() as db:
+                versao = db.execute(text(f"SELECT nextval('{self.sequence}')")).scalar()
+                db.commit()
+        except Exception as e:
+            logger.warning(f"[VersaoCompartilhada] Falha ao incrementar {self.sequence}: {e}")
+            versao = None
+        with self._lock:
+            self._versao = versao
+            # Falhas também respeitam o intervalo (None = cache ignorado até a próxima leitura)
+            self._checado_em = monotonic()
+        return versao
+
+
+class CacheVersionado:
+    """
+    Cache em memória (LRU com TTL) descartado por inteiro quando a versão compartilhada muda.
+
+    `get(chave, carregar)` devolve o valor em cache ou chama `carregar()`; valores None
+    também são guardados (ex.: "empresa sem configuração"). Se a versão não puder ser
+    lida, o cache é ignorado e `carregar()` é chamado sempre.
+    """
+
+    def __init__(self, versao: VersaoCompartilhada, max_itens: int = 5000, ttl_segundos: Optional[float] = 600.0):
+        from app.api.localizacao.adapters.cache_adapter import CacheAdapter
+
+        self.versao = versao
+        # TTL é só uma rede de segurança; a invalidação normal é pela versão
+        self._memoria = CacheAdapter(max_itens=max_itens, ttl_segundos=ttl_segundos)
+        self._versao_carregada: Optional[int] = None
+        # Incrementado a cada limpeza local; evita gravar um carregamento iniciado antes dela
+        self._geracao = 0
+        self._lock = Lock()
+
+    def get(self, chave: str, carregar: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Retorna (valor, hit)."""
+        versao = self.versao.atual()
+        with self._lock:
+            if versao is None or versao != self._versao_carregada:
+                self._memoria.clear()
+                self._geracao += 1
+                self._versao_carregada = versao
+            geracao = self._geracao
+
+        if versao is not None:
+            item = self._memoria.get(chave)
+            if item is not None:
+                return item[0], True
+
+        valor = carregar()
+        with self._lock:
+            if versao is not None and geracao == self._geracao:
+                self._memoria.set(chave, (valor,))
+        return valor, False
+
+    def invalidar(self) -> None:
+        """Descarta o cache deste worker e avança a versão para os demais."""
+        with self._lock:
+            self._memoria.clear()
+            self._geracao += 1
+            self._versao_carregada = None
+        if self.versao.incrementar() is None:
+            logger.warning(
+                f"[CacheVersionado] {self.versao.sequence} não avançou; outros workers dependem do TTL"
+            )
@@ -0,0 +1,4 @@
+-- SQL migration: versão compartilhada do cache em memória dos telefones de entregadores.
+-- Cada create/update/delete em entregadores_dv faz nextval; os workers comparam last_value.
+
+CREATE SEQUENCE IF NOT EXISTS cadastros.entregadores_telefones_version_seq;
@@ -0,0 +1,9 @@
+-- SQL migration: termos extras de intenção por empresa (chatbot_configs.palavras_chave).
+-- Formato: {"intenção": ["termo", ...]}; somados aos termos padrão do IntentEngine.
+
+DO $$
+BEGIN
+    IF to_regclass('chatbot.chatbot_configs') IS NOT NULL THEN
+        ALTER TABLE chatbot.chatbot_configs ADD COLUMN IF NOT EXISTS palavras_chave JSONB;
+    END IF;
+END $$;
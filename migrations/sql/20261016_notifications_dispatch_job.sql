@@ -0,0 +1,10 @@
+-- SQL migration: job_id dos disparos em massa (progresso consultável por job).
+
+DO $$
+BEGIN
+    IF to_regclass('notifications.notifications') IS NOT NULL THEN
+        ALTER TABLE notifications.notifications ADD COLUMN IF NOT EXISTS job_id VARCHAR;
+        CREATE INDEX IF NOT EXISTS ix_notifications_notifications_job_id
+            ON notifications.notifications (job_id);
+    END IF;
+END $$;
@@ -0,0 +1,10 @@
+-- SQL migration: índice usado pelo outbox de notificações para reservar
+-- notificações pendentes/retrying com next_retry_at vencido (FOR UPDATE SKIP LOCKED)
+
+DO $$
+BEGIN
+    IF to_regclass('notifications.notifications') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS ix_notifications_outbox
+            ON notifications.notifications (status, next_retry_at, created_at);
+    END IF;
+END $$;
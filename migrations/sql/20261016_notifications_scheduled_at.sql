@@ -0,0 +1,9 @@
+-- SQL migration: envio agendado de notificações (scheduled_at).
+-- O vencimento fica em next_retry_at, já coberto por ix_notifications_outbox.
+
+DO $$
+BEGIN
+    IF to_regclass('notifications.notifications') IS NOT NULL THEN
+        ALTER TABLE notifications.notifications ADD COLUMN IF NOT EXISTS scheduled_at TIMESTAMP WITHOUT TIME ZONE;
+    END IF;
+END $$;
@@ -0,0 +1,4 @@
+-- SQL migration: versão compartilhada do índice em memória de assinaturas.
+-- Cada alteração em notification_subscriptions faz nextval; os workers comparam last_value.
+
+CREATE SEQUENCE IF NOT EXISTS notifications.subscriptions_version_seq;
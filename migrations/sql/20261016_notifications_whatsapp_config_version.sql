@@ -0,0 +1,4 @@
+-- SQL migration: versão compartilhada do cache em memória da configuração do WhatsApp.
+-- Cada create/update/delete em whatsapp_configs faz nextval; os workers comparam last_value.
+
+CREATE SEQUENCE IF NOT EXISTS notifications.whatsapp_config_version_seq;
@@ -0,0 +1,67 @@
+"""
+Servidor HTTP local que imita o chat completions da Groq, para testes do cliente LLM.
+
+Responde `POST /` com `{"choices": [{"message": {"content": ...}}]}`; `status` e
+`atraso` permitem simular rate limit (429), erro 5xx e lentidão.
+"""
+import asyncio
+import json
+
+
+class LLMStubServer:
+    def __init__(self, resposta: str = "ok", status: int = 200, atraso: float = 0.0):
+        self.resposta = resposta
+        self.status = status
+        self.atraso = atraso
+        self.requisicoes = []
+        self.em_andamento = 0
+        self.max_em_andamento = 0
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/"
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._atender, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                tamanho = 0
+                while True:
+                    cabecalho = await reader.readline()
+                    if cabecalho in (b"\r\n", b"\n", b""):
+                        break
+                    nome, _, valor = cabecalho.decode().partition(":")
+                    if nome.strip().lower() == "content-length":
+                        tamanho = int(valor.strip())
+                corpo = await reader.readexactly(tamanho) if tamanho else b""
+                self.requisicoes.append(json.loads(corpo or b"{}"))
+
+                self.em_andamento += 1
+                self.max_em_andamento = max(self.max_em_andamento, self.em_andamento)
+                try:
+                    await asyncio.sleep(self.atraso)
+                finally:
+                    self.em_andamento -= 1
+
+                resposta = json.dumps({"choices": [{"message": {"role": "assistant", "content": self.resposta}}]}).encode()
+                writer.write(
+                    f"HTTP/1.1 {self.status} STUB\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(resposta)}\r\n\r\n".encode() + resposta
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,18 @@
+import asyncio
+
+from app.api.notifications.channels.http_clients import get_httpx_client
+
+
+def test_clientes_de_loop_temporario_sao_fechados_ao_fim_do_asyncio_run():
+    async def usar_cliente():
+        client = get_httpx_client("teste")
+        assert get_httpx_client("teste") is client
+        return client
+
+    # Como os services síncronos: cada asyncio.run é um loop novo
+    primeiro = asyncio.run(usar_cliente())
+    segundo = asyncio.run(usar_cliente())
+
+    assert primeiro is not segundo
+    assert primeiro.is_closed
+    assert segundo.is_closed
@@ -0,0 +1,59 @@
+import os
+import timeit
+
+import pytest
+
+from app.api.chatbot.core.intent_engine import IntentEngine, analisar_mensagem, engine_padrao, normalizar_texto
+
+
+def test_normaliza_e_encontra_termos_de_todas_as_intencoes():
+    analise = engine_padrao.analisar("  Quero PEDIR o  Cardápio, qual o preço?")
+
+    assert analise.texto == "quero pedir o cardapio, qual o preco?"
+    assert analise.tem("tentativa_pedido")
+    assert analise.tem("ver_cardapio")
+    assert analise.tem("pergunta")
+    assert not analise.tem("atualizacoes")
+    assert (0, "quero") in analise.ocorrencias["tentativa_pedido"]
+
+
+def test_termos_sobrepostos_e_inicio_da_mensagem():
+    engine = IntentEngine({"a": ["he", "she", "hers"], "b": ["his"]})
+    analise = engine.analisar("ushers")
+
+    assert sorted(analise.ocorrencias["a"]) == [(1, "she"), (2, "he"), (2, "hers")]
+    assert not analise.tem("b")
+    assert engine.analisar("hers").comeca_com("a")
+    assert not analise.comeca_com("a")
+
+
+def test_palavras_chave_da_empresa_somam_aos_padroes():
+    palavras_chave = {"tentativa_pedido": ["Encomendar"], "reclamacao": ["atrasou"]}
+
+    analise = analisar_mensagem("vou encomendar, o último atrasou", empresa_id=7, palavras_chave=palavras_chave)
+
+    assert analise.tem("tentativa_pedido")
+    assert analise.tem("reclamacao")
+    assert not engine_padrao.analisar("vou encomendar").tem("tentativa_pedido")
+    assert normalizar_texto("Último") == "ultimo"
+
+
+def test_chamar_atendente_e_pedido_de_cardapio():
+    assert engine_padrao.analisar("Quero falar com alguém, por favor").tem("chamar_atendente")
+    assert engine_padrao.analisar("chamar_atendente").tem("chamar_atendente")
+    assert engine_padrao.analisar("pode me mandar aí o cardápio?").tem("pedido_cardapio")
+    assert engine_padrao.analisar("Ver o Menu").somente("ver_cardapio")
+    assert not engine_padrao.analisar("o cardápio tem pizza?").somente("ver_cardapio")
+
+
+# Medição de tempo não entra na suíte normal: rode com RUN_BENCHMARKS=1 pytest
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="benchmark opcional (RUN_BENCHMARKS=1)")
+def test_micro_benchmark_analise_leva_microssegundos():
+    mensagem = "Oi, boa noite! Quero pedir 2 x-bacon e uma coca, quanto fica a entrega até o centro?"
+    execucoes = 2000
+
+    segundos = timeit.timeit(lambda: engine_padrao.analisar(mensagem), number=execucoes)
+    microssegundos = segundos / execucoes * 1e6
+
+    # Limite folgado para não falhar em máquinas lentas
+    assert microssegundos < 500, f"{microssegundos:.1f} µs/mensagem ({len(mensagem)} caracteres)"
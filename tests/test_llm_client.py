@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.api.chatbot.core.llm_client import CircuitBreaker, LLMClient, LLMIndisponivel
+from llm_stub_server import LLMStubServer
+
+MENSAGENS = [{"role": "user", "content": "Meu nome é Ana Souza"}]
+
+
+def test_cache_de_prompt_deterministico():
+    async def cenario():
+        async with LLMStubServer(resposta='{"full_name": "Ana Souza"}') as stub:
+            client = LLMClient(api_url=stub.url, api_key="teste")
+            primeira = await client.chat(MENSAGENS, model="m", temperature=0.0, cachear=True)
+            segunda = await client.chat(MENSAGENS, model="m", temperature=0.0, cachear=True)
+            await client.chat(MENSAGENS, model="m", temperature=0.0)
+
+            assert primeira == segunda
+            assert len(stub.requisicoes) == 2
+
+    asyncio.run(cenario())
+
+
+def test_limite_de_concorrencia_por_empresa():
+    async def cenario():
+        async with LLMStubServer(atraso=0.05) as stub:
+            client = LLMClient(api_url=stub.url, max_concorrencia=10, max_concorrencia_empresa=2)
+            await asyncio.gather(*(client.chat(MENSAGENS, model="m", empresa_id=1) for _ in range(6)))
+
+            assert len(stub.requisicoes) == 6
+            assert stub.max_em_andamento == 2
+
+    asyncio.run(cenario())
+
+
+def test_circuito_abre_com_rate_limit():
+    async def cenario():
+        async with LLMStubServer(status=429) as stub:
+            client = LLMClient(api_url=stub.url, breaker=CircuitBreaker(falhas_para_abrir=2, segundos_aberto=60))
+            for _ in range(2):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await client.chat(MENSAGENS, model="m")
+            with pytest.raises(LLMIndisponivel):
+                await client.chat(MENSAGENS, model="m")
+
+            assert len(stub.requisicoes) == 2
+
+    asyncio.run(cenario())
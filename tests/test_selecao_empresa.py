@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from app.api.pedidos.services.service_pedido_selecao_empresa import SelecaoEmpresaService
+
+
+class _RepoEmpresaFake:
+    def __init__(self, candidatas):
+        self.candidatas = candidatas
+
+    def list_candidatas_entrega(self, latitude, longitude):
+        return self.candidatas
+
+
+class _TaxaServiceFake:
+    def __init__(self, distancias_rota):
+        self.distancias_rota = distancias_rota
+        self.geo_service = SimpleNamespace(calcular_distancia=self._calcular_distancia)
+        self.consultadas = []
+
+    def obter_coordenadas_endereco(self, endereco):
+        return (-23.0, -46.0)
+
+    def obter_coordenadas_empresa(self, empresa_id):
+        self.consultadas.append(empresa_id)
+        return (-23.0 - empresa_id / 100, -46.0)
+
+    def _calcular_distancia(self, origem, destino):
+        return self.distancias_rota[round((-23.0 - origem.latitude) * 100)]
+
+
+def test_empresa_sem_faixa_a_partir_de_zero_km_nao_e_elegivel():
+    # empresa 1 é a mais próxima, mas só tem faixa ativa a partir de 2 km
+    candidatas = [
+        (SimpleNamespace(id=1), 0.5, 10.0, False),
+        (SimpleNamespace(id=2), 1.5, 10.0, True),
+    ]
+    taxa = _TaxaServiceFake({1: 0.6, 2: 1.8})
+    service = SelecaoEmpresaService(None, taxa, repo_empresa=_RepoEmpresaFake(candidatas), top_k=3)
+
+    empresa, distancia = service.selecionar(object(), lambda ids: set(ids))
+
+    assert empresa.id == 2
+    assert distancia == 1.8
+    assert taxa.consultadas == [2]
+
+
+def test_nenhuma_empresa_elegivel_retorna_none():
+    candidatas = [(SimpleNamespace(id=1), 0.5, None, False)]
+    service = SelecaoEmpresaService(
+        None, _TaxaServiceFake({1: 0.6}), repo_empresa=_RepoEmpresaFake(candidatas), top_k=3
+    )
+
+    assert service.selecionar(object(), lambda ids: set(ids)) == (None, None)
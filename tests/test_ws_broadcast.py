@@ -0,0 +1,100 @@
+import asyncio
+
+from app.api.notifications.core.websocket_manager import ConnectionManager
+from app.api.notifications.core.ws_broadcast import InProcessBroadcastBackend
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, data: str):
+        self.sent.append(data)
+
+
+def test_send_to_empresa_entrega_em_todos_os_workers():
+    async def cenario():
+        hub = []
+        worker_a = ConnectionManager(broadcast_backend=InProcessBroadcastBackend(hub))
+        worker_b = ConnectionManager(broadcast_backend=InProcessBroadcastBackend(hub))
+        await worker_a.start_broadcast()
+        await worker_b.start_broadcast()
+
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect(ws_a, user_id="1", empresa_id="10")
+        await worker_b.connect(ws_b, user_id="2", empresa_id="10")
+
+        enviados = await worker_a.send_to_empresa("10", {"type": "kanban"})
+        await worker_b.send_to_user("1", {"type": "direto"})
+        await asyncio.sleep(0.01)
+
+        assert enviados == 1
+        assert len(ws_a.sent) == 2
+        assert len(ws_b.sent) == 1
+
+    asyncio.run(cenario())
+
+
+class SlowWebSocket(FakeWebSocket):
+    async def send_text(self, data: str):
+        await asyncio.sleep(1)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+def test_socket_lento_e_removido_sem_atrasar_os_demais():
+    async def cenario():
+        manager = ConnectionManager()
+        manager.max_connections_per_user_empresa = 0
+        manager.send_timeout_seconds = 0.05
+
+        rapido, lento = FakeWebSocket(), SlowWebSocket()
+        await manager.connect(rapido, user_id="1", empresa_id="10")
+        await manager.connect(lento, user_id="2", empresa_id="10")
+
+        enviados = await manager.send_to_empresa("10", {"type": "kanban"})
+        await asyncio.sleep(0.2)
+
+        assert enviados == 2
+        assert len(rapido.sent) == 1
+        assert manager.get_empresa_connections("10") == 1
+
+    asyncio.run(cenario())
+
+
+def test_fila_cheia_coalesce_mantem_ultima_versao_do_evento():
+    async def cenario():
+        manager = ConnectionManager()
+        manager.outbound_queue_max = 2
+        manager.outbound_overflow_policy = "coalesce"
+
+        ws = FakeWebSocket()
+        await manager.connect(ws, user_id="1", empresa_id="10")
+        for status in ("P", "I", "E"):
+            await manager.emit_event(
+                event="pedido_atualizado", scope="empresa", empresa_id="10",
+                payload={"pedido_id": 7, "status": status},
+            )
+        await asyncio.sleep(0.01)
+
+        assert len(ws.sent) == 2
+        assert '"E"' in ws.sent[-1]
+
+    asyncio.run(cenario())
+
+
+def test_evento_emitido_de_outra_thread_e_enviado_pelo_loop_da_conexao():
+    async def cenario():
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, user_id="1", empresa_id="10")
+
+        # Como os services síncronos: asyncio.run em outra thread
+        enviados = await asyncio.to_thread(asyncio.run, manager.send_to_empresa("10", {"type": "kanban"}))
+        await asyncio.sleep(0.01)
+
+        assert enviados == 1
+        assert len(ws.sent) == 1
+
+    asyncio.run(cenario())